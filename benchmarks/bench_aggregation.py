@@ -0,0 +1,66 @@
+"""
+Throughput of per-call metric recording across threads.
+
+Compares updating labeled prometheus_client metrics on every call (the
+direct path in update_monitoring_systems) with recording into the
+per-thread MetricAggregator buffers.
+
+Run from the repository root with the package installed:
+    python benchmarks/bench_aggregation.py
+"""
+
+import threading
+import time
+
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+from pipeline_monitor.aggregation import MetricAggregator
+
+CALLS_PER_THREAD = 50000
+THREAD_COUNTS = (1, 2, 4, 8, 16, 32)
+
+def run_threads(target, threads: int) -> float:
+    """Run ``target`` in ``threads`` threads and return calls per second."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        target()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    return threads * CALLS_PER_THREAD / (time.perf_counter() - start)
+
+def main():
+    registry = CollectorRegistry()
+    runs = Counter('bench_runs_total', 'runs', ['pipeline_name', 'status'], registry=registry)
+    duration = Histogram('bench_duration_seconds', 'duration', ['pipeline_name'], registry=registry)
+    aggregator = MetricAggregator(emit=False)
+
+    def direct():
+        for _ in range(CALLS_PER_THREAD):
+            runs.labels(pipeline_name='etl_step', status='success').inc()
+            duration.labels(pipeline_name='etl_step').observe(0.003)
+
+    def aggregated():
+        for _ in range(CALLS_PER_THREAD):
+            aggregator.record('etl_step', 0.003)
+
+    print(f"{'threads':>8} {'direct calls/s':>16} {'aggregated calls/s':>20} {'ratio':>7}")
+    for threads in THREAD_COUNTS:
+        direct_rate = run_threads(direct, threads)
+        aggregated_rate = run_threads(aggregated, threads)
+        print(f"{threads:>8} {direct_rate:>16,.0f} {aggregated_rate:>20,.0f} "
+              f"{aggregated_rate / direct_rate:>6.1f}x")
+
+    snapshot = aggregator.flush()
+    expected = CALLS_PER_THREAD * sum(THREAD_COUNTS)
+    assert snapshot['etl_step'][0] == expected, "aggregator lost updates"
+
+if __name__ == "__main__":
+    main()
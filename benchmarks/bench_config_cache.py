@@ -0,0 +1,46 @@
+"""
+Per-call overhead of resolving the SMS alert handler from the configuration.
+
+Compares the previous hot path (parse ``examples/config.json`` and build a
+handler on every call) with the cached ConfigRegistry lookup.
+
+Run from the repository root with the package installed:
+    python benchmarks/bench_config_cache.py
+"""
+
+import timeit
+
+from pipeline_monitor.alerts import sms_alert_handler
+from pipeline_monitor.config import Configuration, ConfigRegistry, DEFAULT_CONFIG_PATH
+
+ITERATIONS = 20000
+
+def uncached_lookup():
+    """Previous behaviour: read the file and build a handler per call."""
+    config = Configuration.from_file(DEFAULT_CONFIG_PATH)
+    sms_cfg = config.get('alerts', {}).get('sms', {})
+    if sms_cfg:
+        sms_alert_handler(
+            provider_url=sms_cfg['provider_url'],
+            api_key=sms_cfg['api_key'],
+            sender_number=sms_cfg['sender_number'],
+            recipient_numbers=sms_cfg['recipient_numbers']
+        )
+
+def main():
+    registry = ConfigRegistry()
+
+    def cached_lookup():
+        registry.get_alert_hook(DEFAULT_CONFIG_PATH, 'sms')
+
+    results = {
+        'uncached': min(timeit.repeat(uncached_lookup, number=ITERATIONS, repeat=3)),
+        'cached': min(timeit.repeat(cached_lookup, number=ITERATIONS, repeat=3)),
+    }
+
+    for name, total in results.items():
+        print(f"{name:>10}: {total / ITERATIONS * 1e6:8.2f} us/call")
+    print(f"{'speedup':>10}: {results['uncached'] / results['cached']:8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Load test of the dashboard: concurrent viewers and metric events per second.
+
+Starts the dashboard in a child process that emits metrics at a fixed
+rate, connects Socket.IO clients to it and reports the frames each
+client received and the latency from emit_metric to delivery.
+
+Run from the repository root with the package installed:
+    python benchmarks/bench_dashboard_load.py --clients 200 --rate 5000
+    python benchmarks/bench_dashboard_load.py --server eventlet
+
+Install websocket-client so the clients use the WebSocket transport
+rather than long-polling.
+"""
+
+import argparse
+import subprocess
+import sys
+import threading
+import time
+
+import socketio
+
+def serve(args) -> None:
+    """Child process: run the dashboard and emit metrics at ``args.rate``."""
+    if args.server == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif args.server == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+
+    from pipeline_monitor.dashboard.app import emit_metric, start_dashboard
+
+    def produce():
+        interval = 1.0 / args.rate
+        batch = max(1, int(args.rate / 100))
+        sent = 0
+        start = time.perf_counter()
+        while True:
+            for _ in range(batch):
+                emit_metric('performance', {
+                    'function_name': 'etl_step',
+                    'execution_time': 0.003,
+                    'active_pipelines': sent % 8,
+                    'sent_at': time.time()
+                })
+                sent += 1
+            delay = start + sent * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    threading.Thread(target=produce, daemon=True).start()
+    start_dashboard(
+        host='127.0.0.1',
+        port=args.port,
+        server=args.server,
+        workers=args.workers,
+        message_queue=args.message_queue
+    )
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float('nan')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=5000, help="metric events per second")
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--server', default='threading', choices=('threading', 'eventlet', 'gevent'))
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--message-queue', default=None)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    child = subprocess.Popen([sys.executable, *sys.argv, '--serve'])
+    try:
+        time.sleep(3)  # Wait for the server to bind
+        frames = [0] * args.clients
+        latencies = []
+        lock = threading.Lock()
+        clients = []
+
+        for i in range(args.clients):
+            client = socketio.Client()
+
+            def on_frame(frame, i=i):
+                now = time.time()
+                frames[i] += 1
+                for update in frame['updates']:
+                    sent_at = update['data'].get('sent_at')
+                    if sent_at:
+                        with lock:
+                            latencies.append(now - sent_at)
+                return True  # Acknowledge, so the next frame is sent
+
+            client.on('metric_frame', on_frame)
+            client.connect(f'http://127.0.0.1:{args.port}', wait_timeout=10)
+            clients.append(client)
+
+        connected = sum(client.connected for client in clients)
+        with lock:
+            latencies.clear()
+        start_frames = sum(frames)
+        time.sleep(args.duration)
+        received = sum(frames) - start_frames
+        with lock:
+            observed = list(latencies)
+
+        print(f"server={args.server} workers={args.workers} rate={args.rate:.0f} events/s")
+        print(f"clients connected:     {connected}/{args.clients}")
+        print(f"frames/s per client:   {received / args.duration / max(connected, 1):.1f}")
+        print(f"frames/s total:        {received / args.duration:.0f}")
+        print(f"latency p50 / p95 ms:  {percentile(observed, 0.5) * 1000:.1f} / "
+              f"{percentile(observed, 0.95) * 1000:.1f}")
+
+        for client in clients:
+            client.disconnect()
+    finally:
+        child.terminate()
+        child.wait()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Push exporter traffic against a local UDP listener.
+
+Runs a short job of tracked calls with the StatsD or InfluxDB exporter
+pointed at a UDP socket on localhost, then stops the exporter as the
+interpreter would at exit. Reports the datagrams and bytes received,
+the packets per second while the job ran, and whether the pushed call
+counts add up to the calls made: a job shorter than the push interval
+must still be reported by the final push.
+
+Run from the repository root with the package installed:
+    python benchmarks/bench_exporters.py
+    python benchmarks/bench_exporters.py --protocol influx --calls 50000 --output exporters.json
+
+Exits with status 1 if the pushed counts do not match.
+"""
+
+import argparse
+import json
+import socket
+import sys
+import threading
+import time
+
+from pipeline_monitor.decorators import track_performance
+from pipeline_monitor.exporters import LineProtocolExporter, StatsDExporter
+
+class UDPListener:
+    """Collect datagrams sent to a localhost port in a background thread."""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.1)
+        self.port = self.sock.getsockname()[1]
+        self.datagrams = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.datagrams.append(self.sock.recv(65535))
+            except socket.timeout:
+                continue
+
+    def close(self):
+        time.sleep(0.2)  # let the last datagrams arrive
+        self._stop.set()
+        self._thread.join()
+        self.sock.close()
+
+def pushed_calls(protocol: str, datagrams, pipeline: str) -> float:
+    """Sum the pushed pipeline_calls deltas for ``pipeline``."""
+    total = 0.0
+    for datagram in datagrams:
+        for line in datagram.decode().splitlines():
+            if protocol == 'statsd':
+                # pipeline_calls:<n>|c|#pipeline_name:<name>,status:success
+                name, _, rest = line.partition(':')
+                value, _, tags = rest.partition('|c|#')
+                if name == 'pipeline_calls' and f'pipeline_name:{pipeline}' in tags.split(','):
+                    total += float(value)
+            else:
+                # pipeline_calls,pipeline_name=<name>,status=success value=<n> <ts>
+                key, fields, _ = line.split(' ')
+                measurement, *tags = key.split(',')
+                if measurement == 'pipeline_calls' and f'pipeline_name={pipeline}' in tags:
+                    total += float(fields.split('=')[1])
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--protocol', choices=['statsd', 'influx'], default='statsd')
+    parser.add_argument('--calls', type=int, default=20000, help="tracked calls in the job")
+    parser.add_argument('--pipelines', type=int, default=20, help="distinct pipeline names")
+    parser.add_argument('--interval', type=float, default=0.5, help="seconds between pushes")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    listener = UDPListener()
+    url = f'udp://127.0.0.1:{listener.port}'
+    if args.protocol == 'statsd':
+        exporter = StatsDExporter(url, interval=args.interval)
+    else:
+        exporter = LineProtocolExporter(url, interval=args.interval)
+    # Start from the current registry state, as a fresh process would
+    exporter.changes(exporter.collect())
+    exporter.start()
+
+    funcs = []
+    for i in range(args.pipelines):
+        def step(x):
+            return x + 1
+        # Pipelines are named after the tracked function
+        step.__name__ = f'bench_export_{i}'
+        funcs.append(track_performance()(step))
+
+    start = time.perf_counter()
+    for i in range(args.calls):
+        funcs[i % args.pipelines](i)
+    job_seconds = time.perf_counter() - start
+
+    exporter.stop()
+    listener.close()
+
+    expected = {f'bench_export_{i}': len(range(i, args.calls, args.pipelines)) for i in range(args.pipelines)}
+    mismatched = {
+        name: (count, pushed_calls(args.protocol, listener.datagrams, name))
+        for name, count in expected.items()
+        if pushed_calls(args.protocol, listener.datagrams, name) != count
+    }
+    total_bytes = sum(len(d) for d in listener.datagrams)
+    results = {
+        'protocol': args.protocol,
+        'calls': args.calls,
+        'job_seconds': job_seconds,
+        'datagrams': len(listener.datagrams),
+        'bytes': total_bytes,
+        'max_datagram_bytes': max((len(d) for d in listener.datagrams), default=0),
+        'packets_per_second': len(listener.datagrams) / max(job_seconds, args.interval),
+        'exporter': exporter.stats(),
+        'mismatched': mismatched,
+    }
+
+    print(f"protocol            {args.protocol}")
+    print(f"calls               {args.calls} in {job_seconds:.2f} s")
+    print(f"datagrams           {results['datagrams']} ({total_bytes} bytes, max {results['max_datagram_bytes']})")
+    print(f"packets per second  {results['packets_per_second']:.1f}")
+    print(f"counts              {'ok' if not mismatched else f'{len(mismatched)} pipelines mismatched'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    sys.exit(1 if mismatched else 0)
+
+if __name__ == "__main__":
+    main()
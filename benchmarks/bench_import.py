@@ -0,0 +1,112 @@
+"""
+Import-time budget for Pipeline Monitor modules.
+
+Imports each module in a fresh interpreter with ``-X importtime``, takes
+the median cumulative import time over several runs, and compares it
+with the module's budget. The probe imports json first, so interpreter
+startup and import hooks of the environment are not charged to the
+package. Modules must also not load the listed heavy dependencies
+(Flask is only for the dashboard, requests and smtplib only for
+configured alert channels).
+
+Run from the repository root with the package installed:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --runs 3 --output imports.json
+
+Exits with status 1 if any module is over budget or loads a forbidden
+dependency.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Module -> (budget in ms, modules it must not load). The stdlib logging
+# package alone takes about 10 ms; decorators and core are dominated by
+# prometheus_client and psutil, which tracking needs.
+BUDGETS = {
+    'pipeline_monitor': (5, ('flask', 'prometheus_client', 'psutil', 'requests')),
+    'pipeline_monitor.config': (20, ('flask', 'prometheus_client', 'requests')),
+    'pipeline_monitor.emission': (20, ('flask', 'prometheus_client', 'requests', 'smtplib')),
+    'pipeline_monitor.alerts': (20, ('flask', 'prometheus_client', 'requests', 'smtplib')),
+    'pipeline_monitor.logging_utils': (20, ('flask', 'prometheus_client', 'requests', 'logging.handlers')),
+    'pipeline_monitor.cli': (25, ('flask', 'prometheus_client', 'requests', 'smtplib')),
+    'pipeline_monitor.decorators': (150, ('flask', 'flask_socketio', 'requests', 'smtplib', 'asyncio')),
+    'pipeline_monitor.context': (100, ('flask', 'flask_socketio', 'requests', 'smtplib', 'asyncio')),
+    'pipeline_monitor.core': (150, ('flask', 'flask_socketio', 'requests', 'smtplib')),
+}
+
+# -X importtime only reports import statements, not importlib calls
+PROBE = (
+    "import json, sys; import {module}; "
+    "print(json.dumps([name for name in {forbidden!r} if name in sys.modules]))"
+)
+
+def import_once(module: str, forbidden=()):
+    """
+    Import ``module`` in a fresh interpreter.
+
+    Returns:
+        Tuple of cumulative import time in ms and the forbidden modules
+        that were loaded
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(module=module, forbidden=tuple(forbidden))],
+        capture_output=True, text=True, check=True
+    )
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Top-level entry of the module itself (no indentation)
+        if name.rstrip() == ' ' + module:
+            cumulative_us = int(cumulative)
+    if cumulative_us is None:
+        raise RuntimeError(f"no import time reported for {module}")
+    return cumulative_us / 1000, json.loads(result.stdout.strip().splitlines()[-1])
+
+def median_import_ms(module: str, runs: int):
+    """Median import time over ``runs`` and the forbidden modules loaded."""
+    forbidden = BUDGETS[module][1]
+    times = []
+    loaded = []
+    for _ in range(runs):
+        elapsed, loaded = import_once(module, forbidden)
+        times.append(elapsed)
+    return statistics.median(times), loaded
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5, help="imports per module")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--only', nargs='+', choices=list(BUDGETS), default=list(BUDGETS))
+    args = parser.parse_args()
+
+    print(f"{'module':34} {'ms':>8} {'budget':>8}  status")
+
+    results = {}
+    failed = False
+    for module in args.only:
+        budget, _ = BUDGETS[module]
+        elapsed, loaded = median_import_ms(module, args.runs)
+        status = 'ok'
+        if elapsed > budget:
+            status = 'OVER BUDGET'
+        if loaded:
+            status = f"loads {', '.join(loaded)}"
+        failed = failed or status != 'ok'
+        results[module] = {'ms': elapsed, 'budget_ms': budget, 'forbidden_loaded': loaded}
+        print(f"{module:34} {elapsed:8.1f} {budget:8}  {status}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': sys.version, 'modules': results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Overhead benchmark suite for the monitoring hot path.
+
+Measures, and writes as JSON for comparison across releases:
+  overhead     per-call cost of each decorator / context manager variant,
+               emit_metric and the Prometheus updates (ns over a bare call)
+  threads      calls/s of track_performance variants with 1-64 threads
+  alerts       alert dispatch latency against local stub HTTP and SMTP
+               servers, in sync and async dispatch mode
+  exposition   /metrics render time versus series count, with and without
+               the exposition cache
+
+Run from the repository root with the package installed:
+    python benchmarks/bench_overhead.py --output results.json
+    python benchmarks/bench_overhead.py --quick --only overhead threads
+
+The SMTP stub needs the openssl command to create a certificate for
+STARTTLS; without it the SMTP case is skipped.
+"""
+
+import argparse
+import asyncio
+import http.server
+import json
+import logging
+import os
+import platform
+import socketserver
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest
+
+import pipeline_monitor
+from pipeline_monitor.alerts import AlertHook, email_alert_handler, slack_alert_handler
+from pipeline_monitor.context import ResourceMonitor
+from pipeline_monitor.dashboard.app import emit_metric
+from pipeline_monitor.decorators import track_performance
+from pipeline_monitor.exposition import ExpositionCache
+from pipeline_monitor.prometheus_metrics import PIPELINE_RUNS, record_pipeline_run
+
+THREAD_COUNTS = (1, 2, 4, 8, 16, 32, 64)
+SERIES_COUNTS = (100, 1000, 10000)
+
+def measure_ns(func, calls: int, repeats: int = 5) -> float:
+    """Best-of-``repeats`` nanoseconds per call of ``func``."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        for _ in range(calls):
+            func()
+        best = min(best, (time.perf_counter_ns() - start) / calls)
+    return best
+
+def bench_overhead(calls: int):
+    """Per-call cost of every instrumentation variant over a bare call."""
+    def work():
+        return None
+
+    async def async_work():
+        return None
+
+    variants = {
+        'track_performance': track_performance()(work),
+        'track_performance[sampling=1/100]': track_performance(sampling=100)(work),
+        'track_performance[aggregate]': track_performance(aggregate=True)(work),
+        'track_performance[trace]': track_performance(trace=True)(work),
+        'ResourceMonitor': ResourceMonitor('bench_block')(work),
+        'ResourceMonitor[sample_interval=0.01]': ResourceMonitor('bench_sampled', sample_interval=0.01)(work),
+        'emit_metric': lambda: emit_metric('performance', {'execution_time': 0.003}),
+        'record_pipeline_run': lambda: record_pipeline_run('bench_step', True),
+        'prometheus labels().inc()': lambda: PIPELINE_RUNS.labels(pipeline_name='bench_step', status='success').inc(),
+    }
+
+    baseline = measure_ns(work, calls)
+    results = []
+    for name, func in variants.items():
+        # The background sampler thread makes monitored blocks much slower
+        n = max(10, calls // 50) if 'sample_interval' in name else calls
+        results.append({'name': name, 'overhead_ns': measure_ns(func, n) - baseline})
+
+    tracked = track_performance()(async_work)
+    loop = asyncio.new_event_loop()
+
+    async def run_async(n):
+        for _ in range(n):
+            await tracked()
+
+    async_baseline = measure_ns(lambda: loop.run_until_complete(async_work()), calls // 10)
+    async_total = measure_ns(lambda: loop.run_until_complete(run_async(10)), calls // 10) / 10
+    results.append({'name': 'track_performance[async]', 'overhead_ns': async_total - async_baseline})
+    loop.close()
+
+    print(f"\n{'variant':<40} {'overhead ns/call':>18}")
+    for result in results:
+        print(f"{result['name']:<40} {result['overhead_ns']:>18,.0f}")
+    return {'baseline_ns': baseline, 'variants': results}
+
+def bench_threads(calls: int):
+    """Calls per second of track_performance variants across threads."""
+    def work():
+        return None
+
+    variants = {
+        'full': track_performance()(work),
+        'sampled_1_in_100': track_performance(sampling=100)(work),
+        'aggregated': track_performance(aggregate=True)(work),
+    }
+
+    results = []
+    print(f"\n{'threads':>8} " + ' '.join(f"{name + ' calls/s':>26}" for name in variants))
+    for threads in THREAD_COUNTS:
+        row = {'threads': threads}
+        for name, func in variants.items():
+            per_thread = max(100, calls // threads)
+            barrier = threading.Barrier(threads + 1)
+
+            def worker(func=func, per_thread=per_thread, barrier=barrier):
+                barrier.wait()
+                for _ in range(per_thread):
+                    func()
+
+            workers = [threading.Thread(target=worker) for _ in range(threads)]
+            for w in workers:
+                w.start()
+            barrier.wait()
+            start = time.perf_counter()
+            for w in workers:
+                w.join()
+            row[name] = threads * per_thread / (time.perf_counter() - start)
+        results.append(row)
+        print(f"{threads:>8} " + ' '.join(f"{row[name]:>26,.0f}" for name in variants))
+    return results
+
+class _StubHTTPHandler(http.server.BaseHTTPRequestHandler):
+    """Webhook stub: acknowledge every POST and signal its arrival."""
+
+    received = threading.Event()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+        self.received.set()
+
+    def log_message(self, format, *args):
+        pass
+
+class _StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server accepting STARTTLS, AUTH and one message."""
+
+    context: ssl.SSLContext = None
+    received = threading.Event()
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b'\r\n')
+        self.wfile.flush()
+
+    def handle(self):
+        self.reply('220 stub ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250-stub\r\n250-STARTTLS\r\n250 AUTH PLAIN LOGIN')
+            elif command == 'STARTTLS':
+                self.reply('220 ready')
+                self.connection = self.context.wrap_socket(self.connection, server_side=True)
+                self.rfile = self.connection.makefile('rb')
+                self.wfile = self.connection.makefile('wb')
+            elif command.startswith('AUTH'):
+                self.reply('235 ok')
+            elif command == 'DATA':
+                self.reply('354 go ahead')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                self.reply('250 queued')
+                self.received.set()
+            elif command == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 ok')
+
+def _tls_context(directory: str):
+    """Create a self-signed server TLS context, or None without openssl."""
+    cert, key = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+    try:
+        subprocess.run(
+            ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+             '-subj', '/CN=localhost', '-keyout', key, '-out', cert],
+            check=True, capture_output=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+def _serve(server) -> None:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+def bench_alerts(alerts: int):
+    """Latency from AlertHook.alert() to arrival at a stub server."""
+    http_server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _StubHTTPHandler)
+    http_server.daemon_threads = True
+    _serve(http_server)
+    handlers = {'slack_http': (slack_alert_handler(f'http://127.0.0.1:{http_server.server_address[1]}/hook'),
+                               _StubHTTPHandler.received)}
+
+    tmp = tempfile.TemporaryDirectory()
+    context = _tls_context(tmp.name)
+    if context is not None:
+        _StubSMTPHandler.context = context
+        smtp_server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _StubSMTPHandler)
+        smtp_server.daemon_threads = True
+        _serve(smtp_server)
+        handlers['email_smtp'] = (
+            email_alert_handler('127.0.0.1', smtp_server.server_address[1], 'bench@localhost', 'secret',
+                                ['ops@localhost']),
+            _StubSMTPHandler.received
+        )
+    else:
+        print("\nopenssl not found; skipping the SMTP alert benchmark")
+
+    dispatch_modes = {
+        'sync': None,
+        'async': {'mode': 'async', 'flush_interval': 0.0}
+    }
+
+    results = []
+    print(f"\n{'channel':<12} {'dispatch':<8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'caller us':>10}")
+    for channel, (handler, received) in handlers.items():
+        for mode, dispatch in dispatch_modes.items():
+            hook = AlertHook(handler, dispatch)
+            latencies, caller = [], []
+            for i in range(alerts):
+                received.clear()
+                start = time.perf_counter()
+                hook.alert(f"benchmark alert {i}", {'sequence': i})
+                caller.append(time.perf_counter() - start)
+                if not received.wait(5.0):
+                    raise RuntimeError(f"{channel} stub did not receive alert {i}")
+                latencies.append(time.perf_counter() - start)
+            hook.close()
+
+            latencies.sort()
+            result = {
+                'channel': channel,
+                'dispatch': mode,
+                'p50_ms': statistics.median(latencies) * 1000,
+                'p95_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+                'max_ms': latencies[-1] * 1000,
+                'caller_us': statistics.median(caller) * 1e6
+            }
+            results.append(result)
+            print(f"{channel:<12} {mode:<8} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                  f"{result['max_ms']:>8.2f} {result['caller_us']:>10.1f}")
+
+    http_server.shutdown()
+    if context is not None:
+        smtp_server.shutdown()
+    tmp.cleanup()
+    return results
+
+def bench_exposition(repeats: int):
+    """/metrics render time versus the number of labeled series."""
+    results = []
+    print(f"\n{'series':>8} {'generate_latest ms':>20} {'cached, unchanged ms':>22} {'cached, 1% changed ms':>22}")
+    for series in SERIES_COUNTS:
+        registry = CollectorRegistry()
+        runs = Counter('bench_runs_total', 'runs', ['pipeline_name', 'status'], registry=registry)
+        duration = Histogram('bench_duration_seconds', 'duration', ['pipeline_name'], registry=registry)
+        names = [f'pipeline_{i}' for i in range(series)]
+        for name in names:
+            runs.labels(pipeline_name=name, status='success').inc()
+            duration.labels(pipeline_name=name).observe(0.01)
+
+        cache = ExpositionCache(registry)
+        cache.render()
+        changed = names[:max(1, series // 100)]
+
+        def touch():
+            for name in changed:
+                runs.labels(pipeline_name=name, status='success').inc()
+            cache.render()
+
+        result = {
+            'series': series,
+            'generate_latest_ms': measure_ns(lambda: generate_latest(registry), 1, repeats) / 1e6,
+            'cached_unchanged_ms': measure_ns(cache.render, 1, repeats) / 1e6,
+            'cached_changed_ms': measure_ns(touch, 1, repeats) / 1e6
+        }
+        results.append(result)
+        print(f"{series:>8} {result['generate_latest_ms']:>20.2f} {result['cached_unchanged_ms']:>22.2f} "
+              f"{result['cached_changed_ms']:>22.2f}")
+    return results
+
+SECTIONS = {
+    'overhead': lambda quick: bench_overhead(2000 if quick else 20000),
+    'threads': lambda quick: bench_threads(2000 if quick else 20000),
+    'alerts': lambda quick: bench_alerts(20 if quick else 200),
+    'exposition': lambda quick: bench_exposition(3 if quick else 10),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--only', nargs='+', choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument('--quick', action='store_true', help="fewer iterations, for smoke runs")
+    args = parser.parse_args()
+
+    # Benchmark the instrumentation, not log formatting and output
+    logging.disable(logging.WARNING)
+
+    results = {
+        'meta': {
+            'version': pipeline_monitor.__version__,
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'quick': args.quick
+        }
+    }
+    for section in args.only:
+        results[section] = SECTIONS[section](args.quick)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
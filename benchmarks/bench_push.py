@@ -0,0 +1,240 @@
+"""
+Registry push against a local stub Pushgateway / remote-write server.
+
+Starts an HTTP/1.1 stub server on localhost that fails the first
+``--fail`` requests with 503, runs a short job of tracked calls with a
+``RegistryPusher`` pushing every ``--interval`` seconds, then stops the
+pusher as the interpreter would at exit. Reports pushes, retries, TCP
+connections opened, payload size and the time the job and the exit push
+took, and checks that the last payload carries the job's run count.
+Remote-write payloads are decoded (snappy and protobuf) for the check.
+
+Run from the repository root with the package installed:
+    python benchmarks/bench_push.py
+    python benchmarks/bench_push.py --mode remote_write --fail 3 --output push.json
+
+Exits with status 1 if the pushed run count does not match.
+"""
+
+import argparse
+import json
+import struct
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pipeline_monitor.decorators import track_performance
+from pipeline_monitor.push import RegistryPusher
+from pipeline_monitor.sinks import flush_pending
+
+PIPELINE = 'bench_push_job'
+
+class StubServer(ThreadingHTTPServer):
+    """Record requests and client connections; fail the first ``fail`` requests."""
+
+    daemon_threads = True
+
+    def __init__(self, fail: int):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.fail = fail
+        self.requests = []
+        self.connections = 0
+        self.lock = threading.Lock()
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def _handle(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            failing = self.server.fail > 0
+            if failing:
+                self.server.fail -= 1
+            else:
+                self.server.requests.append((self.command, self.path, dict(self.headers), body))
+        self.send_response(503 if failing else 200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_PUT = do_POST = _handle
+
+    def log_message(self, *args):
+        pass
+
+def snappy_decompress(data: bytes) -> bytes:
+    """Decode the snappy block format."""
+    pos = 0
+    length = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        length |= (byte & 0x7f) << shift
+        shift += 7
+        if byte < 0x80:
+            break
+    out = bytearray()
+    while pos < len(data):
+        tag = data[pos]
+        pos += 1
+        kind = tag & 3
+        if kind == 0:  # literal
+            size = tag >> 2
+            if size >= 60:
+                extra = size - 59
+                size = int.from_bytes(data[pos:pos + extra], 'little')
+                pos += extra
+            size += 1
+            out += data[pos:pos + size]
+            pos += size
+            continue
+        if kind == 1:
+            size = ((tag >> 2) & 7) + 4
+            offset = ((tag >> 5) << 8) | data[pos]
+            pos += 1
+        else:
+            extra = 2 if kind == 2 else 4
+            size = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos:pos + extra], 'little')
+            pos += extra
+        for _ in range(size):
+            out.append(out[-offset])
+    assert len(out) == length, "snappy length mismatch"
+    return bytes(out)
+
+def _fields(data: bytes):
+    """Yield (field number, value) of a protobuf message."""
+    pos = 0
+    while pos < len(data):
+        key = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            key |= (byte & 0x7f) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        number, wire = key >> 3, key & 7
+        if wire == 0:
+            value = shift = 0
+            while True:
+                byte = data[pos]
+                pos += 1
+                value |= (byte & 0x7f) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+        elif wire == 1:
+            value = struct.unpack('<d', data[pos:pos + 8])[0]
+            pos += 8
+        elif wire == 2:
+            size = shift = 0
+            while True:
+                byte = data[pos]
+                pos += 1
+                size |= (byte & 0x7f) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            value = data[pos:pos + size]
+            pos += size
+        else:
+            raise ValueError(f"unexpected wire type {wire}")
+        yield number, value
+
+def remote_write_runs(body: bytes) -> float:
+    """Successful runs of PIPELINE in a remote-write payload."""
+    total = 0.0
+    for _, series in _fields(snappy_decompress(body)):
+        labels = {}
+        value = None
+        for number, field in _fields(series):
+            if number == 1:
+                label = dict(_fields(field))
+                labels[label[1].decode()] = label[2].decode()
+            else:
+                value = dict(_fields(field))[1]
+        if (labels.get('__name__') == 'pipeline_runs_total'
+                and labels.get('pipeline_name') == PIPELINE and labels.get('status') == 'success'):
+            total += value
+    return total
+
+def pushgateway_runs(body: bytes) -> float:
+    """Successful runs of PIPELINE in a text-format payload."""
+    for line in body.decode().splitlines():
+        if (line.startswith('pipeline_runs_total{') and f'pipeline_name="{PIPELINE}"' in line
+                and 'status="success"' in line):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--mode', choices=['pushgateway', 'remote_write'], default='pushgateway')
+    parser.add_argument('--calls', type=int, default=20000, help="tracked calls in the job")
+    parser.add_argument('--interval', type=float, default=0.25, help="seconds between pushes")
+    parser.add_argument('--fail', type=int, default=2, help="requests the stub fails first")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    server = StubServer(args.fail)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    url = f'http://{host}:{port}' + ('/api/v1/write' if args.mode == 'remote_write' else '')
+    pusher = RegistryPusher(url, mode=args.mode, interval=args.interval, backoff=0.05, max_backoff=0.5)
+    pusher.start()
+
+    @track_performance()
+    def bench_push_job(x):
+        return x + 1
+
+    start = time.perf_counter()
+    for i in range(args.calls):
+        bench_push_job(i)
+    job_seconds = time.perf_counter() - start
+
+    # As at exit: drain the sink queues, then push
+    start = time.perf_counter()
+    flush_pending()
+    exit_ok = pusher.stop()
+    exit_seconds = time.perf_counter() - start
+    server.shutdown()
+
+    method, path, headers, body = server.requests[-1] if server.requests else (None, None, {}, b'')
+    decode = remote_write_runs if args.mode == 'remote_write' else pushgateway_runs
+    pushed = decode(body) if body else 0.0
+    results = {
+        'mode': args.mode,
+        'calls': args.calls,
+        'job_seconds': job_seconds,
+        'exit_push_seconds': exit_seconds,
+        'exit_push_ok': exit_ok,
+        'requests_received': len(server.requests),
+        'tcp_connections': server.connections,
+        'last_request': f'{method} {path}',
+        'last_payload_bytes': len(body),
+        'pushed_runs': pushed,
+        'pusher': pusher.stats(),
+    }
+
+    print(f"mode                {args.mode}")
+    print(f"calls               {args.calls} in {job_seconds:.2f} s")
+    print(f"pushes              {pusher.pushes} ok, {pusher.retries} retries, {pusher.failures} failed")
+    print(f"tcp connections     {server.connections}")
+    print(f"last request        {method} {path} ({len(body)} bytes)")
+    print(f"exit push           {exit_seconds * 1000:.1f} ms, {'ok' if exit_ok else 'FAILED'}")
+    print(f"pushed runs         {pushed:.0f} {'ok' if pushed == args.calls else 'MISMATCH'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    sys.exit(0 if pushed == args.calls else 1)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,47 @@
 """
 Datant Pipeline Monitor
 A professional monitoring tool for data pipelines by Datant LLC.
+
+Public names are imported on first access (PEP 562), so importing the
+package is cheap: the monitoring modules, Prometheus client and psutil
+load when ``track_performance`` or ``ResourceMonitor`` is first used,
+and Flask only when the dashboard is.
 """
 
-from .core import PipelineMonitor
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .core import PipelineMonitor
+    from .decorators import track_performance
+    from .context import ResourceMonitor
+    from .config import Configuration
+    from .logging_utils import setup_logging
+    from .dashboard.app import start_dashboard
 
 __version__ = "0.1.0"
 __author__ = "Datant LLC"
 __email__ = "admin@data-nt.com"
 
-__all__ = ["PipelineMonitor"]
+# Public name -> module defining it
+_LAZY_EXPORTS = {
+    'PipelineMonitor': '.core',
+    'track_performance': '.decorators',
+    'ResourceMonitor': '.context',
+    'Configuration': '.config',
+    'setup_logging': '.logging_utils',
+    'start_dashboard': '.dashboard.app',
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
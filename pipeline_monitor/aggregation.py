@@ -0,0 +1,403 @@
+"""
+Per-thread metric aggregation with periodic flush.
+
+Tracked calls record into buffers owned by the calling thread, so the call
+path takes no locks. A background flusher periodically merges all thread
+buffers into a snapshot that is exposed on REGISTRY through a custom
+collector and pushed to the dashboard.
+
+Durations use the same buckets as ``pipeline_duration_seconds``
+(``prometheus.duration_buckets`` and ``pipeline_buckets``), and every
+flush feeds the calls since the last one into the pipelines' duration
+sketches, so quantiles are exposed in aggregated mode too. Threads count
+calls per sketch bin; the sketch itself is only touched by the flusher.
+A forked child starts from empty buffers with its own flusher.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+import weakref
+from array import array
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+
+from .prometheus_metrics import DURATION_BUCKETS
+from .sketch import DDSketch, MIN_VALUE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = DURATION_BUCKETS
+
+# Layout of a per-function buffer: fixed slots followed by one
+# (non-cumulative) count per histogram bucket. INTERVAL_MIN/MAX hold the
+# extremes since the last flush and are reset by the flusher.
+COUNT, SUM, MIN, MAX, INTERVAL_MIN, INTERVAL_MAX = 0, 1, 2, 3, 4, 5
+BUCKET_OFFSET = 6
+
+class MetricAggregator:
+    """
+    Lock-free per-thread aggregation of call counts and durations.
+
+    Each thread owns a dict of ``array('d')`` buffers keyed by function
+    name and is the only writer to them. Buffers are cumulative, so the
+    flusher can read them without coordination; a read that races with a
+    write is corrected on the next flush. The exception are the interval
+    extremes, which the flusher resets; a call racing with that reset may
+    show up in the next interval's extremes or not at all. Buffers of
+    finished threads are folded into a retired total.
+    """
+
+    def __init__(
+        self,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        flush_interval: float = 1.0,
+        emit: bool = True,
+        pipeline_buckets: Optional[Dict[str, Sequence[float]]] = None,
+        sketch_for: Optional[Callable[[str], DDSketch]] = None,
+        relative_accuracy: float = 0.01
+    ):
+        """
+        Initialize the aggregator.
+
+        Args:
+            buckets: Histogram upper bounds in seconds
+            flush_interval: Seconds between merges into the snapshot
+            emit: Whether to push aggregated frames to the dashboard
+            pipeline_buckets: Histogram upper bounds per function name
+            sketch_for: Returns the duration sketch of a function name;
+                if set, each flush adds the calls since the last one
+            relative_accuracy: Accuracy of those sketches, to bin calls
+                the same way
+        """
+        self.buckets: Tuple[float, ...] = self._bounds(buckets)
+        self.pipeline_buckets = {
+            name: self._bounds(bounds) for name, bounds in (pipeline_buckets or {}).items()
+        }
+        self.flush_interval = flush_interval
+        self.emit = emit
+        self.sketch_for = sketch_for
+        self._log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+
+        self._local = threading.local()
+        self._threads: List[Tuple["weakref.ref[threading.Thread]", Dict[str, array], Dict[str, Dict]]] = []
+        self._threads_lock = threading.Lock()
+        self._retired: Dict[str, array] = {}
+        self._retired_bins: Dict[str, Dict[Optional[int], int]] = {}
+        self._snapshot: Dict[str, array] = {}
+        self._previous: Dict[str, Tuple[float, float]] = {}
+        # Bin counts and sum already added to each function's sketch
+        self._sketched: Dict[str, Tuple[Dict[Optional[int], int], float]] = {}
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _bounds(buckets: Sequence[float]) -> Tuple[float, ...]:
+        bounds = sorted(float(b) for b in buckets)
+        if not bounds or bounds[-1] != float('inf'):
+            bounds.append(float('inf'))
+        return tuple(bounds)
+
+    def buckets_of(self, name: str) -> Tuple[float, ...]:
+        """Histogram upper bounds of a function name."""
+        return self.pipeline_buckets.get(name, self.buckets)
+
+    def _new_buffer(self, name: str) -> array:
+        """Create an empty per-function buffer."""
+        buffer = array('d', [0.0]) * (BUCKET_OFFSET + len(self.buckets_of(name)))
+        buffer[MIN] = buffer[INTERVAL_MIN] = float('inf')
+        buffer[MAX] = buffer[INTERVAL_MAX] = float('-inf')
+        return buffer
+
+    def _thread_buffers(self) -> Dict[str, array]:
+        """Register the current thread and return its buffers."""
+        buffers: Dict[str, array] = {}
+        bins: Dict[str, Dict[Optional[int], int]] = {}
+        self._local.buffers = buffers
+        self._local.bins = bins
+        with self._threads_lock:
+            self._threads.append((weakref.ref(threading.current_thread()), buffers, bins))
+        return buffers
+
+    def record(self, name: str, seconds: float) -> None:
+        """
+        Record one call in the current thread's buffer.
+
+        Args:
+            name: Function (pipeline) name
+            seconds: Call duration in seconds
+        """
+        try:
+            buffers = self._local.buffers
+        except AttributeError:
+            buffers = self._thread_buffers()
+
+        buffer = buffers.get(name)
+        if buffer is None:
+            buffer = buffers[name] = self._new_buffer(name)
+
+        buffer[COUNT] += 1
+        buffer[SUM] += seconds
+        if seconds < buffer[MIN]:
+            buffer[MIN] = seconds
+        if seconds > buffer[MAX]:
+            buffer[MAX] = seconds
+        if seconds < buffer[INTERVAL_MIN]:
+            buffer[INTERVAL_MIN] = seconds
+        if seconds > buffer[INTERVAL_MAX]:
+            buffer[INTERVAL_MAX] = seconds
+        buffer[BUCKET_OFFSET + bisect_left(self.pipeline_buckets.get(name, self.buckets), seconds)] += 1
+
+        if self.sketch_for is not None:
+            # Sketch bin, as DDSketch.key computes it
+            key = math.ceil(math.log(seconds) / self._log_gamma) if seconds > MIN_VALUE else None
+            bins = self._local.bins.get(name)
+            if bins is None:
+                bins = self._local.bins[name] = {}
+            bins[key] = bins.get(key, 0) + 1
+
+    def _merge_into(self, target: Dict[str, array], buffers: Dict[str, array]) -> None:
+        """Add a set of buffers into ``target``."""
+        for name, buffer in list(buffers.items()):
+            total = target.get(name)
+            if total is None:
+                total = target[name] = self._new_buffer(name)
+            total[COUNT] += buffer[COUNT]
+            total[SUM] += buffer[SUM]
+            total[MIN] = min(total[MIN], buffer[MIN])
+            total[MAX] = max(total[MAX], buffer[MAX])
+            total[INTERVAL_MIN] = min(total[INTERVAL_MIN], buffer[INTERVAL_MIN])
+            total[INTERVAL_MAX] = max(total[INTERVAL_MAX], buffer[INTERVAL_MAX])
+            for i in range(BUCKET_OFFSET, len(total)):
+                total[i] += buffer[i]
+
+    @staticmethod
+    def _merge_bins(target: Dict[str, Dict], bins: Dict[str, Dict]) -> None:
+        """Add a set of sketch bin counts into ``target``."""
+        for name, counts in list(bins.items()):
+            total = target.setdefault(name, {})
+            for key, n in list(counts.items()):
+                total[key] = total.get(key, 0) + n
+
+    @staticmethod
+    def _reset_interval(buffers: Dict[str, array]) -> None:
+        """Start a new interval in a set of buffers."""
+        for buffer in list(buffers.values()):
+            buffer[INTERVAL_MIN] = float('inf')
+            buffer[INTERVAL_MAX] = float('-inf')
+
+    def flush(self) -> Dict[str, array]:
+        """
+        Merge all thread buffers into a new snapshot.
+
+        The snapshot's interval extremes cover the calls since the
+        previous flush.
+
+        Returns:
+            Mapping of function name to merged buffer
+        """
+        with self._threads_lock:
+            live = []
+            for thread_ref, buffers, bins in self._threads:
+                thread = thread_ref()
+                if thread is None or not thread.is_alive():
+                    self._merge_into(self._retired, buffers)
+                    self._merge_bins(self._retired_bins, bins)
+                else:
+                    live.append((thread_ref, buffers, bins))
+            self._threads = live
+
+            snapshot: Dict[str, array] = {}
+            self._merge_into(snapshot, self._retired)
+            snapshot_bins: Dict[str, Dict[Optional[int], int]] = {}
+            self._merge_bins(snapshot_bins, self._retired_bins)
+            for _, buffers, bins in live:
+                self._merge_into(snapshot, buffers)
+                self._merge_bins(snapshot_bins, bins)
+
+            self._reset_interval(self._retired)
+            for _, buffers, _ in live:
+                self._reset_interval(buffers)
+
+        self._snapshot = snapshot
+        if self.sketch_for is not None:
+            self._feed_sketches(snapshot, snapshot_bins)
+        if self.emit:
+            self._emit(snapshot)
+        return snapshot
+
+    def _feed_sketches(self, snapshot: Dict[str, array], snapshot_bins: Dict[str, Dict]) -> None:
+        """Add the calls since the last flush to each function's sketch."""
+        for name, counts in snapshot_bins.items():
+            fed, fed_sum = self._sketched.get(name, ({}, 0.0))
+            # A count read while its thread was writing is made up next time
+            new = {key: n - fed.get(key, 0) for key, n in counts.items() if n > fed.get(key, 0)}
+            if not new:
+                continue
+            total = snapshot[name]
+            try:
+                self.sketch_for(name).add_bins(new, total[SUM] - fed_sum, total[MIN], total[MAX])
+            except Exception as e:
+                logger.error(f"Failed to update duration sketch of {name}: {str(e)}")
+                continue
+            self._sketched[name] = (dict(counts), total[SUM])
+
+    def _emit(self, snapshot: Dict[str, array]) -> None:
+        """Push per-function stats for the last interval to the dashboard."""
+        functions = {}
+        for name, total in snapshot.items():
+            prev_count, prev_sum = self._previous.get(name, (0.0, 0.0))
+            count = total[COUNT] - prev_count
+            self._previous[name] = (total[COUNT], total[SUM])
+            if count <= 0:
+                continue
+            functions[name] = {
+                'count': int(count),
+                'mean': (total[SUM] - prev_sum) / count,
+                'min': total[INTERVAL_MIN],
+                'max': total[INTERVAL_MAX]
+            }
+
+        if not functions:
+            return
+
+        from .emission import emit_metric
+        calls = sum(stats['count'] for stats in functions.values())
+        emit_metric('performance', {
+            'active_pipelines': len(functions),
+            'execution_time': sum(s['mean'] * s['count'] for s in functions.values()) / calls,
+            'aggregated': functions
+        })
+
+    def collect(self) -> Iterator:
+        """Expose the latest snapshot as Prometheus metric families."""
+        calls = CounterMetricFamily(
+            'pipeline_aggregated_calls',
+            'Calls to tracked functions, aggregated per thread',
+            labels=['pipeline_name']
+        )
+        duration = HistogramMetricFamily(
+            'pipeline_aggregated_duration_seconds',
+            'Duration of tracked calls, aggregated per thread',
+            labels=['pipeline_name']
+        )
+        minimum = GaugeMetricFamily(
+            'pipeline_aggregated_duration_min_seconds',
+            'Shortest observed tracked call',
+            labels=['pipeline_name']
+        )
+        maximum = GaugeMetricFamily(
+            'pipeline_aggregated_duration_max_seconds',
+            'Longest observed tracked call',
+            labels=['pipeline_name']
+        )
+
+        for name, total in self._snapshot.items():
+            calls.add_metric([name], total[COUNT])
+            cumulative = 0.0
+            buckets = []
+            for bound, i in zip(self.buckets_of(name), range(BUCKET_OFFSET, len(total))):
+                cumulative += total[i]
+                buckets.append(('+Inf' if bound == float('inf') else repr(bound), cumulative))
+            duration.add_metric([name], buckets, total[SUM])
+            if total[COUNT]:
+                minimum.add_metric([name], total[MIN])
+                maximum.add_metric([name], total[MAX])
+
+        yield calls
+        yield duration
+        yield minimum
+        yield maximum
+
+    def start(self) -> None:
+        """Start the background flusher thread."""
+        if self._flusher is not None:
+            return
+        self._flusher = threading.Thread(
+            target=self._run,
+            name="pipeline-monitor-aggregator",
+            daemon=True
+        )
+        self._flusher.start()
+
+    def stop(self) -> None:
+        """Stop the flusher after a final flush."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _run(self) -> None:
+        """Flusher loop."""
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush aggregated metrics: {str(e)}")
+
+    def _after_fork(self) -> None:
+        """Drop the parent's calls and restart the flusher in a forked child."""
+        self._local = threading.local()
+        self._threads = []
+        self._threads_lock = threading.Lock()
+        self._retired = {}
+        self._retired_bins = {}
+        self._snapshot = {}
+        self._previous = {}
+        self._sketched = {}
+        self._stop = threading.Event()
+        if self._flusher is not None:
+            self._flusher = None
+            self.start()
+
+_aggregator: Optional[MetricAggregator] = None
+_aggregator_lock = threading.Lock()
+
+def get_aggregator(flush_interval: float = 1.0) -> MetricAggregator:
+    """
+    Get the process-wide aggregator, creating and registering it on first use.
+
+    Buckets and sketch accuracy are those of the series cache, so
+    aggregated pipelines are bucketed and sketched like the others.
+
+    Args:
+        flush_interval: Seconds between flushes, used only on creation
+
+    Returns:
+        Shared MetricAggregator instance
+    """
+    global _aggregator
+    if _aggregator is None:
+        with _aggregator_lock:
+            if _aggregator is None:
+                from .prometheus_metrics import get_pipeline_series, get_series_cache, register_process_collector
+                cache = get_series_cache()
+                aggregator = MetricAggregator(
+                    buckets=cache.duration_buckets or DURATION_BUCKETS,
+                    flush_interval=flush_interval,
+                    pipeline_buckets=cache.pipeline_buckets,
+                    sketch_for=lambda name: get_pipeline_series(name).sketch,
+                    relative_accuracy=cache.relative_accuracy
+                )
+                register_process_collector(aggregator)
+                aggregator.start()
+                _aggregator = aggregator
+    return _aggregator
+
+def active_aggregator() -> Optional[MetricAggregator]:
+    """Get the shared aggregator if it has been created."""
+    return _aggregator
+
+def _after_fork_in_child() -> None:
+    global _aggregator_lock
+    _aggregator_lock = threading.Lock()
+    if _aggregator is not None:
+        _aggregator._after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -1,10 +1,14 @@
-from typing import Callable, Optional, Dict, Any, Union
+from typing import Callable, Optional, Dict, Any, Union, List, Tuple
 import logging
 import json
-import smtplib
-from email.message import EmailMessage
-import requests
+import queue
+import threading
+import time
+import atexit
+import os
+import weakref
 from functools import wraps
+from .self_monitoring import timed
 
 logger = logging.getLogger(__name__)
 
@@ -26,20 +30,245 @@ def validate_handler(func: Callable) -> Callable:
         return func(*args, **kwargs)
     return wrapper
 
+# Dispatchers still alive in this process; used for the queue depth gauge
+# and for draining pending alerts at interpreter exit.
+_dispatchers: "weakref.WeakSet[AlertDispatcher]" = weakref.WeakSet()
+
+class AlertDispatcher:
+    """
+    Background dispatcher that delivers alerts off the caller's thread.
+
+    Alerts are put on a bounded queue and delivered by a pool of worker
+    threads. Alerts arriving within the same flush window are coalesced
+    into a single handler call, so a burst of threshold breaches results
+    in one Slack/email message instead of one per breach.
+    """
+
+    OVERFLOW_POLICIES = ('drop', 'block')
+
+    def __init__(
+        self,
+        deliver: Callable[[str, Dict[str, Any]], None],
+        queue_size: int = 1000,
+        workers: int = 1,
+        flush_interval: float = 1.0,
+        max_batch: int = 50,
+        overflow: str = 'drop',
+        block_timeout: Optional[float] = None
+    ):
+        """
+        Initialize the dispatcher and start its worker threads.
+
+        Args:
+            deliver: Callable invoked with (message, context) for each batch
+            queue_size: Maximum number of pending alerts
+            workers: Number of worker threads
+            flush_interval: Seconds to wait for more alerts before delivering
+            max_batch: Maximum number of alerts coalesced into one delivery
+            overflow: 'drop' to discard alerts when the queue is full,
+                'block' to wait for space
+            block_timeout: Maximum seconds to block when overflow is 'block'
+        """
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid overflow policy: {overflow}")
+
+        self.deliver = deliver
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, max_batch)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Tuple[float, str, Dict[str, Any]]]]" = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._workers: List[threading.Thread] = []
+        self._start_workers(max(1, workers))
+
+        _dispatchers.add(self)
+
+    def _start_workers(self, count: int) -> None:
+        for i in range(count):
+            worker = threading.Thread(
+                target=self._run,
+                name=f"pipeline-monitor-alerts-{i}",
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _after_fork(self) -> None:
+        """Give a forked child its own queue and workers; the parent delivers its alerts."""
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        count = len(self._workers)
+        self._workers = []
+        if not self._closed:
+            self._start_workers(count)
+
+    def qsize(self) -> int:
+        """Return the number of alerts waiting to be delivered."""
+        return self._queue.qsize()
+
+    def submit(self, message: str, context: Dict[str, Any]) -> bool:
+        """
+        Enqueue an alert for background delivery.
+
+        Args:
+            message: Alert message
+            context: Alert context dictionary
+
+        Returns:
+            True if the alert was queued, False if it was dropped
+        """
+        if self._closed:
+            return False
+
+        item = (time.perf_counter(), message, context)
+        try:
+            if self.overflow == 'block':
+                self._queue.put(item, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            _record_alert_dropped()
+            logger.warning(f"Alert queue full, dropping alert: {message}")
+            return False
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        Stop accepting alerts and wait for pending ones to be delivered.
+
+        Never blocks on a full queue: workers that get no stop marker
+        exit once they have drained the queue.
+
+        Args:
+            timeout: Maximum seconds to wait for each worker to finish
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._workers:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def _run(self) -> None:
+        """Worker loop: collect a batch per flush window and deliver it."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            stop = False
+            deadline = time.perf_counter() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._deliver_batch(batch)
+            if stop or (self._closed and self._queue.empty()):
+                return
+
+    def _deliver_batch(self, batch: List[Tuple[float, str, Dict[str, Any]]]) -> None:
+        """Deliver a batch of alerts as a single handler call."""
+        if len(batch) == 1:
+            _, message, context = batch[0]
+        else:
+            message, context = coalesce_alerts([(m, c) for _, m, c in batch])
+
+        try:
+            self.deliver(message, context)
+        except Exception as e:
+            logger.error(f"Failed to send alert: {str(e)}")
+
+        now = time.perf_counter()
+        for enqueued_at, _, _ in batch:
+            _record_dispatch_latency(now - enqueued_at)
+
+def coalesce_alerts(alerts: List[Tuple[str, Dict[str, Any]]]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Combine several alerts into one message and context.
+
+    Args:
+        alerts: List of (message, context) tuples
+
+    Returns:
+        Tuple of combined message and context
+    """
+    lines = [f"{len(alerts)} alerts:"]
+    lines.extend(f"- {message}" for message, _ in alerts)
+    context = {
+        'count': len(alerts),
+        'alerts': [{'message': message, 'context': context} for message, context in alerts]
+    }
+    return '\n'.join(lines), context
+
+def _record_alert_dropped() -> None:
+    """Count a dropped alert in Prometheus."""
+    from .prometheus_metrics import ALERTS_DROPPED
+    ALERTS_DROPPED.inc()
+
+def _record_dispatch_latency(seconds: float) -> None:
+    """Record enqueue-to-delivery latency in Prometheus."""
+    from .prometheus_metrics import ALERT_DISPATCH_LATENCY
+    ALERT_DISPATCH_LATENCY.observe(seconds)
+
+def alert_queue_depth() -> int:
+    """Return the total number of alerts pending across all dispatchers."""
+    return sum(dispatcher.qsize() for dispatcher in list(_dispatchers))
+
+@atexit.register
+def _close_dispatchers() -> None:
+    """Drain pending alerts before the interpreter exits."""
+    for dispatcher in list(_dispatchers):
+        dispatcher.close(timeout=2.0)
+
+def _after_fork_in_child() -> None:
+    for dispatcher in list(_dispatchers):
+        dispatcher._after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
 class AlertHook:
     """
     Hook for handling alerts and notifications.
     """
     
     @validate_handler
-    def __init__(self, handler: Callable[[str, Dict[str, Any]], None]):
+    def __init__(
+        self,
+        handler: Callable[[str, Dict[str, Any]], None],
+        dispatch: Optional[Dict[str, Any]] = None
+    ):
         """
         Initialize alert hook with custom handler.
         
         Args:
             handler: Callable that processes alerts
+            dispatch: Optional dispatch settings. With ``mode`` set to
+                ``'async'`` alerts are queued and delivered by an
+                AlertDispatcher; the remaining keys are passed to it.
         """
         self.handler = handler
+        self.dispatcher: Optional[AlertDispatcher] = None
+
+        dispatch = dict(dispatch or {})
+        if dispatch.pop('mode', 'sync') == 'async':
+            self.dispatcher = AlertDispatcher(self._deliver, **dispatch)
     
     @validate_handler
     def update_handler(self, handler: Callable[[str, Dict[str, Any]], None]) -> None:
@@ -51,6 +280,7 @@ class AlertHook:
         """
         self.handler = handler
     
+    @timed('alert')
     def alert(self, message: str, context: Optional[Dict[str, Any]] = None) -> None:
         """
         Trigger an alert with given message and context.
@@ -61,25 +291,96 @@ class AlertHook:
         """
         if context is None:
             context = {}
+
+        if self.dispatcher is not None:
+            self.dispatcher.submit(message, context)
+            return
         
         try:
             self.handler(message, context)
         except Exception as e:
             logger.error(f"Failed to send alert: {str(e)}")
 
-def setup_alerts(handler: Callable[[str, Dict[str, Any]], None] = None) -> AlertHook:
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        Deliver pending alerts and stop the background dispatcher, if any.
+
+        Args:
+            timeout: Maximum seconds to wait for pending alerts
+        """
+        if self.dispatcher is not None:
+            self.dispatcher.close(timeout)
+
+    def _deliver(self, message: str, context: Dict[str, Any]) -> None:
+        """Call the current handler; used by the background dispatcher."""
+        self.handler(message, context)
+
+def setup_alerts(
+    handler: Callable[[str, Dict[str, Any]], None] = None,
+    dispatch: Optional[Dict[str, Any]] = None
+) -> AlertHook:
     """
     Setup alert system with custom handler.
     
     Args:
         handler: Callable that processes alerts
+        dispatch: Optional dispatch settings (see ``alerts.dispatch`` in
+            the configuration file)
     
     Returns:
         Configured AlertHook instance
     """
     if handler is None:
         handler = log_alert_handler
-    return AlertHook(handler)
+    return AlertHook(handler, dispatch)
+
+def build_channel_handler(alert_config: Dict[str, Any], channel: str) -> Optional[Callable]:
+    """
+    Build the handler for one alert channel of an ``alerts`` config section.
+
+    Args:
+        alert_config: The ``alerts`` section of a configuration
+        channel: Alert channel ('slack', 'email' or 'sms'), or 'default'
+            for the first configured of them, falling back to logging
+
+    Returns:
+        Handler callable, or None if the channel is not configured
+    """
+    if channel == 'default':
+        for name in ('slack', 'email', 'sms'):
+            handler = build_channel_handler(alert_config, name)
+            if handler is not None:
+                return handler
+        return log_alert_handler
+
+    if channel == 'slack':
+        webhook = alert_config.get('slack_webhook')
+        return slack_alert_handler(webhook) if webhook else None
+
+    if channel == 'email':
+        email_cfg = alert_config.get('email') or {}
+        if not email_cfg.get('smtp_host'):
+            return None
+        return email_alert_handler(
+            smtp_host=email_cfg['smtp_host'],
+            smtp_port=email_cfg['smtp_port'],
+            sender=email_cfg['sender'],
+            password=email_cfg['password'],
+            recipients=email_cfg['recipients']
+        )
+
+    if channel == 'sms':
+        sms_cfg = alert_config.get('sms') or {}
+        if not sms_cfg.get('provider_url'):
+            return None
+        return sms_alert_handler(
+            provider_url=sms_cfg['provider_url'],
+            api_key=sms_cfg['api_key'],
+            sender_number=sms_cfg['sender_number'],
+            recipient_numbers=sms_cfg['recipient_numbers']
+        )
+
+    raise ValueError(f"Unknown alert channel: {channel}")
 
 # Example alert handlers
 def log_alert_handler(message: str, context: Dict[str, Any] = None) -> None:
@@ -93,7 +394,8 @@ def email_alert_handler(
     smtp_port: int,
     sender: str,
     password: str,
-    recipients: Union[str, list]
+    recipients: Union[str, list],
+    timeout: float = 10.0
 ) -> Callable:
     """
     Create an email alert handler.
@@ -104,7 +406,12 @@ def email_alert_handler(
         sender: Sender email address
         password: Sender email password
         recipients: Single recipient or list of recipients
+        timeout: Connection timeout in seconds
     """
+    # Alert backends are imported only when a channel is configured
+    import smtplib
+    from email.message import EmailMessage
+
     if isinstance(recipients, str):
         recipients = [recipients]
 
@@ -116,7 +423,7 @@ def email_alert_handler(
         msg['To'] = ', '.join(recipients)
 
         try:
-            with smtplib.SMTP(smtp_host, smtp_port) as server:
+            with smtplib.SMTP(smtp_host, smtp_port, timeout=timeout) as server:
                 server.starttls()
                 server.login(sender, password)
                 server.send_message(msg)
@@ -125,19 +432,22 @@ def email_alert_handler(
 
     return handler
 
-def slack_alert_handler(webhook_url: str) -> Callable:
+def slack_alert_handler(webhook_url: str, timeout: float = 10.0) -> Callable:
     """
     Create a Slack alert handler.
     
     Args:
         webhook_url: Slack webhook URL
+        timeout: Request timeout in seconds
     """
+    import requests
+
     def handler(message: str, context: Dict[str, Any]) -> None:
         payload = {
             "text": f"*Alert*: {message}\n```{json.dumps(context, indent=2)}```"
         }
         try:
-            response = requests.post(webhook_url, json=payload)
+            response = requests.post(webhook_url, json=payload, timeout=timeout)
             response.raise_for_status()
         except Exception as e:
             logger.error(f"Failed to send Slack alert: {str(e)}")
@@ -148,7 +458,8 @@ def sms_alert_handler(
     provider_url: str,
     api_key: str,
     sender_number: str,
-    recipient_numbers: Union[str, list]
+    recipient_numbers: Union[str, list],
+    timeout: float = 10.0
 ) -> Callable:
     """
     Create an SMS alert handler.
@@ -158,7 +469,10 @@ def sms_alert_handler(
         api_key: API key for authentication
         sender_number: Sender phone number
         recipient_numbers: Single recipient or list of recipient phone numbers
+        timeout: Request timeout in seconds
     """
+    import requests
+
     if isinstance(recipient_numbers, str):
         recipient_numbers = [recipient_numbers]
 
@@ -170,7 +484,7 @@ def sms_alert_handler(
             "message": message
         }
         try:
-            response = requests.post(provider_url, json=payload)
+            response = requests.post(provider_url, json=payload, timeout=timeout)
             response.raise_for_status()
         except Exception as e:
             logger.error(f"Failed to send SMS alert: {str(e)}")
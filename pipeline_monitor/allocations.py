@@ -0,0 +1,182 @@
+"""tracemalloc-based allocation profiling for decorated functions and blocks."""
+
+import contextvars
+import itertools
+import logging
+import threading
+import tracemalloc
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Number of profiling sessions in progress, and whether tracing was
+# started by this module (and should be stopped when the last one ends)
+_active_sessions = 0
+_owns_tracing = False
+_lock = threading.Lock()
+
+# Whether a profiled call or block is running in the current thread or task
+_profiling: contextvars.ContextVar = contextvars.ContextVar('pipeline_profiling', default=False)
+
+_EXCLUDED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+class AllocationSession:
+    """State of one profiled call or block."""
+
+    __slots__ = ('baseline', 'start_current', 'token')
+
+    def __init__(self, baseline: Optional[tracemalloc.Snapshot], start_current: int):
+        self.baseline = baseline
+        self.start_current = start_current
+        self.token: Optional[contextvars.Token] = None
+
+class AllocationProfiler:
+    """
+    Measure Python-level allocations of a call with tracemalloc.
+
+    Tracing is switched on only for profiled calls (unless it was already
+    on), so unprofiled calls run at full speed. Only every ``every``-th
+    call is profiled, since taking a snapshot is expensive.
+
+    Allocations are process-wide: other threads allocating during a
+    profiled call are attributed to it, and concurrent sessions share the
+    peak counter. Calls nested in a profiled call or block of the same
+    thread or task are not profiled themselves, since resetting the peak
+    would corrupt the outer result; their allocations count in the outer
+    one.
+    """
+
+    def __init__(self, every: int = 1, top_n: int = 10, frames: int = 1):
+        """
+        Args:
+            every: Profile one call out of this many
+            top_n: Number of allocation sites to report
+            frames: Traceback depth stored per allocation
+        """
+        if every < 1:
+            raise ValueError(f"Profiling interval must be at least 1: {every}")
+        self.every = every
+        self.top_n = top_n
+        self.frames = frames
+        self._counter = itertools.count()
+
+    def should_profile(self) -> bool:
+        """
+        Return True if the next call should be profiled.
+
+        Always False inside a profiled call or block of this context.
+        """
+        if _profiling.get():
+            return False
+        return next(self._counter) % self.every == 0
+
+    def start(self) -> AllocationSession:
+        """Start profiling a call."""
+        global _active_sessions, _owns_tracing
+        with _lock:
+            baseline = None
+            if _active_sessions == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+                _owns_tracing = True
+            elif not _owns_tracing:
+                # Tracing was started elsewhere; diff against a snapshot
+                baseline = tracemalloc.take_snapshot().filter_traces(_EXCLUDED)
+            _active_sessions += 1
+            if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+                tracemalloc.reset_peak()
+            session = AllocationSession(baseline, tracemalloc.get_traced_memory()[0])
+        session.token = _profiling.set(True)
+        return session
+
+    def stop(self, session: AllocationSession) -> Dict[str, Any]:
+        """
+        Finish profiling a call.
+
+        Args:
+            session: Session returned by ``start``
+
+        Returns:
+            Dict with ``net_kb``, ``peak_kb`` and ``top`` allocation sites
+        """
+        global _active_sessions, _owns_tracing
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_EXCLUDED)
+        if session.token is not None:
+            try:
+                _profiling.reset(session.token)
+            except ValueError:
+                # Stopped in another context than it started (e.g. a
+                # block entered and exited in different tasks)
+                pass
+            session.token = None
+
+        with _lock:
+            _active_sessions -= 1
+            if _active_sessions == 0 and _owns_tracing:
+                tracemalloc.stop()
+                _owns_tracing = False
+
+        if session.baseline is not None:
+            stats = snapshot.compare_to(session.baseline, 'lineno')
+            sites = [
+                (stat.traceback[0], stat.size_diff, stat.count_diff)
+                for stat in stats if stat.size_diff > 0
+            ]
+        else:
+            sites = [
+                (stat.traceback[0], stat.size, stat.count)
+                for stat in snapshot.statistics('lineno')
+            ]
+
+        return {
+            'net_kb': (current - session.start_current) / 1024,
+            'peak_kb': max(0, peak - session.start_current) / 1024,
+            'top': top_sites(sites, self.top_n)
+        }
+
+def top_sites(sites: List[Any], top_n: int) -> List[Dict[str, Any]]:
+    """Format the largest (frame, size, count) allocation sites."""
+    sites = sorted(sites, key=lambda site: site[1], reverse=True)[:top_n]
+    return [
+        {
+            'file': frame.filename,
+            'line': frame.lineno,
+            'size_kb': size / 1024,
+            'count': count
+        }
+        for frame, size, count in sites
+    ]
+
+AllocationSpec = Union[None, bool, int, Dict[str, Any], AllocationProfiler]
+
+def get_allocation_profiler(spec: AllocationSpec) -> Optional[AllocationProfiler]:
+    """
+    Build an allocation profiler from a decorator argument or config section.
+
+    Args:
+        spec: None/False (disabled), True (every call), an int N (every
+            Nth call), a dict with ``every``, ``top_n`` and ``frames``
+            (``enabled`` may be set to False), or an AllocationProfiler
+
+    Returns:
+        AllocationProfiler instance, or None if disabled
+    """
+    if spec is None or spec is False:
+        return None
+    if spec is True:
+        return AllocationProfiler()
+    if isinstance(spec, AllocationProfiler):
+        return spec
+    if isinstance(spec, int):
+        return AllocationProfiler(every=spec)
+    if isinstance(spec, dict):
+        options = dict(spec)
+        if not options.pop('enabled', True):
+            return None
+        return AllocationProfiler(**options)
+    raise ValueError(f"Invalid allocation profiling specification: {spec!r}")
@@ -2,7 +2,6 @@
 """Command-line interface for Pipeline Monitor."""
 
 import sys
-from pipeline_monitor.dashboard import app, socketio
 from pipeline_monitor.alerts import setup_alerts, log_alert_handler, email_alert_handler, slack_alert_handler, sms_alert_handler
 from pipeline_monitor.config import Configuration
 
@@ -12,10 +11,25 @@ def load_config(config_path: str = None) -> Configuration:
         return Configuration.from_file(config_path)
     return Configuration()
 
-def run_dashboard():
+def run_dashboard(config_path: str = None):
     """Entry point for the dashboard command"""
+    if config_path is None and len(sys.argv) > 1 and sys.argv[1].endswith('.json'):
+        config_path = sys.argv[1]
+    options = dict(load_config(config_path).get('dashboard'))
+
+    # eventlet and gevent must patch the standard library before the
+    # dashboard (and with it Flask and threading users) is imported
+    server = options.get('server', 'threading')
+    if server == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif server == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+
+    from pipeline_monitor.dashboard.app import start_dashboard
     print("Starting Pipeline Monitor Dashboard...")
-    socketio.run(app, debug=True)
+    start_dashboard(**options)
 
 def run_demo():
     """Entry point for the demo command"""
@@ -46,7 +60,7 @@ def main():
     setup_alerts(config)
 
     commands = {
-        'pipeline-dashboard': run_dashboard,
+        'pipeline-dashboard': lambda: run_dashboard(config_path),
         'pipeline-demo': run_demo,
         'pipeline-prometheus': run_prometheus,
         'pipeline-test-alerts': lambda: test_alerts()
@@ -1,10 +1,16 @@
 from typing import Dict, Any, Optional
 import json
 import logging
+import os
+import threading
+import time
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Configuration file consulted by the module-level alert paths
+DEFAULT_CONFIG_PATH = "examples/config.json"
+
 class Configuration:
     """
     Configuration management for pipeline monitoring.
@@ -17,13 +23,116 @@ class Configuration:
         self.config.setdefault('logging', {
             'level': 'INFO',
             'json_format': True,
-            'log_file': None
+            'log_file': None,
+            'async_sink': False,
+            'max_bytes': 0,
+            'backup_count': 5
+        })
+
+        self.config.setdefault('aggregation', {
+            'enabled': False,  # Per-thread aggregation of call metrics
+            'flush_interval': 1.0  # Seconds between flushes
+        })
+
+        self.config.setdefault('storage', {
+            'enabled': False,  # Persist every run to a local SQLite store
+            'path': 'pipeline_runs.db',
+            'batch_size': 1000,
+            'flush_interval': 1.0,
+            'retention': {
+                'raw_days': 7,
+                'minute_days': 30,
+                'hour_days': 365
+            }
+        })
+
+        self.config.setdefault('tracing', {
+            'enabled': False,  # Span per tracked call and monitored block
+            'max_traces': 100,  # Most recent traces kept in memory
+            'max_spans': 10000  # Spans kept per trace
+        })
+
+        self.config.setdefault('sinks', {
+            'queue_size': 10000,  # Events queued per sink before dropping
+            'batch_size': 256,  # Events delivered per batch
+            'flush_interval': 0.1,  # Batching window in seconds
+            'log': {'enabled': True},
+            'prometheus': {'enabled': True},
+            'dashboard': {'enabled': True},
+            'file': {'enabled': False, 'path': 'pipeline_metrics.jsonl'}
+        })
+
+        self.config.setdefault('exporters', {
+            'statsd': {
+                'enabled': False,
+                'url': 'udp://127.0.0.1:8125',
+                'flavor': 'dogstatsd',  # or 'statsd': labels go into the name
+                'prefix': '',
+                'interval': 10.0,  # Seconds between pushes
+                'max_packet_size': 1432  # Datagram payload fitting a 1500-byte MTU
+            },
+            'influx': {
+                'enabled': False,
+                'url': 'udp://127.0.0.1:8089',  # or tcp://host:port, or a file path
+                'interval': 10.0,
+                'max_packet_size': 1432
+            }
+        })
+
+        self.config.setdefault('prometheus', {
+            'enabled': True,
+            'port': 9090,
+            'max_pipelines': 1000,  # Distinct pipeline_name values exported
+            'stale_after': 3600.0,  # Idle seconds before a name may be evicted
+            'overflow_label': '_overflow',  # Shared by names over the limit
+            'duration_buckets': None,  # None: 5 ms to 2 h
+            'pipeline_buckets': {},  # e.g. {'nightly_load': [60, 600, 3600, 7200]}
+            'sketch': {
+                'relative_accuracy': 0.01,
+                'max_bins': 2048,
+                'quantiles': [0.5, 0.9, 0.99, 0.999]
+            },
+            'push': {  # Batch-job mode for jobs that exit before a scrape
+                'enabled': False,
+                'mode': 'pushgateway',  # or 'remote_write'
+                'url': 'http://127.0.0.1:9091',  # Remote write: e.g. http://prometheus:9090/api/v1/write
+                'job': 'pipeline_monitor',
+                'grouping_key': {},  # 'instance' defaults to the host name
+                'interval': 15.0,  # Seconds between pushes; 0: only at exit
+                'timeout': 5.0,
+                'backoff': 1.0,  # First retry delay, doubled per attempt
+                'max_backoff': 60.0,
+                'max_retries': 5,
+                'exit_timeout': 5.0  # Time the exit push may take
+            }
+        })
+
+        self.config.setdefault('dashboard', {
+            'host': '0.0.0.0',
+            'port': 5000,
+            'debug': False,
+            'update_interval': 0.1,  # Seconds between metric frames
+            'server': 'threading',  # 'threading', 'eventlet' or 'gevent'
+            'workers': 1,  # >1 needs eventlet/gevent and a message_queue
+            'message_queue': None  # e.g. 'redis://localhost:6379/0'
         })
 
         self.config.setdefault('alerts', {
             'enabled': True,
             'time_threshold': 300,  # 5 minutes
             'memory_threshold': 1000,  # 1GB
+            'cooldown': 300.0,  # Seconds between notifications of one rule per pipeline
+            # Windowed rules, e.g. {'name': 'slow_p95', 'stat': 'p95', 'threshold': 2.0,
+            # 'clear': 1.5, 'window': 300}; see rules.Rule for all options
+            'rules': [],
+            'dispatch': {  # Background alert delivery
+                'mode': 'sync',  # 'sync' or 'async'
+                'queue_size': 1000,
+                'workers': 1,
+                'flush_interval': 1.0,  # Seconds to coalesce alerts
+                'max_batch': 50,
+                'overflow': 'drop'  # 'drop' or 'block' when the queue is full
+            },
             'slack_webhook': None,  # Optional Slack webhook URL
             'email': {  # Optional email configuration
                 'smtp_host': None,
@@ -93,3 +202,177 @@ class Configuration:
             value: Configuration value
         """
         self.config[key] = value
+
+class _RegistryEntry:
+    """Cached state for one configuration file."""
+
+    __slots__ = ('config', 'mtime', 'checked_at', 'hooks')
+
+    def __init__(self, config: Optional[Configuration], mtime: Optional[float], checked_at: float):
+        self.config = config
+        self.mtime = mtime
+        self.checked_at = checked_at
+        self.hooks: Dict[str, Any] = {}
+
+class ConfigRegistry:
+    """
+    Process-wide, thread-safe cache of configuration files.
+
+    Each file is parsed once and re-read lazily when its modification time
+    changes. The file is stat'ed at most once per ``check_interval``
+    seconds, so repeated lookups on the hot path cost a dict access.
+    Alert hooks built from a file are memoized alongside it and rebuilt
+    only when the file is reloaded.
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        """
+        Initialize the registry.
+
+        Args:
+            check_interval: Minimum seconds between mtime checks per file
+        """
+        self.check_interval = check_interval
+        self._entries: Dict[str, _RegistryEntry] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, path: Optional[str]) -> _RegistryEntry:
+        """Return the up-to-date cache entry for ``path`` (None: built-in defaults)."""
+        entry = self._entries.get(path)
+        now = time.monotonic()
+        if entry is not None and (path is None or now - entry.checked_at < self.check_interval):
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and (path is None or now - entry.checked_at < self.check_interval):
+                return entry
+
+            if path is None:
+                entry = _RegistryEntry(Configuration(), None, now)
+                self._entries[path] = entry
+                return entry
+
+            try:
+                mtime: Optional[float] = os.stat(path).st_mtime
+            except OSError:
+                mtime = None
+
+            if entry is not None and entry.mtime == mtime:
+                entry.checked_at = now
+                return entry
+
+            config = None
+            if mtime is not None:
+                try:
+                    config = Configuration.from_file(path)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Failed to load configuration {path}: {str(e)}")
+                    if entry is not None:
+                        config = entry.config
+
+            if entry is not None:
+                for hook in entry.hooks.values():
+                    if hook is not None:
+                        hook.close(timeout=0)
+
+            entry = _RegistryEntry(config, mtime, now)
+            self._entries[path] = entry
+            return entry
+
+    def get(self, path: str = DEFAULT_CONFIG_PATH) -> Configuration:
+        """
+        Get the cached configuration for a file.
+
+        Args:
+            path: Path to JSON configuration file
+
+        Returns:
+            Configuration instance
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        config = self._entry(path).config
+        if config is None:
+            raise FileNotFoundError(f"Configuration file not found: {path}")
+        return config
+
+    def get_alert_hook(self, path: Optional[str] = DEFAULT_CONFIG_PATH, channel: str = 'sms') -> Optional[Any]:
+        """
+        Get a memoized AlertHook for one alert channel of a file.
+
+        Args:
+            path: Path to JSON configuration file, or None for the
+                built-in defaults
+            channel: Alert channel ('slack', 'email' or 'sms'), or
+                'default' for the first configured one (see
+                ``alerts.build_channel_handler``)
+
+        Returns:
+            AlertHook instance, or None if the file is missing or the
+            channel is not configured
+        """
+        entry = self._entry(path)
+        try:
+            return entry.hooks[channel]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if channel not in entry.hooks:
+                hook = None
+                if entry.config is not None:
+                    from .alerts import build_channel_handler, setup_alerts
+                    alert_config = entry.config.get('alerts', {})
+                    handler = build_channel_handler(alert_config, channel)
+                    if handler is not None:
+                        hook = setup_alerts(handler, alert_config.get('dispatch'))
+                entry.hooks[channel] = hook
+            return entry.hooks[channel]
+
+    def clear(self) -> None:
+        """Drop all cached configurations and close their alert hooks."""
+        with self._lock:
+            for entry in self._entries.values():
+                for hook in entry.hooks.values():
+                    if hook is not None:
+                        hook.close(timeout=0)
+            self._entries.clear()
+
+# Shared registry used throughout the package
+registry = ConfigRegistry()
+
+def get_config(path: str = DEFAULT_CONFIG_PATH) -> Configuration:
+    """Get a cached configuration from the shared registry."""
+    return registry.get(path)
+
+def get_alert_hook(path: Optional[str] = DEFAULT_CONFIG_PATH, channel: str = 'sms') -> Optional[Any]:
+    """Get a memoized alert hook from the shared registry."""
+    return registry.get_alert_hook(path, channel)
+
+class SharedAlertHook:
+    """
+    Alert through the shared registry's hook of a configuration.
+
+    The hook is looked up on every alert, so all users of a file share
+    one hook (and its dispatcher threads) and a reloaded file's new hook
+    is picked up.
+
+    Args:
+        path: Path to JSON configuration file, or None for the built-in
+            defaults
+        channel: Alert channel, see ``ConfigRegistry.get_alert_hook``
+    """
+
+    __slots__ = ('path', 'channel')
+
+    def __init__(self, path: Optional[str] = DEFAULT_CONFIG_PATH, channel: str = 'default'):
+        self.path = path
+        self.channel = channel
+
+    def alert(self, message: str, context: Optional[Dict[str, Any]] = None) -> None:
+        """Send an alert; dropped if the channel is not configured."""
+        hook = registry.get_alert_hook(self.path, self.channel)
+        if hook is not None:
+            hook.alert(message, context)
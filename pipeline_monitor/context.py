@@ -1,23 +1,45 @@
 """Context managers for Pipeline Monitor."""
 
+import copy
+import functools
+import inspect
 import time
 import psutil
 import logging
-from typing import Optional, Any
-import json
+from typing import Optional, Any, Callable, Dict
 from contextlib import ContextDecorator
-from .dashboard.app import emit_metric
-from .alerts import setup_alerts, log_alert_handler, sms_alert_handler
-from .config import Configuration
+from .emission import emit_metric
+from .config import Configuration, get_alert_hook
+from .resource_sampler import ResourceSampler
+from .allocations import AllocationSpec, get_allocation_profiler
+from .storage import get_run_store
+from .tracing import get_tracer
+from .sinks import MetricEvent, get_metric_bus
+from .exporters import get_exporters
+from .push import get_registry_pusher
 
 logger = logging.getLogger(__name__)
 
 class ResourceMonitor(ContextDecorator):
     """
     Context manager for monitoring resource usage during execution.
+
+    Supports ``with`` and ``async with``, and decorating both plain and
+    coroutine functions. Each decorated call runs on its own copy of the
+    monitor, so concurrent calls and interleaved tasks are timed
+    independently.
     """
 
-    def __init__(self, name: str, alert_threshold_mb: Optional[float] = None, config_path: Optional[str] = None):
+    def __init__(
+        self,
+        name: str,
+        alert_threshold_mb: Optional[float] = None,
+        config_path: Optional[str] = None,
+        sample_interval: Optional[float] = None,
+        sample_capacity: int = 1024,
+        trace_allocations: AllocationSpec = None,
+        trace: Optional[bool] = None
+    ):
         """
         Initialize the resource monitor.
 
@@ -25,47 +47,72 @@ class ResourceMonitor(ContextDecorator):
             name: Name of the monitored block
             alert_threshold_mb: Memory threshold in MB to trigger alerts
             config_path: Optional path to configuration file
+            sample_interval: If set, sample RSS, CPU, IO and thread count
+                every this many seconds during the block, report
+                peak/mean/p95 and alert as soon as the memory threshold
+                is crossed
+            sample_capacity: Number of samples kept per block
+            trace_allocations: Profile Python allocations of the block with
+                tracemalloc (True, every Nth block, or a dict; see
+                ``allocations.get_allocation_profiler``). Defaults to the
+                ``allocations`` config section.
+            trace: Open a tracing span for the block, parent of the spans
+                of tracked calls made inside it. Defaults to
+                ``tracing.enabled`` in the configuration.
         """
         self.name = name
+        self.config_path = config_path
         self.config = Configuration.from_file(config_path) if config_path else Configuration()
         self.alert_threshold_mb = alert_threshold_mb or self.config.get('alerts', {}).get('memory_threshold')
         self.start_time: float = 0.0
         self.start_memory: float = 0.0
         self.process = psutil.Process()
-        
-        # Setup alert handler based on configuration
-        alert_config = self.config.get('alerts', {})
-        if alert_config.get('slack_webhook'):
-            from .alerts import slack_alert_handler
-            handler = slack_alert_handler(alert_config['slack_webhook'])
-        elif alert_config.get('email'):
-            from .alerts import email_alert_handler
-            email_cfg = alert_config['email']
-            handler = email_alert_handler(
-                smtp_host=email_cfg['smtp_host'],
-                smtp_port=email_cfg['smtp_port'],
-                sender=email_cfg['sender'],
-                password=email_cfg['password'],
-                recipients=email_cfg['recipients']
-            )
-        elif alert_config.get('sms'):
-            sms_cfg = alert_config['sms']
-            handler = sms_alert_handler(
-                provider_url=sms_cfg['provider_url'],
-                api_key=sms_cfg['api_key'],
-                sender_number=sms_cfg['sender_number'],
-                recipient_numbers=sms_cfg['recipient_numbers']
-            )
-        else:
-            handler = log_alert_handler
-            
-        self.alert_hook = setup_alerts(handler)
+        self.sample_interval = sample_interval
+        self.sample_capacity = sample_capacity
+        self.sampler: Optional[ResourceSampler] = None
+        self.profiler = get_allocation_profiler(
+            trace_allocations if trace_allocations is not None else self.config.get('allocations')
+        )
+        self.allocation_session = None
+        self.store = get_run_store(self.config.get('storage'))
+        tracing_config = self.config.get('tracing')
+        if trace is not None:
+            tracing_config = dict(tracing_config or {}, enabled=trace)
+        self.tracer = get_tracer(tracing_config)
+        self.span = None
+        self.bus = get_metric_bus(self.config.get('sinks'))
+        get_exporters(self.config.get('exporters'))
+        get_registry_pusher((self.config.get('prometheus') or {}).get('push'))
+
+    @property
+    def alert_hook(self) -> Any:
+        """
+        Alert hook of the monitor's configuration.
+
+        Memoized per configuration file by the config registry, so blocks
+        share one hook (and, with async dispatch, one worker pool) instead
+        of starting a dispatcher each.
+        """
+        return get_alert_hook(self.config_path, 'default')
 
     def __enter__(self) -> 'ResourceMonitor':
         """Start monitoring the block."""
         try:
             self.start_time = time.time()
             self.start_memory = self.process.memory_info().rss / 1024 / 1024  # MB
+            if self.sample_interval:
+                self.sampler = ResourceSampler(
+                    self.process,
+                    interval=self.sample_interval,
+                    capacity=self.sample_capacity,
+                    threshold_mb=self.alert_threshold_mb,
+                    on_threshold=self._threshold_crossed
+                )
+                self.sampler.start()
+            if self.profiler is not None and self.profiler.should_profile():
+                self.allocation_session = self.profiler.start()
+            if self.tracer is not None:
+                self.span = self.tracer.start_span(self.name, 'block')
             logger.info(f"Starting monitoring block: {self.name}")
         except Exception as e:
             logger.error(f"Error starting monitoring block: {str(e)}")
@@ -81,52 +128,136 @@ class ResourceMonitor(ContextDecorator):
             exc_tb: Exception traceback if any
         """
         try:
-            end_time = time.time()
-            end_memory = self.process.memory_info().rss / 1024 / 1024  # MB
-
-            execution_time = end_time - self.start_time
-            memory_used = end_memory - self.start_memory
-
-            metrics = {
-                'block_name': self.name,
-                'execution_time': execution_time,
-                'memory_usage_mb': memory_used,
-                'success': exc_type is None,
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
-            }
-
-            if exc_type is not None:
-                metrics['error_type'] = exc_type.__name__
-                metrics['error_message'] = str(exc_val)
-
-            logger.info(json.dumps(metrics))
-
-            # Emit metrics to dashboard
-            emit_metric('performance', {
-                'active_pipelines': 1,
-                'execution_time': execution_time
-            })
+            self._report(*self._measure(exc_type, exc_val))
+        except Exception as e:
+            logger.error(f"Error in monitoring exit: {str(e)}")
 
-            emit_metric('memory', {
-                'rss_mb': end_memory,
-                'memory_used_mb': memory_used
-            })
+    async def __aenter__(self) -> 'ResourceMonitor':
+        """Start monitoring the block inside a coroutine."""
+        return self.__enter__()
 
-            if self.alert_threshold_mb and memory_used > self.alert_threshold_mb:
-                alert_msg = (
-                    f"Block {self.name} exceeded memory threshold: "
-                    f"{memory_used:.2f}MB > {self.alert_threshold_mb}MB"
-                )
-                logger.warning(alert_msg)
-                emit_metric('alert', {'message': alert_msg})
-                
-                # Send alert through configured handler
-                self.alert_hook.alert(alert_msg, {
-                    'block_name': self.name,
-                    'memory_used_mb': memory_used,
-                    'threshold_mb': self.alert_threshold_mb,
-                    'metrics': metrics
-                })
+    async def __aexit__(self, exc_type: Optional[type], exc_val: Optional[Exception], exc_tb: Any) -> None:
+        """
+        Stop monitoring and hand reporting off to the default executor.
 
+        Measurements are taken on the event loop so they belong to this
+        task; logging, dashboard emission and alert delivery run in a
+        worker thread without blocking the loop.
+        """
+        try:
+            measured = self._measure(exc_type, exc_val)
         except Exception as e:
             logger.error(f"Error in monitoring exit: {str(e)}")
+            return
+
+        def report() -> None:
+            try:
+                self._report(*measured)
+            except Exception as e:
+                logger.error(f"Error in monitoring exit: {str(e)}")
+
+        import asyncio
+        asyncio.get_running_loop().run_in_executor(None, report)
+
+    def __call__(self, func: Callable) -> Callable:
+        """Decorate a plain or coroutine function with this monitor."""
+        if not inspect.iscoroutinefunction(func):
+            return super().__call__(func)
+
+        @functools.wraps(func)
+        async def inner(*args: Any, **kwargs: Any) -> Any:
+            async with self._recreate_cm():
+                return await func(*args, **kwargs)
+        return inner
+
+    def _recreate_cm(self) -> 'ResourceMonitor':
+        """Return a fresh copy so concurrent decorated calls don't share timers."""
+        return copy.copy(self)
+
+    def _measure(self, exc_type: Optional[type], exc_val: Optional[Exception]) -> tuple:
+        """Take end-of-block measurements and build the metrics record."""
+        end_time = time.time()
+        span, self.span = self.span, None
+        if span is not None:
+            self.tracer.end_span(span, exc_val)
+        allocations = None
+        if self.allocation_session is not None:
+            allocations = self.profiler.stop(self.allocation_session)
+            self.allocation_session = None
+        end_memory = self.process.memory_info().rss / 1024 / 1024  # MB
+
+        execution_time = end_time - self.start_time
+        memory_used = end_memory - self.start_memory
+
+        metrics = {
+            'block_name': self.name,
+            'execution_time': execution_time,
+            'memory_usage_mb': memory_used,
+            'success': exc_type is None,
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+        if exc_type is not None:
+            metrics['error_type'] = exc_type.__name__
+            metrics['error_message'] = str(exc_val)
+
+        if self.sampler is not None:
+            self.sampler.stop()
+            metrics['peak_memory_usage_mb'] = self.sampler.peak_rss_mb - self.sampler.start_rss_mb
+            metrics['resources'] = self.sampler.summary()
+
+        if allocations is not None:
+            metrics['allocations'] = allocations
+
+        if span is not None:
+            span.attributes['memory_usage_mb'] = memory_used
+            metrics['trace_id'] = span.trace_id
+
+        if self.store is not None:
+            self.store.record(self.name, execution_time, memory_used, exc_type is None, end_time)
+
+        return metrics, end_memory
+
+    def _threshold_crossed(self, memory_used: float, rss_mb: float) -> None:
+        """Alert from the sampler thread while the block is still running."""
+        alert_msg = (
+            f"Block {self.name} exceeded memory threshold: "
+            f"{memory_used:.2f}MB > {self.alert_threshold_mb}MB"
+        )
+        logger.warning(alert_msg)
+        emit_metric('alert', {'message': alert_msg})
+        self.alert_hook.alert(alert_msg, {
+            'block_name': self.name,
+            'memory_used_mb': memory_used,
+            'rss_mb': rss_mb,
+            'threshold_mb': self.alert_threshold_mb,
+            'in_progress': True
+        })
+
+    def _report(self, metrics: Dict[str, Any], end_memory: float) -> None:
+        """Publish a finished block's metrics and alert on its memory use."""
+        execution_time = metrics['execution_time']
+        memory_used = metrics['memory_usage_mb']
+        # With sampling, alert on the peak unless the sampler already did
+        peak_used = metrics.get('peak_memory_usage_mb', memory_used)
+        already_alerted = self.sampler is not None and self.sampler.threshold_crossed
+
+        # Log, dashboard and other sinks
+        if self.bus.active:
+            self.bus.publish(MetricEvent('block', self.name, metrics, end_memory * 1024 * 1024))
+
+        if self.alert_threshold_mb and peak_used > self.alert_threshold_mb and not already_alerted:
+            alert_msg = (
+                f"Block {self.name} exceeded memory threshold: "
+                f"{peak_used:.2f}MB > {self.alert_threshold_mb}MB"
+            )
+            logger.warning(alert_msg)
+            emit_metric('alert', {'message': alert_msg})
+            
+            # Send alert through configured handler
+            self.alert_hook.alert(alert_msg, {
+                'block_name': self.name,
+                'memory_used_mb': peak_used,
+                'threshold_mb': self.alert_threshold_mb,
+                'metrics': metrics
+            })
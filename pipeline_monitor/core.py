@@ -4,12 +4,17 @@ from .context import ResourceMonitor
 from .decorators import track_performance
 from .alerts import setup_alerts, log_alert_handler
 from .config import Configuration
+from .self_monitoring import overhead_meter
+from .sinks import get_metric_bus
 
 class PipelineMonitor:
     def __init__(self, config=None):
         self.active = True
         self.config = config or Configuration()
-        self.alert_hook = setup_alerts(log_alert_handler)
+        self.alert_hook = setup_alerts(
+            log_alert_handler,
+            self.config.get('alerts', {}).get('dispatch')
+        )
         
     def resource_monitor(self, name):
         """Create a resource monitoring context."""
@@ -24,6 +29,52 @@ class PipelineMonitor:
         if self.active:
             self.alert_hook.alert(message, data)
         
+    def overhead(self):
+        """
+        Summarize the time spent in monitoring code since process start.
+
+        Returns:
+            Dict with per-component calls and seconds, the total, the
+            process CPU time and their ratio
+        """
+        return overhead_meter.snapshot()
+
+    def add_sink(self, sink, queue_size=None, batch_size=None, flush_interval=None):
+        """
+        Deliver finished calls and blocks to a sink.
+
+        The sink gets its own queue and worker thread on the process-wide
+        metric bus, replacing any sink of the same name.
+
+        Args:
+            sink: ``sinks.Sink`` instance
+            queue_size: Events queued before new ones are dropped
+            batch_size: Maximum events per delivered batch
+            flush_interval: Batching window in seconds
+        """
+        get_metric_bus(self.config.get('sinks')).add_sink(
+            sink, queue_size=queue_size, batch_size=batch_size, flush_interval=flush_interval
+        )
+
+    def remove_sink(self, name):
+        """
+        Stop delivering to a sink after its queued events are delivered.
+
+        Returns:
+            The removed sink, or None if no sink has that name
+        """
+        return get_metric_bus(self.config.get('sinks')).remove_sink(name)
+
+    def sinks(self):
+        """
+        Delivery statistics of the registered sinks.
+
+        Returns:
+            Dict of sink name to queued, delivered, dropped, failures and
+            last_error
+        """
+        return get_metric_bus(self.config.get('sinks')).sinks()
+        
     def stop(self):
         """Stop the monitor."""
         self.active = False 
\ No newline at end of file
@@ -1,15 +1,26 @@
 """
 Web dashboard module for real-time monitoring of pipeline metrics.
+
+Flask and Socket.IO are imported on first access to the names below,
+not when the package is imported.
 """
-from flask import Flask
-from flask_socketio import SocketIO
-from .app import app, socketio, emit_metric, start_dashboard
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .app import app, socketio, emit_metric, start_dashboard
 
 __all__ = ['app', 'socketio', 'emit_metric', 'start_dashboard']
 
-app = Flask(__name__)
-socketio = SocketIO(app)
+def __getattr__(name: str) -> Any:
+    if name in __all__:
+        _app = importlib.import_module('.app', __name__)
+        # Importing the submodule binds 'app' to it; rebind the exported
+        # names so 'app' is the Flask application, as listed in __all__
+        exported = {export: getattr(_app, export) for export in __all__}
+        globals().update(exported)
+        return exported[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-@app.route('/')
-def index():
-    return "Datant Pipeline Monitor Dashboard"
\ No newline at end of file
+def __dir__():
+    return sorted(list(globals()) + __all__)
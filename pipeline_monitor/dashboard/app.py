@@ -1,9 +1,14 @@
-from flask import Flask, render_template, Response  # noqa
-from flask_socketio import SocketIO
+from flask import Flask, render_template, Response, jsonify, request  # noqa
+from flask_socketio import SocketIO, emit
 import logging
+import multiprocessing
 from typing import Optional
-from prometheus_client import generate_latest
-from ..prometheus_metrics import REGISTRY
+from ..prometheus_metrics import get_scrape_registry, get_series_cache, worker_memory_usage
+from ..exposition import get_exposition_cache
+from ..tracing import active_tracer
+from ..emission import emit_metric, set_dashboard_publisher
+from .history import MetricHistory, DOWNSAMPLERS
+from .emitter import MetricEmitter
 
 logger = logging.getLogger(__name__)
 
@@ -11,8 +16,19 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'pipeline-monitor-secret'
 
-# Initialize Flask-SocketIO with async mode
-socketio = SocketIO(app, async_mode='threading', logger=True, engineio_logger=True)
+# Recent metric points for late-joining clients and history queries
+history = MetricHistory()
+
+# Initialize Flask-SocketIO with async mode; per-packet logging is far
+# too verbose at dashboard update rates
+socketio = SocketIO(app, async_mode='threading', logger=False, engineio_logger=False)
+
+# Coalesces metric updates into rate-limited frames (10 Hz by default)
+emitter = MetricEmitter(socketio)
+
+# Supported server backends; eventlet and gevent need their package
+# installed and the program monkey-patched before other imports
+SERVERS = ('threading', 'eventlet', 'gevent')
 
 @app.route('/')
 def dashboard():
@@ -21,76 +37,275 @@ def dashboard():
 
 @app.route('/metrics')
 def metrics():
-    """Expose Prometheus metrics."""
-    return Response(generate_latest(REGISTRY), mimetype='text/plain')
+    """Expose Prometheus metrics, re-rendering only changed families."""
+    body, headers = get_exposition_cache(get_scrape_registry()).render(
+        request.headers.get('Accept'),
+        request.headers.get('Accept-Encoding')
+    )
+    return Response(body, headers=headers)
+
+@app.route('/api/workers')
+def workers():
+    """Per-process memory usage by pipeline, merged across worker processes."""
+    return jsonify(worker_memory_usage())
+
+@app.route('/api/quantiles')
+def duration_quantiles():
+    """Sketched duration quantiles (p50/p90/p99/p999 by default) per pipeline."""
+    return jsonify(get_series_cache().duration_quantiles())
+
+@app.route('/api/traces')
+def traces():
+    """Summaries of the most recent buffered traces."""
+    tracer = active_tracer()
+    return jsonify(tracer.traces() if tracer else [])
+
+@app.route('/api/traces/<trace_id>')
+def trace(trace_id: str):
+    """
+    Spans of one trace, or the trace as a file download.
+
+    Query parameter ``format``: 'spans' (default), 'chrome' or 'otlp'.
+    """
+    tracer = active_tracer()
+    spans = tracer.trace(trace_id) if tracer else []
+    if not spans:
+        return jsonify({'error': f'unknown trace: {trace_id}'}), 404
+
+    export_format = request.args.get('format', 'spans')
+    if export_format == 'chrome':
+        return jsonify(tracer.to_chrome_trace(trace_id))
+    if export_format == 'otlp':
+        return jsonify(tracer.to_otlp(trace_id))
+    return jsonify(spans)
+
+@app.route('/api/history')
+def metric_history():
+    """
+    Windowed, downsampled history of one metric field.
+
+    Query parameters: ``type`` and ``field`` (required), ``start`` and
+    ``end`` (Unix time), ``points`` (e.g. chart width) and ``method``
+    ('lttb' or 'minmax').
+    """
+    metric_type = request.args.get('type')
+    field = request.args.get('field')
+    method = request.args.get('method', 'lttb')
+    if not metric_type or not field or method not in DOWNSAMPLERS:
+        return jsonify({'error': 'type, field and a valid method are required'}), 400
+
+    try:
+        start = request.args.get('start', type=float)
+        end = request.args.get('end', type=float)
+        points = min(request.args.get('points', 500, type=int), 10000)
+    except ValueError:
+        return jsonify({'error': 'invalid numeric parameter'}), 400
+
+    return jsonify({
+        'type': metric_type,
+        'field': field,
+        'points': history.window(metric_type, field, start, end, points, method)
+    })
 
 @socketio.on('connect')
 def handle_connect():
-    """Handle WebSocket connection."""
+    """Handle WebSocket connection and send the recent history snapshot."""
     logger.info("Client connected to dashboard")
+    emit('snapshot', history.snapshot())
+    emitter.add_client(request.sid)
+
+@socketio.on('disconnect')
+def handle_disconnect(reason=None):
+    """Stop sending frames to a disconnected client."""
+    emitter.remove_client(request.sid)
 
 @socketio.on_error_default
 def error_handler(e):
     """Handle WebSocket errors."""
     logger.error(f"WebSocket error: {str(e)}")
 
-def emit_metric(metric_type: str, data: dict) -> None:
+def publish(metric_type: str, data: dict) -> None:
     """
-    Emit a metric update to connected clients.
+    Record a metric update and queue it for connected clients.
+
+    Called through ``emission.emit_metric``; updates are coalesced per
+    metric type and delivered in the next frame rather than sent one
+    message each.
 
     Args:
         metric_type: Type of metric (e.g., 'performance', 'memory', 'alert')
         data: Metric data to emit
     """
+    history.record(metric_type, data)
+
+    emitter.submit(metric_type, data)
+
+set_dashboard_publisher(publish)
+
+def configure_server(
+    server: str = 'threading',
+    message_queue: Optional[str] = None,
+    websocket_only: bool = False,
+    socket_logging: bool = False
+) -> None:
+    """
+    Reconfigure the Socket.IO server before the dashboard starts.
+
+    Args:
+        server: Server backend, one of SERVERS
+        message_queue: Message queue URL (e.g. 'redis://') shared by workers
+        websocket_only: Disable long-polling, so clients need no sticky sessions
+        socket_logging: Enable Socket.IO and engine.io packet logging
+    """
+    if server not in SERVERS:
+        raise ValueError(f"Unknown dashboard server: {server} (expected one of {SERVERS})")
+    if server != 'threading' and not _is_monkey_patched(server):
+        logger.warning(
+            f"{server} is not monkey-patched; patch it at program start so "
+            f"metrics emitted from pipeline threads are delivered safely"
+        )
+
+    options = {'async_mode': server, 'logger': socket_logging, 'engineio_logger': socket_logging}
+    if message_queue:
+        options['message_queue'] = message_queue
+    if websocket_only:
+        options['transports'] = ['websocket']
+
+    # init_app wraps app.wsgi_app again; unwrap the previous middleware
+    if socketio.sockio_mw is not None:
+        app.wsgi_app = socketio.sockio_mw.wsgi_app
+    socketio.init_app(app, **options)
+
+def _is_monkey_patched(server: str) -> bool:
+    """Check whether the eventlet or gevent monkey-patches are applied."""
+    if server == 'eventlet':
+        import eventlet.patcher
+        return eventlet.patcher.is_monkey_patched('thread')
+    from gevent import monkey
+    return monkey.is_module_patched('threading')
+
+def _listen(host: str, port: int, server: str, backlog: int = 2048):
+    """Open the listening socket shared by worker processes."""
+    if server == 'eventlet':
+        import eventlet
+        return eventlet.listen((host, port), backlog=backlog)
+    import socket
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(backlog)
+    return listener
+
+def _serve(listener, server: str, log_output: bool) -> None:
+    """Serve the dashboard on an already bound socket (worker process)."""
+    if server == 'eventlet':
+        import eventlet.wsgi
+        eventlet.wsgi.server(listener, app, log_output=log_output)
+        return
+
+    from gevent import pywsgi
+    options = {'log': 'default' if log_output else None}
     try:
-        socketio.emit('metric_update', {
-            'type': metric_type,
-            'data': data
-        })
-    except Exception as e:
-        logger.error(f"Failed to emit metric: {str(e)}")
-
-    # Send SMS alert if metric type is 'alert'
-    if metric_type == 'alert':
-        from ..alerts import sms_alert_handler
-        from ..config import Configuration
-
-        config = Configuration.from_file("examples/config.json")
-        sms_cfg = config.get('alerts', {}).get('sms', {})
-        if sms_cfg:
-            handler = sms_alert_handler(
-                provider_url=sms_cfg['provider_url'],
-                api_key=sms_cfg['api_key'],
-                sender_number=sms_cfg['sender_number'],
-                recipient_numbers=sms_cfg['recipient_numbers']
-            )
-            alert_msg = data.get('message', 'No message provided')
-            handler(alert_msg, data)
+        from geventwebsocket.handler import WebSocketHandler
+        options['handler_class'] = WebSocketHandler
+    except ImportError:
+        pass  # WebSocket support comes from simple-websocket
+    pywsgi.WSGIServer(listener, app, **options).serve_forever()
+
+def _run_workers(host: str, port: int, server: str, workers: int, log_output: bool) -> None:
+    """
+    Fork worker processes serving one listening socket.
+
+    Workers only serve clients; this process keeps receiving metrics and
+    broadcasts frames to all workers through the message queue.
+    """
+    listener = _listen(host, port, server)
+    context = multiprocessing.get_context('fork')
+    processes = [
+        context.Process(
+            target=_serve,
+            args=(listener, server, log_output),
+            name=f"pipeline-dashboard-{i}",
+            daemon=True
+        )
+        for i in range(workers)
+    ]
+    emitter.broadcast = True
+    for process in processes:
+        process.start()
+    emitter.start()
+
+    for process in processes:
+        process.join()
 
 def start_dashboard(
     host: str = '0.0.0.0',
     port: int = 5000,
     debug: bool = False,
-    use_reloader: bool = False
+    use_reloader: bool = False,
+    history_capacity: Optional[int] = None,
+    update_interval: Optional[float] = None,
+    server: Optional[str] = None,
+    workers: int = 1,
+    message_queue: Optional[str] = None,
+    log_output: bool = False,
+    socket_logging: bool = False
 ) -> None:
     """
     Start the monitoring dashboard server.
 
+    The default 'threading' server is Werkzeug's development server. For
+    production, use 'eventlet' or 'gevent' (monkey-patched at program
+    start). With ``workers`` > 1, worker processes share the listening
+    socket and a ``message_queue``, clients must use the WebSocket
+    transport, and history endpoints reflect the state at fork time.
+
     Args:
         host: Host to bind to (default: '0.0.0.0')
         port: Port to listen on (default: 5000)
         debug: Enable debug mode
         use_reloader: Enable auto-reloader (default: False)
+        history_capacity: Points of history kept per metric type
+        update_interval: Seconds between metric frames sent to clients
+        server: Server backend, one of SERVERS (default: current mode)
+        workers: Number of worker processes (eventlet/gevent only)
+        message_queue: Message queue URL, required for multiple workers
+        log_output: Log every HTTP request
+        socket_logging: Enable Socket.IO and engine.io packet logging
     """
+    if history_capacity:
+        history.set_capacity(history_capacity)
+    if update_interval:
+        emitter.interval = update_interval
+
+    server = server or socketio.async_mode
+    if workers > 1:
+        if server == 'threading':
+            raise ValueError("Multiple dashboard workers require the eventlet or gevent server")
+        if not message_queue:
+            raise ValueError("Multiple dashboard workers require a message_queue")
+    if server != socketio.async_mode or message_queue or workers > 1 or socket_logging:
+        configure_server(server, message_queue, workers > 1, socket_logging)
+
     try:
-        logger.info(f"Starting dashboard on {host}:{port}")
+        logger.info(f"Starting dashboard on {host}:{port} ({server}, {workers} worker(s))")
+        if workers > 1:
+            _run_workers(host, port, server, workers, log_output)
+            return
+        options = {}
+        if server == 'threading':
+            logger.warning("Using the development server; use server='eventlet' or 'gevent' in production")
+            options['allow_unsafe_werkzeug'] = True
+            if not log_output:
+                logging.getLogger('werkzeug').setLevel(logging.WARNING)
         socketio.run(
             app,
             host=host,
             port=port,
             debug=debug,
             use_reloader=use_reloader,
-            log_output=True
+            log_output=log_output,
+            **options
         )
     except Exception as e:
         logger.error(f"Failed to start dashboard: {str(e)}")
@@ -0,0 +1,212 @@
+"""
+Throttled, coalescing emission of dashboard metrics.
+
+Instead of one Socket.IO message per metric, updates are coalesced per
+metric type and sent to clients as frames at a fixed rate. Numeric
+updates are reduced to the latest payload plus min/max/mean over the
+frame; event-like updates (e.g. alerts) are forwarded individually, up
+to a per-frame limit. A client that has not acknowledged its previous
+frame skips frames until it catches up, so slow clients never build an
+unbounded backlog on the server. An acknowledgement that does not arrive
+within ``ack_timeout`` (e.g. it was lost) is given up on, so the client
+receives frames again.
+
+In broadcast mode, used when clients are served by other worker
+processes through a message queue, frames are sent to all clients
+without per-client acknowledgement.
+"""
+
+import collections
+import logging
+import threading
+import time
+from typing import Any, Deque, Dict, List, Set
+
+logger = logging.getLogger(__name__)
+
+class _Coalesced:
+    """Pending numeric updates of one metric type."""
+
+    __slots__ = ('latest', 'count', 'stats')
+
+    def __init__(self):
+        self.latest: Dict[str, Any] = {}
+        self.count = 0
+        self.stats: Dict[str, List[float]] = {}
+
+    def add(self, data: Dict[str, Any]) -> None:
+        self.latest = data
+        self.count += 1
+        for key, value in data.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                stat = self.stats.get(key)
+                if stat is None:
+                    self.stats[key] = [value, value, value]
+                else:
+                    if value < stat[0]:
+                        stat[0] = value
+                    if value > stat[1]:
+                        stat[1] = value
+                    stat[2] += value
+
+    def frame_data(self) -> Dict[str, Any]:
+        data = dict(self.latest)
+        data['samples'] = self.count
+        data['stats'] = {
+            key: {'min': lo, 'max': hi, 'mean': total / self.count}
+            for key, (lo, hi, total) in self.stats.items()
+        }
+        return data
+
+class MetricEmitter:
+    """Coalesce metric updates and emit them as rate-limited frames."""
+
+    def __init__(
+        self,
+        socketio: Any,
+        interval: float = 0.1,
+        max_events: int = 20,
+        ack_timeout: float = 5.0
+    ):
+        """
+        Args:
+            socketio: Flask-SocketIO server
+            interval: Seconds between frames (0.1 is 10 Hz)
+            max_events: Event-like updates forwarded per type and frame;
+                further ones are only counted
+            ack_timeout: Seconds to wait for a frame's acknowledgement
+                before sending the client frames again
+        """
+        self.socketio = socketio
+        self.interval = interval
+        self.max_events = max_events
+        self.ack_timeout = ack_timeout
+        self.broadcast = False
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.acks_expired = 0
+        self.events_dropped = 0
+        self._pending: Dict[str, _Coalesced] = {}
+        self._events: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._events_dropped: Dict[str, int] = {}
+        self._clients: Set[str] = set()
+        # Clients awaiting an acknowledgement, with its deadline
+        self._inflight: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._task = None
+
+    def start(self) -> None:
+        """Start the frame loop if it is not running."""
+        with self._lock:
+            if self._task is None:
+                self._task = self.socketio.start_background_task(self._run)
+
+    def add_client(self, sid: str) -> None:
+        """Register a connected client and start the frame loop."""
+        with self._lock:
+            self._clients.add(sid)
+        if not self.broadcast:
+            self.start()
+
+    def remove_client(self, sid: str) -> None:
+        """Forget a disconnected client."""
+        with self._lock:
+            self._clients.discard(sid)
+            self._inflight.pop(sid, None)
+
+    def submit(self, metric_type: str, data: Dict[str, Any]) -> None:
+        """
+        Queue a metric update for the next frame.
+
+        Updates are discarded when no client is connected (outside
+        broadcast mode).
+        """
+        if not self._clients and not self.broadcast:
+            return
+
+        numeric = any(
+            isinstance(value, (int, float)) and not isinstance(value, bool)
+            for value in data.values()
+        )
+        with self._lock:
+            if numeric:
+                pending = self._pending.get(metric_type)
+                if pending is None:
+                    pending = self._pending[metric_type] = _Coalesced()
+                pending.add(data)
+            else:
+                events = self._events.get(metric_type)
+                if events is None:
+                    events = self._events[metric_type] = collections.deque()
+                if len(events) < self.max_events:
+                    events.append(data)
+                else:
+                    self._events_dropped[metric_type] = self._events_dropped.get(metric_type, 0) + 1
+                    self.events_dropped += 1
+
+    def _take_frame(self) -> List[Dict[str, Any]]:
+        """Collect and reset pending updates."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            events, self._events = self._events, {}
+            dropped, self._events_dropped = self._events_dropped, {}
+
+        updates = [
+            {'type': metric_type, 'data': coalesced.frame_data()}
+            for metric_type, coalesced in pending.items()
+        ]
+        for metric_type, payloads in events.items():
+            updates.extend({'type': metric_type, 'data': data} for data in payloads)
+        for metric_type, count in dropped.items():
+            updates.append({'type': 'dropped', 'data': {'metric_type': metric_type, 'count': count}})
+        return updates
+
+    def flush(self) -> None:
+        """Send one frame to every client that acknowledged the last one."""
+        updates = self._take_frame()
+        if not updates:
+            return
+
+        frame = {'updates': updates}
+        if self.broadcast:
+            self.socketio.emit('metric_frame', frame)
+            self.frames_sent += 1
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            targets = []
+            for sid in self._clients:
+                deadline = self._inflight.get(sid)
+                if deadline is None:
+                    targets.append(sid)
+                elif deadline <= now:
+                    self.acks_expired += 1
+                    targets.append(sid)
+            self.frames_skipped += len(self._clients) - len(targets)
+            deadline = now + self.ack_timeout
+            for sid in targets:
+                self._inflight[sid] = deadline
+
+        for sid in targets:
+            try:
+                self.socketio.emit('metric_frame', frame, to=sid, callback=self._acknowledger(sid))
+                self.frames_sent += 1
+            except Exception as e:
+                self._inflight.pop(sid, None)
+                logger.error(f"Failed to emit metric frame: {str(e)}")
+
+    def _acknowledger(self, sid: str):
+        """Build the ack callback that makes a client eligible again."""
+        def ack(*args: Any) -> None:
+            self._inflight.pop(sid, None)
+        return ack
+
+    def _run(self) -> None:
+        """Frame loop, run as a Socket.IO background task."""
+        while True:
+            self.socketio.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush metric frame: {str(e)}")
@@ -0,0 +1,216 @@
+"""
+Server-side history of dashboard metrics.
+
+Keeps a bounded ring buffer of recent points per metric type so late
+clients can be sent a snapshot and charts can request windowed history
+downsampled to their width.
+"""
+
+import bisect
+import collections
+import threading
+import time
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from ..resource_sampler import RingBuffer
+
+Point = Tuple[float, float]
+
+def lttb(times: Sequence[float], values: Sequence[float], threshold: int) -> List[Point]:
+    """
+    Downsample a series with Largest-Triangle-Three-Buckets.
+
+    Args:
+        times: Point timestamps, ascending
+        values: Point values
+        threshold: Maximum number of points to return
+
+    Returns:
+        List of (timestamp, value) points preserving the visual shape
+    """
+    n = len(times)
+    if threshold >= n or threshold < 3:
+        return list(zip(times, values))
+
+    sampled = [(times[0], values[0])]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        span = next_end - next_start
+        avg_t = sum(times[next_start:next_end]) / span
+        avg_v = sum(values[next_start:next_end]) / span
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ta, va = times[a], values[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ta - avg_t) * (values[j] - va) - (ta - times[j]) * (avg_v - va))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append((times[best], values[best]))
+        a = best
+
+    sampled.append((times[-1], values[-1]))
+    return sampled
+
+def minmax(times: Sequence[float], values: Sequence[float], threshold: int) -> List[Point]:
+    """
+    Downsample a series keeping the minimum and maximum of each bucket.
+
+    Args:
+        times: Point timestamps, ascending
+        values: Point values
+        threshold: Maximum number of points to return
+
+    Returns:
+        List of (timestamp, value) points in time order
+    """
+    n = len(times)
+    if threshold >= n or threshold < 2:
+        return list(zip(times, values))
+
+    buckets = threshold // 2
+    size = n / buckets
+    sampled: List[Point] = []
+    for i in range(buckets):
+        start, end = int(i * size), int((i + 1) * size)
+        if start >= end:
+            continue
+        lo = min(range(start, end), key=values.__getitem__)
+        hi = max(range(start, end), key=values.__getitem__)
+        for j in sorted({lo, hi}):
+            sampled.append((times[j], values[j]))
+    return sampled
+
+DOWNSAMPLERS = {'lttb': lttb, 'minmax': minmax}
+
+class MetricHistory:
+    """
+    Bounded per-metric-type history of dashboard points.
+
+    Numeric fields of each metric type are stored column-wise in a ring
+    buffer; alerts and other non-numeric events keep their last few
+    payloads.
+    """
+
+    def __init__(self, capacity: int = 10000, events_capacity: int = 50):
+        """
+        Args:
+            capacity: Points kept per metric type
+            events_capacity: Payloads kept per non-numeric metric type
+        """
+        self.capacity = capacity
+        self.events_capacity = events_capacity
+        self._series: Dict[str, RingBuffer] = {}
+        self._events: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def set_capacity(self, capacity: int) -> None:
+        """Change the per-type capacity, dropping stored points."""
+        with self._lock:
+            self.capacity = capacity
+            self._series.clear()
+
+    def record(self, metric_type: str, data: Dict[str, Any], timestamp: Optional[float] = None) -> None:
+        """
+        Store one metric update.
+
+        Args:
+            metric_type: Type of metric (e.g., 'performance', 'memory')
+            data: Metric payload
+            timestamp: Unix time of the update; defaults to now
+        """
+        timestamp = timestamp if timestamp is not None else time.time()
+        fields = [
+            key for key, value in data.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        ]
+
+        with self._lock:
+            if not fields:
+                events = self._events.get(metric_type)
+                if events is None:
+                    events = self._events[metric_type] = collections.deque(maxlen=self.events_capacity)
+                events.append(dict(data, timestamp=timestamp))
+                return
+
+            buffer = self._series.get(metric_type)
+            if buffer is None or not set(fields) <= set(buffer.fields[1:]):
+                buffer = self._series[metric_type] = self._extend(buffer, fields)
+            buffer.append(timestamp, *(float(data.get(f, 0.0)) for f in buffer.fields[1:]))
+
+    def _extend(self, buffer: Optional[RingBuffer], fields: List[str]) -> RingBuffer:
+        """Create a buffer with additional fields, keeping existing points."""
+        known = list(buffer.fields[1:]) if buffer is not None else []
+        extended = RingBuffer(
+            self.capacity,
+            ('timestamp', *known, *(f for f in fields if f not in known))
+        )
+        if buffer is not None:
+            columns = [buffer.values(f) for f in buffer.fields]
+            padding = (0.0,) * (len(extended.fields) - len(buffer.fields))
+            for row in zip(*columns):
+                extended.append(*row, *padding)
+        return extended
+
+    def window(
+        self,
+        metric_type: str,
+        field: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        points: int = 500,
+        method: str = 'lttb'
+    ) -> List[Point]:
+        """
+        Get a downsampled window of one field.
+
+        Args:
+            metric_type: Type of metric
+            field: Numeric field of the metric
+            start: Window start as Unix time (default: oldest point)
+            end: Window end as Unix time (default: newest point)
+            points: Maximum number of points, e.g. the chart width in pixels
+            method: 'lttb' or 'minmax'
+
+        Returns:
+            List of (timestamp, value) points
+        """
+        downsample = DOWNSAMPLERS[method]
+        with self._lock:
+            buffer = self._series.get(metric_type)
+            if buffer is None or field not in buffer.fields:
+                return []
+            times = buffer.values('timestamp')
+            values = buffer.values(field)
+
+        lo = bisect.bisect_left(times, start) if start is not None else 0
+        hi = bisect.bisect_right(times, end) if end is not None else len(times)
+        return downsample(times[lo:hi], values[lo:hi], points)
+
+    def snapshot(self, points: int = 200) -> Dict[str, Any]:
+        """
+        Build a compact snapshot of all stored history.
+
+        Args:
+            points: Maximum points per field
+
+        Returns:
+            Dict with ``series`` (type -> field -> points) and ``events``
+            (type -> recent payloads)
+        """
+        with self._lock:
+            series_fields = {name: buffer.fields[1:] for name, buffer in self._series.items()}
+            events = {name: list(payloads) for name, payloads in self._events.items()}
+
+        return {
+            'series': {
+                name: {field: self.window(name, field, points=points) for field in fields}
+                for name, fields in series_fields.items()
+            },
+            'events': events
+        }
@@ -1,18 +1,30 @@
 import time
 import functools
+import inspect
 import logging
 import traceback
-from typing import Callable, Any, Optional, TypeVar, Dict, NamedTuple
+from typing import TYPE_CHECKING, Callable, Any, Optional, TypeVar, Dict, NamedTuple
 import psutil
-import json
-from .dashboard.app import emit_metric
+from .emission import emit_metric
 from .prometheus_metrics import (
-    start_pipeline_timing, stop_pipeline_timing,
-    record_pipeline_run, update_memory_usage,
-    update_active_pipelines
+    start_pipeline_timing, stop_pipeline_timing, add_nested_time, get_series_cache,
+    record_pipeline_run
 )
-from .alerts import setup_alerts, log_alert_handler, slack_alert_handler, email_alert_handler, sms_alert_handler
-from .config import Configuration
+from .alerts import build_channel_handler
+from .config import Configuration, SharedAlertHook
+from .sampling import SamplingSpec, get_sampling_policy
+from .aggregation import get_aggregator
+from .allocations import AllocationSpec, get_allocation_profiler
+from .storage import get_run_store
+from .tracing import get_tracer
+from .self_monitoring import overhead_meter, timed
+from .sinks import MetricEvent, get_metric_bus
+from .rules import RuleAlert, RuleEngine
+from .exporters import get_exporters
+from .push import get_registry_pusher
+
+if TYPE_CHECKING:
+    import asyncio
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +38,7 @@ class Metrics(NamedTuple):
     end_memory: int
     success: bool = True
     timestamp: str = time.strftime('%Y-%m-%d %H:%M:%S')
+    allocations: Optional[Dict[str, Any]] = None
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert metrics to dictionary."""
@@ -36,63 +49,186 @@ class AlertConfig(NamedTuple):
     time_threshold: Optional[float]
     mem_threshold: Optional[float]
     alert_hook: Any
+    rules: Optional[RuleEngine] = None
 
 def get_alert_handler(alert_config: Dict[str, Any]) -> Callable:
     """Get appropriate alert handler based on configuration."""
-    if not alert_config:
-        return log_alert_handler
-
-    if webhook := alert_config.get('slack_webhook'):
-        return slack_alert_handler(webhook)
-    
-    if email_cfg := alert_config.get('email'):
-        return email_alert_handler(
-            smtp_host=email_cfg['smtp_host'],
-            smtp_port=email_cfg['smtp_port'],
-            sender=email_cfg['sender'],
-            password=email_cfg['password'],
-            recipients=email_cfg['recipients']
-        )
-    
-    if sms_cfg := alert_config.get('sms'):
-        return sms_alert_handler(
-            provider_url=sms_cfg['provider_url'],
-            api_key=sms_cfg['api_key'],
-            sender_number=sms_cfg['sender_number'],
-            recipient_numbers=sms_cfg['recipient_numbers']
-        )
-    
-    return log_alert_handler
+    return build_channel_handler(alert_config or {}, 'default')
 
 def track_performance(
     alert_threshold: Optional[float] = None,
     memory_threshold: Optional[float] = None,
-    config_path: Optional[str] = None
+    config_path: Optional[str] = None,
+    sampling: SamplingSpec = None,
+    aggregate: Optional[bool] = None,
+    trace_allocations: AllocationSpec = None,
+    trace: Optional[bool] = None
 ) -> Callable[[F], F]:
-    """Decorator to track function performance metrics."""
+    """
+    Decorator to track function performance metrics.
+
+    Can be applied bare (``@track_performance``) or with arguments.
+    Coroutine functions are timed across their whole execution; their
+    dashboard emission and alert delivery are handed off to the event
+    loop's default executor so the loop is never blocked.
+
+    Args:
+        alert_threshold: Execution time threshold in seconds; a per-call
+            alert rule evaluated with ``alerts.rules`` (see ``rules``)
+        memory_threshold: Memory threshold in MB; a per-call alert rule
+            evaluated on sampled calls
+        config_path: Optional path to configuration file
+        sampling: Sampling policy deciding which calls take the full
+            monitoring path (see ``sampling.get_sampling_policy``).
+            Defaults to the ``sampling`` config section, or every call.
+            Unsampled calls only update the run and call counters and
+            the call duration histogram; their errors are still logged
+            and alerted. ``pipeline_duration_seconds`` and the duration
+            sketch only see sampled calls, successful or not, so sampling
+            does not skew their quantiles.
+        aggregate: Record call counts and durations into per-thread
+            buffers flushed periodically to Prometheus and the dashboard
+            instead of updating them on every call. Defaults to
+            ``aggregation.enabled`` in the configuration.
+        trace_allocations: Profile Python allocations of sampled calls
+            with tracemalloc: True for every call, N for every Nth call,
+            or a dict (see ``allocations.get_allocation_profiler``).
+            Net/peak allocation and the top allocating lines are added
+            to the metrics, alert context and dashboard. Defaults to the
+            ``allocations`` config section.
+        trace: Open a tracing span for every sampled call, nested under
+            the span of the calling tracked function or monitored block
+            (see ``tracing``). Defaults to ``tracing.enabled`` in the
+            configuration.
+    """
+    if callable(alert_threshold):
+        return track_performance()(alert_threshold)
+
     # Load configuration once when decorator is applied
     config = Configuration.from_file(config_path) if config_path else Configuration()
     alert_config = config.get('alerts', {})
+    sampling_spec = sampling if sampling is not None else config.get('sampling')
+    aggregation_config = config.get('aggregation', {})
+    allocation_spec = trace_allocations if trace_allocations is not None else config.get('allocations')
+    if aggregate is None:
+        aggregate = aggregation_config.get('enabled', False)
+    store = get_run_store(config.get('storage'))
+    series_cache = get_series_cache(config.get('prometheus'))
+    tracing_config = config.get('tracing')
+    if trace is not None:
+        tracing_config = dict(tracing_config or {}, enabled=trace)
+    tracer = get_tracer(tracing_config)
+    get_metric_bus(config.get('sinks'))
+    get_exporters(config.get('exporters'))
+    get_registry_pusher((config.get('prometheus') or {}).get('push'))
     
     # Create alert configuration
+    time_threshold = alert_threshold or alert_config.get('time_threshold')
+    mem_threshold = memory_threshold or alert_config.get('memory_threshold')
     alert_cfg = AlertConfig(
-        time_threshold=alert_threshold or alert_config.get('time_threshold'),
-        mem_threshold=memory_threshold or alert_config.get('memory_threshold'),
-        alert_hook=setup_alerts(get_alert_handler(alert_config))
+        time_threshold=time_threshold,
+        mem_threshold=mem_threshold,
+        # Shared with every user of the file, like ResourceMonitor's
+        alert_hook=SharedAlertHook(config_path or None, 'default'),
+        rules=RuleEngine.from_config(alert_config, time_threshold, mem_threshold)
     )
 
     def decorator(func: F) -> F:
-        # Cache the process object
+        # Cache the process object, sampling policy and label children
         process = psutil.Process()
+        policy = get_sampling_policy(sampling_spec)
+        profiler = get_allocation_profiler(allocation_spec)
+        name = func.__name__
+        series = series_cache.series(name)
+        # Coroutines deliver rule alerts off the event loop
+        notify = send_rule_alert_in_background if inspect.iscoroutinefunction(func) else send_rule_alert
+        rules = alert_cfg.rules.bind(name, functools.partial(notify, alert_cfg.alert_hook)) if alert_cfg.rules else None
+
+        if aggregate:
+            aggregator = get_aggregator(aggregation_config.get('flush_interval', 1.0))
+
+            def count_call(duration_ns: int) -> None:
+                aggregator.record(name, duration_ns / 1e9)
+        else:
+            aggregator = None
+
+            def count_call(duration_ns: int) -> None:
+                series.count_call(duration_ns / 1e9)
+
+        if store is not None:
+            def record_call(duration_ns: int, success: bool = True, metrics: Optional[Metrics] = None) -> None:
+                count_call(duration_ns)
+                store.record(name, duration_ns / 1e9, metrics.memory_used if metrics else None, success)
+        else:
+            def record_call(duration_ns: int, success: bool = True, metrics: Optional[Metrics] = None) -> None:
+                count_call(duration_ns)
+
+        if rules is not None:
+            record_run = record_call
+
+            def record_call(duration_ns: int, success: bool = True, metrics: Optional[Metrics] = None) -> None:
+                record_run(duration_ns, success, metrics)
+                if metrics is None:
+                    rules.observe(duration_ns / 1e9, success)
+                else:
+                    rules.observe(duration_ns / 1e9, success, metrics.memory_used, metrics)
         
+        # The wrapper's own time is metered as one component; timed calls
+        # it makes count as nested in it
+        meter_enter, meter_leave, meter_add = overhead_meter.enter, overhead_meter.leave, overhead_meter.add
+
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
+            enter_ns = time.perf_counter_ns()
+            if not policy.should_sample():
+                success = False
+                start_ns = time.perf_counter_ns()
+                try:
+                    result = func(*args, **kwargs)
+                    success = True
+                    return result
+                except Exception as e:
+                    handle_error(func.__name__, e, alert_cfg.alert_hook, timed=False)
+                    raise
+                finally:
+                    end_ns = time.perf_counter_ns()
+                    depth = meter_enter()
+                    duration_ns = end_ns - start_ns
+                    record_call(duration_ns, success)
+                    if success and aggregator is None:
+                        # Failures are counted in handle_error
+                        series.record_run(True)
+                    add_nested_time(duration_ns / 1e9)
+                    policy.observe(duration_ns)
+                    meter_leave(depth)
+                    meter_add(
+                        'track_performance',
+                        ((start_ns - enter_ns) + (time.perf_counter_ns() - end_ns)) / 1e9,
+                        depth == 0
+                    )
+
+            depth = meter_enter()
             start_time = time.time()
             start_memory = process.memory_info().rss
-            start_pipeline_timing()
+            start_pipeline_timing(name)
+            session = profiler.start() if profiler and profiler.should_profile() else None
+            span = tracer.start_span(name) if tracer else None
+            meter_leave(depth)
 
             try:
-                result = func(*args, **kwargs)
+                error = None
+                start_ns = time.perf_counter_ns()
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    end_ns = time.perf_counter_ns()
+                    meter_enter()
+                    if span is not None:
+                        tracer.end_span(span, error)
+                    allocations = profiler.stop(session) if session else None
                 memory_info = process.memory_info()
                 
                 # Calculate metrics
@@ -100,68 +236,228 @@ def track_performance(
                     function_name=func.__name__,
                     execution_time=time.time() - start_time,
                     memory_used=(memory_info.rss - start_memory) / 1024 / 1024,
-                    end_memory=memory_info.rss
+                    end_memory=memory_info.rss,
+                    timestamp=time.strftime('%Y-%m-%d %H:%M:%S'),
+                    allocations=allocations
                 )
+                if span is not None:
+                    span.attributes['memory_used_mb'] = metrics.memory_used
 
-                # Update monitoring and check thresholds
-                update_monitoring_systems(metrics)
-                check_thresholds(metrics, alert_cfg)
+                # Update monitoring; alert rules see the call in record_call
+                update_monitoring_systems(metrics, aggregated=aggregator is not None)
+
+                duration_ns = end_ns - start_ns
+                record_call(duration_ns, True, metrics)
+                policy.observe(
+                    duration_ns,
+                    (start_ns - enter_ns) + (time.perf_counter_ns() - end_ns)
+                )
 
                 return result
 
             except Exception as e:
+                record_call(time.perf_counter_ns() - enter_ns, False)
                 handle_error(func.__name__, e, alert_cfg.alert_hook)
                 raise
+            finally:
+                meter_leave(depth)
+                meter_add(
+                    'track_performance',
+                    ((start_ns - enter_ns) + (time.perf_counter_ns() - end_ns)) / 1e9,
+                    depth == 0
+                )
 
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            enter_ns = time.perf_counter_ns()
+            # asyncio is loaded once a coroutine runs; not importing it at
+            # module level keeps synchronous users' import time down
+            import asyncio
+            loop = asyncio.get_running_loop()
+
+            if not policy.should_sample():
+                success = False
+                start_ns = time.perf_counter_ns()
+                try:
+                    result = await func(*args, **kwargs)
+                    success = True
+                    return result
+                except Exception as e:
+                    run_in_background(
+                        loop, handle_error, name, e, alert_cfg.alert_hook, traceback.format_exc(), False
+                    )
+                    raise
+                finally:
+                    end_ns = time.perf_counter_ns()
+                    depth = meter_enter()
+                    duration_ns = end_ns - start_ns
+                    record_call(duration_ns, success)
+                    if success and aggregator is None:
+                        # Failures are counted in handle_error
+                        series.record_run(True)
+                    add_nested_time(duration_ns / 1e9)
+                    policy.observe(duration_ns)
+                    meter_leave(depth)
+                    meter_add(
+                        'track_performance',
+                        ((start_ns - enter_ns) + (time.perf_counter_ns() - end_ns)) / 1e9,
+                        depth == 0
+                    )
+
+            # Monitoring code runs between awaits, so no other task on this
+            # thread runs while the meter counts it
+            depth = meter_enter()
+            start_memory = process.memory_info().rss
+            session = profiler.start() if profiler and profiler.should_profile() else None
+            # The span stack lives in the task's context, so concurrent
+            # tasks on one loop each time their own nesting
+            start_pipeline_timing(name)
+            span = tracer.start_span(name) if tracer else None
+            meter_leave(depth)
+            start_ns = time.perf_counter_ns()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                end_ns = time.perf_counter_ns()
+                meter_enter()
+                try:
+                    if span is not None:
+                        tracer.end_span(span, e)
+                    if session:
+                        profiler.stop(session)
+                    duration_ns = end_ns - start_ns
+                    record_call(duration_ns, False)
+                    stop_pipeline_timing(name)
+                    run_in_background(
+                        loop, handle_error, name, e, alert_cfg.alert_hook, traceback.format_exc(), False
+                    )
+                finally:
+                    meter_leave(depth)
+                    meter_add(
+                        'track_performance',
+                        ((start_ns - enter_ns) + (time.perf_counter_ns() - end_ns)) / 1e9,
+                        depth == 0
+                    )
+                raise
+
+            end_ns = time.perf_counter_ns()
+            meter_enter()
+            try:
+                if span is not None:
+                    tracer.end_span(span)
+                allocations = profiler.stop(session) if session else None
+                memory_info = process.memory_info()
+                duration_ns = end_ns - start_ns
+
+                metrics = Metrics(
+                    function_name=name,
+                    execution_time=duration_ns / 1e9,
+                    memory_used=(memory_info.rss - start_memory) / 1024 / 1024,
+                    end_memory=memory_info.rss,
+                    timestamp=time.strftime('%Y-%m-%d %H:%M:%S'),
+                    allocations=allocations
+                )
+                if span is not None:
+                    span.attributes['memory_used_mb'] = metrics.memory_used
+
+                # Timing and the run are recorded here, per task; the rest runs off the loop
+                stop_pipeline_timing(name, record=aggregator is None)
+                if aggregator is None:
+                    series.record_run(True)
+                run_in_background(loop, report_metrics, metrics, aggregator is not None)
+
+                record_call(duration_ns, True, metrics)
+                policy.observe(
+                    duration_ns,
+                    (start_ns - enter_ns) + (time.perf_counter_ns() - end_ns)
+                )
+                return result
+            finally:
+                meter_leave(depth)
+                meter_add(
+                    'track_performance',
+                    ((start_ns - enter_ns) + (time.perf_counter_ns() - end_ns)) / 1e9,
+                    depth == 0
+                )
+
+        if inspect.iscoroutinefunction(func):
+            return async_wrapper
         return wrapper
     return decorator
 
-def update_monitoring_systems(metrics: Metrics) -> None:
-    """Update all monitoring systems with current metrics."""
-    metrics_dict = metrics.to_dict()
-    logger.info(json.dumps(metrics_dict))
-
-    # Update Prometheus metrics
-    stop_pipeline_timing(metrics.function_name)
-    record_pipeline_run(metrics.function_name, True)
-    update_memory_usage(metrics.function_name, metrics.end_memory)
-    update_active_pipelines(1)
-
-    # Emit metrics to dashboard
-    emit_metric('performance', {
-        'active_pipelines': 1,
-        'execution_time': metrics.execution_time
-    })
-    emit_metric('memory', {
-        'rss_mb': metrics.end_memory / 1024 / 1024,
-        'memory_used_mb': metrics.memory_used
-    })
+def run_in_background(loop: 'asyncio.AbstractEventLoop', func: Callable, *args: Any) -> None:
+    """
+    Run a blocking monitoring call in the loop's default executor.
+
+    The call is not awaited; failures are logged instead of propagated.
+    """
+    def call() -> None:
+        try:
+            func(*args)
+        except Exception as e:
+            logger.error(f"Error in background monitoring call: {str(e)}")
+
+    loop.run_in_executor(None, call)
+
+def report_metrics(metrics: Metrics, aggregated: bool) -> None:
+    """Report a coroutine's metrics whose duration was already recorded."""
+    update_monitoring_systems(metrics, aggregated=aggregated, timed=False)
+
+@timed('update_monitoring_systems')
+def update_monitoring_systems(
+    metrics: Metrics,
+    aggregated: bool = False,
+    timed: bool = True
+) -> None:
+    """
+    Update all monitoring systems with current metrics.
 
-def check_thresholds(metrics: Metrics, alert_cfg: AlertConfig) -> None:
-    """Check time and memory thresholds and send alerts if exceeded."""
-    if alert_cfg.time_threshold and metrics.execution_time > alert_cfg.time_threshold:
-        alert_msg = (
-            f"Function {metrics.function_name} exceeded time threshold: "
-            f"{metrics.execution_time:.2f}s > {alert_cfg.time_threshold}s"
-        )
-        send_alert(alert_msg, {
-            'function_name': metrics.function_name,
-            'execution_time': metrics.execution_time,
-            'threshold': alert_cfg.time_threshold,
-            'metrics': metrics.to_dict()
-        }, alert_cfg.alert_hook)
-
-    if alert_cfg.mem_threshold and metrics.memory_used > alert_cfg.mem_threshold:
-        alert_msg = (
-            f"Function {metrics.function_name} exceeded memory threshold: "
-            f"{metrics.memory_used:.2f}MB > {alert_cfg.mem_threshold}MB"
-        )
-        send_alert(alert_msg, {
-            'function_name': metrics.function_name,
-            'memory_used_mb': metrics.memory_used,
-            'threshold_mb': alert_cfg.mem_threshold,
-            'metrics': metrics.to_dict()
-        }, alert_cfg.alert_hook)
+    The call's duration and run are recorded here, on the calling
+    context's span stack, like failed runs in ``handle_error``; logging,
+    Prometheus memory metrics, the dashboard and other sinks receive the
+    metrics through the metric bus.
+
+    Args:
+        metrics: Metrics of the finished call
+        aggregated: Whether durations and runs are reported by the
+            aggregator, in which case sinks only log and update the
+            memory gauge
+        timed: Whether the call's span is still running on the span
+            stack; False if the caller recorded it and the run
+    """
+    if timed:
+        stop_pipeline_timing(metrics.function_name, record=not aggregated)
+        if not aggregated:
+            record_pipeline_run(metrics.function_name, True)
+
+    bus = get_metric_bus()
+    if bus.active:
+        bus.publish(MetricEvent(
+            'call', metrics.function_name, metrics.to_dict(), metrics.end_memory, aggregated
+        ))
+
+@timed('send_rule_alert')
+def send_rule_alert(alert_hook: Any, alert: RuleAlert) -> None:
+    """Send a rule that fired or resolved through the alert hook."""
+    context = alert.context
+    if isinstance(context.get('metrics'), Metrics):
+        context = dict(context, metrics=context['metrics'].to_dict())
+    if context['state'] == 'firing':
+        send_alert(alert.message, context, alert_hook)
+        return
+    logger.info(alert.message)
+    emit_metric('alert', {'message': alert.message})
+    alert_hook.alert(alert.message, context)
+
+def send_rule_alert_in_background(alert_hook: Any, alert: RuleAlert) -> None:
+    """Send a rule alert from a coroutine without blocking its event loop."""
+    import asyncio
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        send_rule_alert(alert_hook, alert)
+        return
+    run_in_background(loop, send_rule_alert, alert_hook, alert)
 
 def send_alert(message: str, context: Dict[str, Any], alert_hook: Any) -> None:
     """Send alert through configured handler."""
@@ -169,27 +465,33 @@ def send_alert(message: str, context: Dict[str, Any], alert_hook: Any) -> None:
     emit_metric('alert', {'message': message})
     alert_hook.alert(message, context)
 
-def handle_error(func_name: str, error: Exception, alert_hook: Any) -> None:
-    """Handle and report function errors."""
+def handle_error(
+    func_name: str,
+    error: Exception,
+    alert_hook: Any,
+    tb: Optional[str] = None,
+    timed: bool = True
+) -> None:
+    """
+    Handle and report function errors.
+
+    Args:
+        func_name: Name of the failed function
+        error: Raised exception
+        alert_hook: Alert hook to notify
+        tb: Formatted traceback; defaults to the exception being handled
+        timed: Whether the call's span is still running in this context;
+            False if the caller ended it or never started one
+    """
     error_msg = f"Error in {func_name}: {str(error)}"
     logger.error(error_msg)
-    stop_pipeline_timing(func_name)
+    if timed:
+        stop_pipeline_timing(func_name)
     record_pipeline_run(func_name, False)
     
     alert_hook.alert(error_msg, {
         'function_name': func_name,
         'error': str(error),
-        'traceback': traceback.format_exc(),
+        'traceback': tb if tb is not None else traceback.format_exc(),
         'type': 'error'
     })
-
-def track_performance(func):
-    """Decorator to track function performance."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        duration = time.time() - start_time
-        print(f"Function {func.__name__} took {duration:.2f} seconds")
-        return result
-    return wrapper
@@ -0,0 +1,51 @@
+"""
+Dashboard-independent metric emission.
+
+Monitoring code emits through ``emit_metric`` here rather than importing
+the dashboard, so tracking a pipeline never loads Flask or Socket.IO.
+The dashboard registers its publisher when its module is imported (e.g.
+by ``start_dashboard`` or ``configure_server``); until then updates are
+discarded, except that alerts are still sent to the configured SMS
+channel.
+"""
+
+from typing import Callable, Optional
+from .config import DEFAULT_CONFIG_PATH, get_alert_hook
+from .self_monitoring import timed
+
+# Dashboard publisher, set by pipeline_monitor.dashboard.app
+_publisher: Optional[Callable[[str, dict], None]] = None
+
+def set_dashboard_publisher(publisher: Optional[Callable[[str, dict], None]]) -> None:
+    """
+    Route emitted metrics to the dashboard.
+
+    Args:
+        publisher: Function taking (metric_type, data), or None to stop
+    """
+    global _publisher
+    _publisher = publisher
+
+def dashboard_loaded() -> bool:
+    """Whether a dashboard receives emitted metrics in this process."""
+    return _publisher is not None
+
+@timed('emit_metric')
+def emit_metric(metric_type: str, data: dict) -> None:
+    """
+    Emit a metric update to the dashboard, if one is set up.
+
+    Args:
+        metric_type: Type of metric (e.g., 'performance', 'memory', 'alert')
+        data: Metric data to emit
+    """
+    publisher = _publisher
+    if publisher is not None:
+        publisher(metric_type, data)
+
+    # Send SMS alert if metric type is 'alert'
+    if metric_type == 'alert':
+        alert_hook = get_alert_hook(DEFAULT_CONFIG_PATH, 'sms')
+        if alert_hook is not None:
+            alert_msg = data.get('message', 'No message provided')
+            alert_hook.alert(alert_msg, data)
@@ -0,0 +1,439 @@
+"""
+Push exporters for StatsD/DogStatsD and InfluxDB line protocol.
+
+Prometheus scrapes miss pipelines that finish between two scrapes. The
+exporters push the pipeline run, call, duration, quantile and memory
+metrics instead: every ``interval`` seconds, and once more at
+interpreter exit, they read those families from REGISTRY and send what
+changed since the last push. Counters and histogram counts/sums are
+sent as deltas; gauges are sent when their value changed. Prometheus
+has already aggregated the calls, so a push costs the same for ten or a
+million calls and nothing is added to the monitored call path.
+
+Lines are packed into datagrams of at most ``max_packet_size`` bytes
+(1432 by default, to fit a 1500-byte MTU with IP and UDP headers), so a
+flush takes a few packets.
+
+Destinations are URLs: ``udp://host:port``, ``tcp://host:port`` (line
+protocol only) or a file path. A forked child opens its own socket and
+starts its own push thread.
+"""
+
+import atexit
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+from .self_monitoring import overhead_meter
+
+logger = logging.getLogger(__name__)
+
+# Prometheus families pushed by the exporters
+EXPORTED_FAMILIES = frozenset({
+    'pipeline_runs',
+    'pipeline_calls',
+    'pipeline_duration_seconds',
+    'pipeline_call_duration_seconds',
+    'pipeline_duration_quantile_seconds',
+    'pipeline_memory_usage_bytes',
+    'pipeline_aggregated_calls',
+    'pipeline_aggregated_duration_seconds',
+})
+
+# Fits a 1500-byte Ethernet MTU after IP and UDP headers
+DEFAULT_PACKET_SIZE = 1432
+
+class Point(NamedTuple):
+    """One exported value."""
+    family: str
+    field: str  # 'value', or 'count'/'sum' of a histogram
+    labels: Tuple[Tuple[str, str], ...]
+    counter: bool
+    value: float
+
+def pack(lines: List[str], max_size: int) -> Iterator[bytes]:
+    """
+    Join lines with newlines into payloads of at most ``max_size`` bytes.
+
+    A single line longer than ``max_size`` is sent on its own.
+    """
+    packet: List[bytes] = []
+    size = 0
+    for line in lines:
+        data = line.encode()
+        if packet and size + 1 + len(data) > max_size:
+            yield b'\n'.join(packet)
+            packet = []
+            size = 0
+        size += len(data) + (1 if packet else 0)
+        packet.append(data)
+    if packet:
+        yield b'\n'.join(packet)
+
+def format_value(value: float) -> str:
+    """Format a number without exponent notation for integral values."""
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+class Transport:
+    """
+    Send encoded lines to a UDP or TCP endpoint or append them to a file.
+
+    Args:
+        url: 'udp://host:port', 'tcp://host:port' or a file path
+        max_packet_size: Maximum UDP datagram payload in bytes
+    """
+
+    def __init__(self, url: str, max_packet_size: int = DEFAULT_PACKET_SIZE):
+        parsed = urlparse(url)
+        self.scheme = parsed.scheme if parsed.scheme in ('udp', 'tcp') else 'file'
+        self.max_packet_size = max_packet_size
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.errors = 0
+        self._sock: Optional[socket.socket] = None
+        if self.scheme == 'file':
+            self.path = parsed.path if parsed.scheme == 'file' else url
+        else:
+            self.address = (parsed.hostname or '127.0.0.1', parsed.port)
+
+    def _socket(self) -> socket.socket:
+        if self._sock is None:
+            if self.scheme == 'udp':
+                self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            else:
+                self._sock = socket.create_connection(self.address, timeout=5.0)
+        return self._sock
+
+    def send(self, lines: List[str]) -> None:
+        """Send lines; failures are counted and logged, never raised."""
+        if not lines:
+            return
+        try:
+            if self.scheme == 'udp':
+                sock = self._socket()
+                for payload in pack(lines, self.max_packet_size):
+                    sock.sendto(payload, self.address)
+                    self.packets_sent += 1
+                    self.bytes_sent += len(payload)
+            elif self.scheme == 'tcp':
+                payload = ('\n'.join(lines) + '\n').encode()
+                self._socket().sendall(payload)
+                self.packets_sent += 1
+                self.bytes_sent += len(payload)
+            else:
+                payload = '\n'.join(lines) + '\n'
+                with open(self.path, 'a') as f:
+                    f.write(payload)
+                self.packets_sent += 1
+                self.bytes_sent += len(payload)
+        except OSError as e:
+            self.errors += 1
+            self.close()  # reconnect on the next send
+            logger.error(f"Failed to send metrics to {self.scheme} destination: {str(e)}")
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+class MetricExporter:
+    """
+    Push changes of the pipeline metrics on an interval.
+
+    Subclasses implement ``encode``.
+
+    Args:
+        url: Destination, see ``Transport``
+        interval: Seconds between pushes
+        max_packet_size: Maximum UDP datagram payload in bytes
+        registry: Registry to read (default: pipeline_monitor's REGISTRY)
+    """
+
+    name = 'exporter'
+
+    def __init__(
+        self,
+        url: str,
+        interval: float = 10.0,
+        max_packet_size: int = DEFAULT_PACKET_SIZE,
+        registry: Any = None
+    ):
+        if registry is None:
+            from .prometheus_metrics import REGISTRY
+            registry = REGISTRY
+        self.registry = registry
+        self.interval = interval
+        self.transport = Transport(url, max_packet_size)
+        self.flushes = 0
+        self._last: Dict[Tuple[str, str, tuple], float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._flush = overhead_meter.timed(f'export_{self.name}')(self._flush_points)
+
+    def collect(self) -> List[Point]:
+        """Read the current values of the exported families."""
+        points = []
+        for family in self.registry.collect():
+            if family.name not in EXPORTED_FAMILIES:
+                continue
+            for sample in family.samples:
+                labels = tuple(sorted(sample.labels.items()))
+                if family.type == 'counter' and sample.name.endswith('_total'):
+                    points.append(Point(family.name, 'value', labels, True, sample.value))
+                elif family.type == 'histogram' and sample.name.endswith(('_count', '_sum')):
+                    field = sample.name.rsplit('_', 1)[1]
+                    points.append(Point(family.name, field, labels, True, sample.value))
+                elif family.type == 'gauge':
+                    points.append(Point(family.name, 'value', labels, False, sample.value))
+        return points
+
+    def changes(self, points: List[Point], force: bool = False) -> List[Point]:
+        """
+        Turn counters into deltas since the last push and drop unchanged values.
+
+        Args:
+            points: Current values from ``collect``
+            force: Also return unchanged gauges (used for the final push)
+        """
+        changed = []
+        for point in points:
+            key = (point.family, point.field, point.labels)
+            last = self._last.get(key)
+            self._last[key] = point.value
+            if point.counter:
+                # A value below the last one means the series was reset
+                delta = point.value - last if last is not None and point.value >= last else point.value
+                if delta:
+                    changed.append(point._replace(value=delta))
+            elif force or point.value != last:
+                changed.append(point)
+        return changed
+
+    def encode(self, points: List[Point]) -> List[str]:
+        """Encode points as protocol lines."""
+        raise NotImplementedError
+
+    def _flush_points(self, force: bool) -> int:
+        with self._lock:
+            points = self.changes(self.collect(), force)
+            self.transport.send(self.encode(points))
+            self.flushes += 1
+        return len(points)
+
+    def flush(self, force: bool = False) -> int:
+        """
+        Push the changes since the last push now.
+
+        Returns:
+            Number of values sent
+        """
+        return self._flush(force)
+
+    def start(self) -> None:
+        """Start pushing every ``interval`` seconds."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=f'pipeline-monitor-export-{self.name}', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the push thread after a final push of all values."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            self.flush(force=True)
+        finally:
+            self.transport.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to push metrics with {self.name}: {str(e)}")
+
+    def _after_fork(self) -> None:
+        """Open a new socket and restart pushing in a forked child."""
+        self.transport._sock = None  # the parent keeps using it
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        if self._thread is not None:
+            self._thread = None
+            self.start()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pushes, packets, bytes and send errors so far."""
+        return {
+            'flushes': self.flushes,
+            'packets': self.transport.packets_sent,
+            'bytes': self.transport.bytes_sent,
+            'errors': self.transport.errors
+        }
+
+# Label values become name segments, so dots would add hierarchy levels
+_STATSD_NAME = re.compile(r'[^A-Za-z0-9_\-]')
+_STATSD_TAG = re.compile(r'[,|#\s]')
+
+class StatsDExporter(MetricExporter):
+    """
+    Push metrics in StatsD or DogStatsD format over UDP.
+
+    Counters are sent as '|c' deltas and gauges as '|g'. DogStatsD gets
+    the Prometheus labels as tags; plain StatsD gets the label values
+    appended to the metric name.
+
+    Args:
+        url: Destination (default: 'udp://127.0.0.1:8125')
+        flavor: 'dogstatsd' or 'statsd'
+        prefix: Prepended to every metric name, e.g. 'myteam.'
+        **kwargs: See MetricExporter
+    """
+
+    name = 'statsd'
+
+    def __init__(
+        self,
+        url: str = 'udp://127.0.0.1:8125',
+        flavor: str = 'dogstatsd',
+        prefix: str = '',
+        **kwargs: Any
+    ):
+        if flavor not in ('dogstatsd', 'statsd'):
+            raise ValueError(f"Unknown StatsD flavor: {flavor} (expected 'dogstatsd' or 'statsd')")
+        super().__init__(url, **kwargs)
+        self.flavor = flavor
+        self.prefix = prefix
+
+    def encode(self, points: List[Point]) -> List[str]:
+        lines = []
+        for point in points:
+            name = self.prefix + point.family
+            if self.flavor == 'statsd' and point.labels:
+                name += '.' + '.'.join(_STATSD_NAME.sub('_', value) for _, value in point.labels)
+            if point.field != 'value':
+                name += '.' + point.field
+            line = f"{name}:{format_value(point.value)}|{'c' if point.counter else 'g'}"
+            if self.flavor == 'dogstatsd' and point.labels:
+                line += '|#' + ','.join(
+                    f"{key}:{_STATSD_TAG.sub('_', value)}" for key, value in point.labels
+                )
+            lines.append(line)
+        return lines
+
+def _escape_key(value: str) -> str:
+    return value.replace('\\', '\\\\').replace(',', '\\,').replace('=', '\\=').replace(' ', '\\ ')
+
+class LineProtocolExporter(MetricExporter):
+    """
+    Push metrics in InfluxDB line protocol over UDP, TCP or to a file.
+
+    One line per family and label set, with a 'value' field for counters
+    (delta since the last push) and gauges, or 'count' and 'sum' fields
+    for histograms, timestamped in nanoseconds.
+
+    Args:
+        url: Destination (default: 'udp://127.0.0.1:8089')
+        **kwargs: See MetricExporter
+    """
+
+    name = 'influx'
+
+    def __init__(self, url: str = 'udp://127.0.0.1:8089', **kwargs: Any):
+        super().__init__(url, **kwargs)
+
+    def encode(self, points: List[Point]) -> List[str]:
+        series: Dict[Tuple[str, tuple], Dict[str, float]] = {}
+        for point in points:
+            series.setdefault((point.family, point.labels), {})[point.field] = point.value
+
+        timestamp = time.time_ns()
+        lines = []
+        for (family, labels), fields in series.items():
+            tags = ''.join(f',{_escape_key(key)}={_escape_key(value)}' for key, value in labels if value)
+            values = ','.join(f'{field}={float(value)!r}' for field, value in fields.items())
+            lines.append(f'{_escape_key(family)}{tags} {values} {timestamp}')
+        return lines
+
+# Exporter classes by config section name
+EXPORTER_TYPES = {
+    'statsd': StatsDExporter,
+    'influx': LineProtocolExporter,
+}
+
+_exporters: Optional[List[MetricExporter]] = None
+_exporters_lock = threading.Lock()
+
+def get_exporters(exporters_config: Optional[Dict[str, Any]]) -> List[MetricExporter]:
+    """
+    Get the process-wide push exporters for an ``exporters`` config section.
+
+    Args:
+        exporters_config: Dict of exporter name to options with
+            ``enabled``; used only on creation
+
+    Returns:
+        Started exporters (empty if none is enabled)
+    """
+    global _exporters
+    if _exporters is None:
+        with _exporters_lock:
+            if _exporters is None:
+                exporters = []
+                for section, options in (exporters_config or {}).items():
+                    if not isinstance(options, dict) or not options.get('enabled'):
+                        continue
+                    exporter_type = EXPORTER_TYPES.get(options.get('type', section))
+                    if exporter_type is None:
+                        logger.error(f"Unknown exporter type for exporters.{section}")
+                        continue
+                    kwargs = {
+                        key: value for key, value in options.items()
+                        if key not in ('enabled', 'type')
+                    }
+                    try:
+                        exporter = exporter_type(**kwargs)
+                    except Exception as e:
+                        logger.error(f"Failed to create exporter {section}: {str(e)}")
+                        continue
+                    exporter.start()
+                    exporters.append(exporter)
+                _exporters = exporters
+    return _exporters
+
+def active_exporters() -> List[MetricExporter]:
+    """Get the shared exporters if they have been created."""
+    return _exporters or []
+
+def _close_exporters() -> None:
+    """Final push at exit, after the metrics still in flight are recorded."""
+    if not _exporters:
+        return
+    from .sinks import flush_pending
+    flush_pending()
+    for exporter in _exporters:
+        try:
+            exporter.stop()
+        except Exception as e:
+            logger.error(f"Failed to stop exporter {exporter.name}: {str(e)}")
+
+def _after_fork_in_child() -> None:
+    global _exporters_lock
+    _exporters_lock = threading.Lock()
+    for exporter in _exporters or ():
+        exporter._after_fork()
+
+atexit.register(_close_exporters)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
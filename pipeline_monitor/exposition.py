@@ -0,0 +1,189 @@
+"""
+Cached Prometheus exposition for the /metrics endpoint.
+
+Rendering the text format costs far more than collecting the samples it
+is made of. ``ExpositionCache`` collects every family on each scrape but
+keeps the rendered text of each one and only re-renders the families
+whose samples changed since the previous scrape. The body is then the
+concatenation of the cached chunks; when no chunk changed the previous
+body, and its gzip encoding, are reused as they are.
+
+Some families change on every scrape: the scrape's own metrics
+(``pipeline_monitor_scrape_*``) and the process CPU time with the
+overhead ratio derived from it. They are rendered on their own after
+the cached body; gzipped responses append them as a second gzip member,
+which clients decode as one stream.
+
+One cache is kept per negotiated format (Prometheus text or OpenMetrics),
+so scrapers asking for different formats do not evict each other.
+"""
+
+import gzip
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from prometheus_client.exposition import choose_encoder, gzip_accepted
+
+from .prometheus_metrics import SCRAPE_CPU_SECONDS, SCRAPE_DURATION, SCRAPE_FAMILIES
+
+# Trailer of an OpenMetrics document; rendered once, not per family
+_OPENMETRICS_EOF = b'# EOF\n'
+
+# Families that change on every scrape, kept out of the cached body
+_VOLATILE_FAMILIES = frozenset(
+    [
+        family.name
+        for metric in (SCRAPE_DURATION, SCRAPE_CPU_SECONDS, SCRAPE_FAMILIES)
+        for family in metric.describe()
+    ] + ['pipeline_monitor_process_cpu_seconds', 'pipeline_monitor_overhead_ratio']
+)
+
+class _Family:
+    """Wraps one metric family so an encoder renders it on its own."""
+
+    __slots__ = ('family',)
+
+    def __init__(self, family: Any):
+        self.family = family
+
+    def collect(self):
+        return [self.family]
+
+class _FormatCache:
+    """Rendered chunks and the last body of one exposition format."""
+
+    def __init__(self, encoder, openmetrics: bool):
+        self.encoder = encoder
+        self.openmetrics = openmetrics
+        self.chunks: Dict[str, Tuple[List[Any], bytes]] = {}
+        self.body: Optional[bytes] = None
+        self.gzipped: Optional[bytes] = None
+
+class ExpositionCache:
+    """
+    Render a registry for scrapes, re-rendering only changed families.
+
+    Args:
+        registry: Collector or registry to expose
+        compresslevel: gzip level for compressed responses
+    """
+
+    def __init__(self, registry: Any, compresslevel: int = 6):
+        self.registry = registry
+        self.compresslevel = compresslevel
+        self._formats: Dict[str, _FormatCache] = {}
+        self._lock = threading.Lock()
+
+    def render(
+        self,
+        accept: Optional[str] = None,
+        accept_encoding: Optional[str] = None
+    ) -> Tuple[bytes, Dict[str, str]]:
+        """
+        Render the registry for one scrape.
+
+        Args:
+            accept: Accept header of the request
+            accept_encoding: Accept-Encoding header of the request
+
+        Returns:
+            Tuple of (body, response headers)
+        """
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+
+        encoder, content_type = choose_encoder(accept or '')
+        headers = {'Content-Type': content_type}
+        # Concurrent scrapes (e.g. several Prometheus replicas) wait for one
+        # render instead of all repeating it
+        with self._lock:
+            cache = self._formats.get(content_type)
+            if cache is None:
+                cache = _FormatCache(encoder, content_type.startswith('application/openmetrics-text'))
+                self._formats[content_type] = cache
+            body, volatile = self._render(cache)
+            if gzip_accepted(accept_encoding or ''):
+                if cache.gzipped is None:
+                    cache.gzipped = gzip.compress(body, compresslevel=self.compresslevel)
+                body = cache.gzipped + gzip.compress(volatile, compresslevel=self.compresslevel)
+                headers['Content-Encoding'] = 'gzip'
+            else:
+                body += volatile
+
+        SCRAPE_CPU_SECONDS.inc(time.thread_time() - cpu_started)
+        SCRAPE_DURATION.observe(time.perf_counter() - started)
+        return body, headers
+
+    def _render(self, cache: _FormatCache) -> Tuple[bytes, bytes]:
+        """
+        Update the cached chunks of one format.
+
+        Returns:
+            Tuple of (cached body, text of the volatile families), to be
+            sent in that order
+        """
+        chunks = {}
+        volatile = []
+        rendered = reused = 0
+        for family in self.registry.collect():
+            if family.name in _VOLATILE_FAMILIES:
+                volatile.append(self._text(cache, family))
+                continue
+            cached = cache.chunks.get(family.name)
+            if cached is not None and cached[0] == family.samples:
+                chunks[family.name] = cached
+                reused += 1
+                continue
+            chunks[family.name] = (family.samples, self._text(cache, family))
+            rendered += 1
+
+        if rendered:
+            SCRAPE_FAMILIES.labels(result='rendered').inc(rendered)
+        if reused:
+            SCRAPE_FAMILIES.labels(result='reused').inc(reused)
+
+        # Families that disappeared (e.g. unregistered collectors) also
+        # change the body
+        if rendered or cache.body is None or len(chunks) != len(cache.chunks):
+            cache.body = b''.join(text for _, text in chunks.values())
+            cache.gzipped = None
+        cache.chunks = chunks
+        if cache.openmetrics:
+            volatile.append(_OPENMETRICS_EOF)
+        return cache.body, b''.join(volatile)
+
+    @staticmethod
+    def _text(cache: _FormatCache, family: Any) -> bytes:
+        """Render one family, without an OpenMetrics trailer."""
+        text = cache.encoder(_Family(family))
+        if cache.openmetrics and text.endswith(_OPENMETRICS_EOF):
+            text = text[:-len(_OPENMETRICS_EOF)]
+        return text
+
+    def clear(self) -> None:
+        """Drop all rendered text, e.g. after registering new collectors."""
+        with self._lock:
+            self._formats.clear()
+
+_caches: Dict[int, ExpositionCache] = {}
+_caches_lock = threading.Lock()
+
+def get_exposition_cache(registry: Any) -> ExpositionCache:
+    """
+    Get the shared exposition cache of a registry.
+
+    Args:
+        registry: Registry served on /metrics
+
+    Returns:
+        ExpositionCache instance, created on first use
+    """
+    cache = _caches.get(id(registry))
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(id(registry))
+            if cache is None:
+                cache = ExpositionCache(registry)
+                _caches[id(registry)] = cache
+    return cache
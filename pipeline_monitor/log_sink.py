@@ -0,0 +1,122 @@
+"""
+Background log writer used by ``setup_logging(async_sink=True)``.
+
+Records are handed to a bounded queue and formatted and written by a
+background thread in batches, so slow stdout or disk I/O never stalls a
+pipeline thread. Kept apart from ``logging_utils`` so that importing the
+formatter does not load ``logging.handlers``.
+"""
+
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, RotatingFileHandler
+from typing import List, Optional
+
+class _SinkQueueHandler(QueueHandler):
+    """Queue records as they are; drop them instead of blocking when full."""
+
+    def __init__(self, log_queue: queue.Queue, sink: 'AsyncLogSink'):
+        super().__init__(log_queue)
+        self.sink = sink
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting is left to the sink thread; the queue is in-process,
+        # so the record does not need to be made picklable
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.sink.dropped += 1
+
+class AsyncLogSink:
+    """
+    Background writer for log records.
+
+    ``handler`` is a ``QueueHandler`` to attach to loggers; records are
+    formatted and written by the sink's thread in batches of up to
+    ``batch_size``, with one flush per batch and handler. When the queue
+    is full, records are dropped and counted in ``dropped``.
+
+    Args:
+        handlers: Handlers the records are written to
+        queue_size: Maximum number of queued records
+        batch_size: Maximum number of records written per flush
+    """
+
+    def __init__(
+        self,
+        handlers: List[logging.Handler],
+        queue_size: int = 10000,
+        batch_size: int = 256
+    ):
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.queue: queue.Queue = queue.Queue(queue_size)
+        self.handler = _SinkQueueHandler(self.queue, self)
+        self._sentinel = object()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the writer thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name='pipeline-monitor-log-sink', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Write the queued records and stop the writer thread."""
+        if self._thread is None:
+            return
+        self.queue.put(self._sentinel)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = self._sentinel in batch
+            if stop:
+                batch = [record for record in batch if record is not self._sentinel]
+            if batch:
+                for handler in self.handlers:
+                    self._write(handler, batch)
+            if stop:
+                return
+
+    def _write(self, handler: logging.Handler, batch: List[logging.LogRecord]) -> None:
+        """Write a batch to one handler, flushing once."""
+        stream = getattr(handler, 'stream', None)
+        if stream is None:
+            # Not a stream handler: fall back to per-record handling
+            for record in batch:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+            return
+
+        with handler.lock:
+            for record in batch:
+                if record.levelno < handler.level or not handler.filter(record):
+                    continue
+                try:
+                    stream.write(handler.format(record) + handler.terminator)
+                except Exception:
+                    handler.handleError(record)
+            try:
+                handler.flush()
+                if isinstance(handler, RotatingFileHandler) and handler.maxBytes:
+                    # Checked per batch, so a file may exceed maxBytes by
+                    # up to one batch
+                    if handler.stream.tell() >= handler.maxBytes:
+                        handler.doRollover()
+            except Exception:
+                handler.handleError(batch[-1])
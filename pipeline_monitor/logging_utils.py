@@ -1,39 +1,148 @@
-"""Logging utilities for Pipeline Monitor."""
+"""
+Logging utilities for Pipeline Monitor.
 
-import logging
+Metrics are logged as structured records: ``StructuredMessage`` carries
+the fields, and ``JSONFormatter`` merges them into the JSON line, so a
+metrics record is serialized exactly once, and not at all if the level
+is disabled. orjson is used for serialization when it is installed.
+
+With ``async_sink=True`` records are written by ``log_sink.AsyncLogSink``
+in a background thread, so slow stdout or disk I/O never stalls a
+pipeline thread.
+"""
+
+import atexit
 import json
+import logging
 import sys
-from typing import Optional
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from .self_monitoring import timed
+
+if TYPE_CHECKING:
+    from .log_sink import AsyncLogSink
+
+# orjson module, or False if it is not installed; imported on first use
+_orjson: Any = None
+
+def _load_orjson() -> Any:
+    global _orjson
+    try:
+        import orjson
+        _orjson = orjson
+    except ImportError:  # optional dependency
+        _orjson = False
+    return _orjson
+
+def dumps(obj: Any) -> str:
+    """
+    Serialize a log record to JSON, with orjson when available.
+
+    Args:
+        obj: JSON-compatible object; other values are converted with ``str``
+
+    Returns:
+        JSON string
+    """
+    orjson = _orjson if _orjson is not None else _load_orjson()
+    if orjson:
+        try:
+            return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            # e.g. integers wider than 64 bits
+            pass
+    return json.dumps(obj, default=str)
+
+class StructuredMessage:
+    """
+    Log message carrying structured fields.
+
+    ``JSONFormatter`` merges ``props`` into the record's JSON; plain text
+    formatters render ``message`` followed by ``props`` as JSON.
+
+    Args:
+        message: Human-readable message (may be empty)
+        props: Fields added to the log record
+    """
+
+    __slots__ = ('message', 'props')
+
+    def __init__(self, message: str, props: Dict[str, Any]):
+        self.message = message
+        self.props = props
+
+    def __str__(self) -> str:
+        if not self.message:
+            return dumps(self.props)
+        return f"{self.message} {dumps(self.props)}"
 
 class JSONFormatter(logging.Formatter):
     """
     Custom formatter to output logs in JSON format.
     """
-    
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # Formatted timestamp of the last second seen, see formatTime
+        self._time_cache = (None, '')
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        """Format the record time, reusing the formatted seconds within a second."""
+        if datefmt or self.datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        cached_second, formatted = self._time_cache
+        if second != cached_second:
+            formatted = time.strftime(self.default_time_format, self.converter(record.created))
+            self._time_cache = (second, formatted)
+        return self.default_msec_format % (formatted, record.msecs)
+
+    @timed('log_format')
     def format(self, record):
         """
         Format the log record as a JSON string.
-        
+
         Args:
             record: Log record to format
-        
+
         Returns:
             JSON string representation of the log record
         """
+        msg = record.msg
+        structured = isinstance(msg, StructuredMessage) and not record.args
         log_data = {
             'timestamp': self.formatTime(record),
             'level': record.levelname,
-            'message': record.getMessage(),
+            'message': msg.message if structured else record.getMessage(),
             'logger_name': record.name
         }
-        
+
         if hasattr(record, 'props'):
             log_data.update(record.props)
-        
+        if structured:
+            # Fields such as a metrics 'timestamp' don't replace the record's
+            record_fields = dict(log_data)
+            log_data.update(msg.props)
+            log_data.update(record_fields)
+
         if record.exc_info:
             log_data['exception'] = self.formatException(record.exc_info)
-            
-        return json.dumps(log_data)
+
+        return dumps(log_data)
+
+_sink: Optional['AsyncLogSink'] = None
+
+def get_log_sink() -> Optional['AsyncLogSink']:
+    """Get the async sink installed by ``setup_logging``, if any."""
+    return _sink
+
+def _stop_sink() -> None:
+    global _sink
+    if _sink is not None:
+        _sink.stop()
+        _sink = None
+
+atexit.register(_stop_sink)
 
 def setup_logging(level=logging.INFO):
     """Set up logging configuration."""
@@ -46,22 +155,38 @@ def setup_logging(level=logging.INFO):
 def setup_logging(
     level: int = logging.INFO,
     log_file: Optional[str] = None,
-    json_format: bool = True
+    json_format: bool = True,
+    async_sink: bool = False,
+    max_bytes: int = 0,
+    backup_count: int = 5,
+    queue_size: int = 10000,
+    batch_size: int = 256,
+    **kwargs: Any
 ) -> None:
     """
     Setup logging configuration with optional JSON formatting and file output.
-    
+
     Args:
         level: Logging level (default: INFO)
         log_file: Optional file path for log output
         json_format: Whether to use JSON formatting (default: True)
+        async_sink: Format and write records in a background thread, in
+            batches, instead of in the logging thread
+        max_bytes: Rotate ``log_file`` when it reaches this size (0: never)
+        backup_count: Number of rotated files kept
+        queue_size: Records queued for the async sink before new ones
+            are dropped
+        batch_size: Maximum records the async sink writes per flush
+        **kwargs: Other keys of the ``logging`` config section are ignored
     """
+    _stop_sink()
+
     root_logger = logging.getLogger()
     root_logger.setLevel(level)
-    
+
     # Clear existing handlers
     root_logger.handlers = []
-    
+
     # Create console handler
     console_handler = logging.StreamHandler(sys.stdout)
     if json_format:
@@ -71,10 +196,26 @@ def setup_logging(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         )
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
-    
+    handlers = [console_handler]
+
     # Create file handler if specified
     if log_file:
-        file_handler = logging.FileHandler(log_file)
+        if max_bytes:
+            from logging.handlers import RotatingFileHandler
+            file_handler = RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count
+            )
+        else:
+            file_handler = logging.FileHandler(log_file)
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    if async_sink:
+        from .log_sink import AsyncLogSink
+        global _sink
+        _sink = AsyncLogSink(handlers, queue_size=queue_size, batch_size=batch_size)
+        _sink.start()
+        root_logger.addHandler(_sink.handler)
+    else:
+        for handler in handlers:
+            root_logger.addHandler(handler)
@@ -1,14 +1,64 @@
 """
 Prometheus metrics integration for pipeline monitoring.
+
+Label cardinality: every pipeline name gets a ``PipelineSeries`` holding
+its bound label children, so updates skip the ``.labels()`` lookup. At
+most ``max_pipelines`` names are exported; past that, names unused for
+``stale_after`` seconds are evicted least recently used first, and new
+names that find no stale one to replace share an overflow label.
+
+Nested calls: timing uses a per-thread, per-task stack of spans kept in
+a ``contextvars`` variable. ``pipeline_duration_seconds`` is inclusive of
+nested tracked calls; ``pipeline_self_duration_seconds`` excludes them.
+The tracer keeps its spans on the same stack (``attach_trace``).
+
+Durations: ``pipeline_duration_seconds``, ``pipeline_call_duration_seconds``
+and the aggregator's histogram buckets reach 2 h by default and can be
+set per pipeline (``prometheus.pipeline_buckets``). Every pipeline also
+keeps a DDSketch of its durations, fed per call or by the aggregator's
+flush, exposed as ``pipeline_duration_quantile_seconds`` with
+p50/p90/p99/p999 by default.
+
+Multi-process mode: when ``PROMETHEUS_MULTIPROC_DIR`` is set before this
+package is imported, every process (including ``multiprocessing`` and
+``ProcessPoolExecutor`` workers) writes its metrics to per-PID
+memory-mapped files in that directory, and ``get_scrape_registry`` merges
+them at scrape time. The directory must exist and should be emptied
+before the parent process starts. Collectors computed in memory
+(duration quantiles, monitoring overhead, aggregated calls) have no
+per-PID file: the scrape registry exposes those of the serving process
+only, with a ``pid`` label; other processes' are not exported.
+
+Batch jobs: jobs that may exit before a scrape can push this registry to
+a Pushgateway or remote-write endpoint instead (``prometheus.push``, see
+``push.RegistryPusher``).
 """
 from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry
-from typing import Dict, Any
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from typing import Dict, Any, List, Optional
+import contextvars
+import os
 import threading
 import time
+from .config import DEFAULT_CONFIG_PATH, get_alert_hook
+from .sketch import DDSketch, DEFAULT_QUANTILES
+from .self_monitoring import overhead_meter
 
 # Create a custom registry for our metrics
 REGISTRY = CollectorRegistry()
 
+# Directory of per-PID metric files, if multi-process mode is enabled
+MULTIPROC_DIR: Optional[str] = (
+    os.environ.get('PROMETHEUS_MULTIPROC_DIR') or os.environ.get('prometheus_multiproc_dir')
+)
+
+# Pipeline duration buckets, from sub-second steps to two-hour batch jobs
+DURATION_BUCKETS = (
+    .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+    120.0, 300.0, 600.0, 1200.0, 1800.0, 3600.0, 5400.0, 7200.0, float('inf')
+)
+
 # Define metrics
 PIPELINE_RUNS = Counter(
     'pipeline_runs_total',
@@ -21,68 +71,661 @@ PIPELINE_DURATION = Histogram(
     'pipeline_duration_seconds',
     'Pipeline execution duration in seconds',
     ['pipeline_name'],
-    registry=REGISTRY
+    registry=REGISTRY,
+    buckets=DURATION_BUCKETS
+)
+
+PIPELINE_SELF_DURATION = Histogram(
+    'pipeline_self_duration_seconds',
+    'Pipeline execution duration excluding nested tracked calls, in seconds',
+    ['pipeline_name'],
+    registry=REGISTRY,
+    buckets=DURATION_BUCKETS
 )
 
 MEMORY_USAGE = Gauge(
     'pipeline_memory_usage_bytes',
     'Current memory usage in bytes',
     ['pipeline_name'],
+    registry=REGISTRY,
+    multiprocess_mode='all'  # One series per worker PID
+)
+
+PIPELINE_CALLS = Counter(
+    'pipeline_calls_total',
+    'Total number of calls to tracked functions, sampled or not',
+    ['pipeline_name'],
     registry=REGISTRY
 )
 
+PIPELINE_CALL_DURATION = Histogram(
+    'pipeline_call_duration_seconds',
+    'Duration of every call to a tracked function, sampled or not',
+    ['pipeline_name'],
+    registry=REGISTRY,
+    buckets=DURATION_BUCKETS
+)
+
 ACTIVE_PIPELINES = Gauge(
     'active_pipelines',
     'Number of currently active pipelines',
+    registry=REGISTRY,
+    multiprocess_mode='livesum'
+)
+
+ALERT_QUEUE_DEPTH = Gauge(
+    'pipeline_alert_queue_depth',
+    'Number of alerts waiting in background dispatch queues',
+    registry=REGISTRY,
+    multiprocess_mode='livesum'
+)
+
+ALERT_DISPATCH_LATENCY = Histogram(
+    'pipeline_alert_dispatch_latency_seconds',
+    'Time from enqueueing an alert to its delivery by the handler',
+    registry=REGISTRY
+)
+
+ALERTS_DROPPED = Counter(
+    'pipeline_alerts_dropped_total',
+    'Number of alerts dropped because the dispatch queue was full',
+    registry=REGISTRY
+)
+
+SCRAPE_DURATION = Histogram(
+    'pipeline_monitor_scrape_duration_seconds',
+    'Time spent rendering /metrics responses',
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0),
     registry=REGISTRY
 )
 
+SCRAPE_CPU_SECONDS = Counter(
+    'pipeline_monitor_scrape_cpu_seconds',
+    'CPU time spent rendering /metrics responses',
+    registry=REGISTRY
+)
+
+SCRAPE_FAMILIES = Counter(
+    'pipeline_monitor_scrape_families',
+    'Metric families rendered or reused from the exposition cache',
+    ['result'],
+    registry=REGISTRY
+)
+
+SERIES_EVICTIONS = Counter(
+    'pipeline_monitor_series_evictions',
+    'Pipeline names whose series were removed after going stale',
+    registry=REGISTRY
+)
+
+SERIES_OVERFLOWS = Counter(
+    'pipeline_monitor_series_overflows',
+    'Pipeline series bound to the overflow label at the cardinality limit',
+    registry=REGISTRY
+)
+
+def _alert_queue_depth() -> float:
+    """Read the current alert queue depth at scrape time."""
+    from .alerts import alert_queue_depth
+    return alert_queue_depth()
+
+ALERT_QUEUE_DEPTH.set_function(_alert_queue_depth)
+
+# Collectors computed in this process's memory, not backed by metric files
+_process_collectors: List[Any] = []
+
+def register_process_collector(collector: Any) -> None:
+    """
+    Register a custom collector on REGISTRY.
+
+    In multi-process mode the scrape registry also exposes it, labelled
+    with this process's PID.
+
+    Args:
+        collector: Object with a ``collect`` method yielding families
+    """
+    REGISTRY.register(collector)
+    _process_collectors.append(collector)
+
+# Pipeline Monitor's own overhead, always on
+register_process_collector(overhead_meter)
+
+class PipelineSeries:
+    """
+    Label children of one pipeline name, resolved once.
+
+    Decorated functions keep their series; a series evicted while still
+    referenced is re-admitted on its next update.
+    """
+
+    __slots__ = (
+        '_cache', 'name', 'label', 'runs_success', 'runs_failure',
+        'duration', 'self_duration', 'sketch', 'memory', 'calls', 'call_duration', 'last_used', 'evicted'
+    )
+
+    def __init__(self, cache: 'SeriesCache', name: str):
+        self._cache = cache
+        self.name = name
+        self.last_used = time.monotonic()
+        self.evicted = False
+
+    def bind(self, label: str) -> None:
+        """Resolve the label children for ``label``."""
+        self.label = label
+        self.runs_success = PIPELINE_RUNS.labels(pipeline_name=label, status='success')
+        self.runs_failure = PIPELINE_RUNS.labels(pipeline_name=label, status='failure')
+        self.duration = self._cache.duration_child(label)
+        self.self_duration = self._cache.duration_child(label, PIPELINE_SELF_DURATION)
+        self.sketch = self._cache.sketch(label)
+        self.memory = MEMORY_USAGE.labels(pipeline_name=label)
+        self.calls = PIPELINE_CALLS.labels(pipeline_name=label)
+        self.call_duration = self._cache.duration_child(label, PIPELINE_CALL_DURATION)
+
+    def unbind(self) -> None:
+        """Remove this name's series from the metrics."""
+        PIPELINE_RUNS.remove(self.label, 'success')
+        PIPELINE_RUNS.remove(self.label, 'failure')
+        PIPELINE_DURATION.remove(self.label)
+        PIPELINE_SELF_DURATION.remove(self.label)
+        MEMORY_USAGE.remove(self.label)
+        PIPELINE_CALLS.remove(self.label)
+        PIPELINE_CALL_DURATION.remove(self.label)
+        self.evicted = True
+
+    def _touch(self) -> None:
+        self.last_used = time.monotonic()
+        if self.evicted:
+            self._cache.admit(self)
+
+    def record_run(self, success: bool) -> None:
+        """Count one pipeline execution."""
+        self._touch()
+        (self.runs_success if success else self.runs_failure).inc()
+
+    def observe_duration(self, duration: float) -> None:
+        """Observe a pipeline duration in seconds."""
+        self._touch()
+        self.duration.observe(duration)
+        self.sketch.add(duration)
+
+    def observe_self_duration(self, duration: float) -> None:
+        """Observe a duration excluding nested tracked calls, in seconds."""
+        self._touch()
+        self.self_duration.observe(duration)
+
+    def set_memory(self, memory_bytes: float) -> None:
+        """Set the memory usage gauge."""
+        self._touch()
+        self.memory.set(memory_bytes)
+
+    def count_call(self, duration: float) -> None:
+        """Count one call, sampled or not, and observe its duration."""
+        self._touch()
+        self.calls.inc()
+        self.call_duration.observe(duration)
+
+class SeriesCache:
+    """
+    Bounded map from pipeline name to its PipelineSeries.
+
+    Lookups of known names take no lock. Admitting a name at the limit
+    evicts the least recently used name idle for ``stale_after``
+    seconds, or else binds the new name to ``overflow_label``. Overflowed
+    names are remembered, so they are counted in
+    ``pipeline_monitor_series_overflows`` once and later lookups take no
+    lock either. The cache
+    also owns the duration sketch of every exported name and is
+    registered on REGISTRY to expose their quantiles.
+
+    Args:
+        max_pipelines: Maximum number of distinct pipeline names exported
+        stale_after: Seconds without updates before a name may be evicted
+        overflow_label: pipeline_name label shared by names over the limit
+        duration_buckets: pipeline_duration_seconds buckets of pipelines
+            without their own (default: DURATION_BUCKETS)
+        pipeline_buckets: Buckets per pipeline name
+        sketch: DDSketch settings (``relative_accuracy``, ``max_bins``)
+            and the exposed ``quantiles``
+    """
+
+    def __init__(
+        self,
+        max_pipelines: int = 1000,
+        stale_after: float = 3600.0,
+        overflow_label: str = '_overflow',
+        duration_buckets: Optional[List[float]] = None,
+        pipeline_buckets: Optional[Dict[str, List[float]]] = None,
+        sketch: Optional[Dict[str, Any]] = None
+    ):
+        self.max_pipelines = max_pipelines
+        self.stale_after = stale_after
+        self.overflow_label = overflow_label
+        self.duration_buckets = sorted(duration_buckets) if duration_buckets else None
+        self.pipeline_buckets = {
+            name: sorted(buckets) for name, buckets in (pipeline_buckets or {}).items()
+        }
+        sketch = sketch or {}
+        self.relative_accuracy = sketch.get('relative_accuracy', 0.01)
+        self.max_bins = sketch.get('max_bins', 2048)
+        self.quantiles = tuple(sketch.get('quantiles', DEFAULT_QUANTILES))
+        self._sketches: Dict[str, DDSketch] = {}
+        self._series: Dict[str, PipelineSeries] = {}
+        # Names bound to the overflow label; they stay there
+        self._overflowed: Dict[str, PipelineSeries] = {}
+        self._lock = threading.Lock()
+        self._overflow: Optional[PipelineSeries] = None
+        # Earliest time an eviction scan can find a stale name
+        self._next_scan = float('-inf')
+
+    def series(self, name: str) -> PipelineSeries:
+        """
+        Get the series of a pipeline name, admitting it if needed.
+
+        Args:
+            name: Pipeline name
+
+        Returns:
+            The name's own series, or the overflow series at the limit
+        """
+        series = self._series.get(name)
+        if series is None:
+            if name in self._overflowed:
+                return self._overflow
+            series = PipelineSeries(self, name)
+            self.admit(series)
+            if series.label != name:
+                return self._overflow
+        return series
+
+    def admit(self, series: PipelineSeries) -> None:
+        """Bind a new or evicted series to its name or the overflow label."""
+        with self._lock:
+            existing = self._series.get(series.name)
+            if existing is not None and existing is not series:
+                # Another thread admitted the name first; share its children
+                series.bind(existing.label)
+                series.evicted = False
+                return
+            overflowed = self._overflowed.get(series.name)
+            if overflowed is not None or (
+                len(self._series) >= self.max_pipelines and not self._evict_stale()
+            ):
+                if self._overflow is None:
+                    self._overflow = PipelineSeries(self, self.overflow_label)
+                    self._overflow.bind(self.overflow_label)
+                series.bind(self.overflow_label)
+                series.evicted = False
+                if overflowed is None:
+                    self._overflowed[series.name] = series
+                    SERIES_OVERFLOWS.inc()
+                return
+            series.bind(series.name)
+            series.evicted = False
+            self._series[series.name] = series
+
+    def _evict_stale(self) -> bool:
+        """Evict the least recently used stale name; called with the lock held."""
+        now = time.monotonic()
+        if MULTIPROC_DIR or now < self._next_scan or not self._series:
+            return False
+        oldest = min(self._series.values(), key=lambda s: s.last_used)
+        if now - oldest.last_used < self.stale_after:
+            self._next_scan = oldest.last_used + self.stale_after
+            return False
+        del self._series[oldest.name]
+        self._sketches.pop(oldest.label, None)
+        oldest.unbind()
+        SERIES_EVICTIONS.inc()
+        return True
+
+    def duration_child(self, label: str, metric: Histogram = PIPELINE_DURATION) -> Histogram:
+        """
+        Get the child of a label in a pipeline duration histogram.
+
+        prometheus_client gives every child the parent's buckets, so
+        children with configured buckets are constructed here and placed
+        among the parent's children, where collection and removal find
+        them like any other.
+        """
+        buckets = self.pipeline_buckets.get(label, self.duration_buckets)
+        if buckets is None:
+            return metric.labels(pipeline_name=label)
+        with metric._lock:
+            child = metric._metrics.get((label,))
+            if child is None:
+                child = Histogram(
+                    metric._name,
+                    metric._documentation,
+                    ['pipeline_name'],
+                    registry=None,
+                    _labelvalues=(label,),
+                    buckets=buckets
+                )
+                metric._metrics[(label,)] = child
+            return child
+
+    def sketch(self, label: str) -> DDSketch:
+        """Get the duration sketch of a label, creating it if needed."""
+        sketch = self._sketches.get(label)
+        if sketch is None:
+            sketch = self._sketches.setdefault(
+                label, DDSketch(self.relative_accuracy, self.max_bins)
+            )
+        return sketch
+
+    def duration_quantiles(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the sketched duration quantiles of every pipeline.
+
+        Returns:
+            Dict of pipeline name to its ``count`` and ``quantiles``
+            (quantile as string -> seconds)
+        """
+        summary = {}
+        for label, sketch in list(self._sketches.items()):
+            if not sketch.count:
+                continue
+            summary[label] = {
+                'count': sketch.count,
+                'quantiles': {str(q): value for q, value in sketch.quantiles(self.quantiles)}
+            }
+        return summary
+
+    def collect(self):
+        """Expose the sketched quantiles as a gauge family."""
+        family = GaugeMetricFamily(
+            'pipeline_duration_quantile_seconds',
+            'Pipeline duration quantiles estimated by a DDSketch',
+            labels=['pipeline_name', 'quantile']
+        )
+        for label, sketch in list(self._sketches.items()):
+            for q, value in sketch.quantiles(self.quantiles):
+                if value is not None:
+                    family.add_metric([label, str(q)], value)
+        yield family
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+_series_cache: Optional[SeriesCache] = None
+_series_cache_lock = threading.Lock()
+
+def get_series_cache(prometheus_config: Optional[Dict[str, Any]] = None) -> SeriesCache:
+    """
+    Get the process-wide series cache, creating it on first use.
+
+    Args:
+        prometheus_config: The ``prometheus`` configuration section, used
+            only on creation (``max_pipelines``, ``stale_after``,
+            ``overflow_label``, ``duration_buckets``, ``pipeline_buckets``,
+            ``sketch``)
+
+    Returns:
+        Shared SeriesCache instance
+    """
+    global _series_cache
+    if _series_cache is None:
+        with _series_cache_lock:
+            if _series_cache is None:
+                config = prometheus_config or {}
+                cache = SeriesCache(
+                    max_pipelines=config.get('max_pipelines', 1000),
+                    stale_after=config.get('stale_after', 3600.0),
+                    overflow_label=config.get('overflow_label', '_overflow'),
+                    duration_buckets=config.get('duration_buckets'),
+                    pipeline_buckets=config.get('pipeline_buckets'),
+                    sketch=config.get('sketch')
+                )
+                register_process_collector(cache)
+                _series_cache = cache
+    return _series_cache
+
+def get_pipeline_series(pipeline_name: str) -> PipelineSeries:
+    """Get the bound series of a pipeline name."""
+    return get_series_cache().series(pipeline_name)
+
 # Thread-local storage for timing
-_local = threading.local()
+class _Span:
+    """One running timed pipeline call or traced block."""
+
+    __slots__ = ('name', 'start', 'child_time', 'timed', 'trace')
+
+    def __init__(self, name: Optional[str], timed: bool = True):
+        self.name = name
+        self.start = time.perf_counter()
+        self.child_time = 0.0
+        # False for blocks that are only traced; timing skips them
+        self.timed = timed
+        # tracing.Span of the call or block, if it is traced
+        self.trace: Any = None
+
+# Stack of running spans; tuples are immutable, so a task or thread that
+# inherits the stack pushes onto its own copy
+_spans: contextvars.ContextVar = contextvars.ContextVar('pipeline_spans', default=())
 
-def start_pipeline_timing() -> None:
-    """Start timing a pipeline execution."""
-    _local.start_time = time.time()
+def _timed_index(stack: tuple, end: int) -> int:
+    """Index of the innermost timed span in ``stack[:end]``, or -1."""
+    for i in range(end - 1, -1, -1):
+        if stack[i].timed:
+            return i
+    return -1
 
-def stop_pipeline_timing(pipeline_name: str) -> None:
-    """Stop timing a pipeline execution and record the duration."""
-    if hasattr(_local, 'start_time'):
-        duration = time.time() - _local.start_time
-        PIPELINE_DURATION.labels(pipeline_name=pipeline_name).observe(duration)
-        del _local.start_time
+def start_pipeline_timing(pipeline_name: Optional[str] = None) -> None:
+    """
+    Start timing a pipeline execution, nested in any running one.
+
+    Args:
+        pipeline_name: Name of the pipeline; when given, only a stop for
+            the same name ends this span
+    """
+    _spans.set(_spans.get() + (_Span(pipeline_name),))
+
+def stop_pipeline_timing(pipeline_name: str, record: bool = True) -> Optional[float]:
+    """
+    Stop timing a pipeline execution and record the duration.
+
+    The inclusive duration is observed in pipeline_duration_seconds and
+    the duration minus nested tracked calls in
+    pipeline_self_duration_seconds. Concurrent child tasks can add up to
+    more than the parent's duration, so self time is clamped at zero.
+
+    Args:
+        pipeline_name: Name of the pipeline
+        record: Whether to observe the duration; False only ends the span
+
+    Returns:
+        Inclusive duration in seconds, or None if no matching span runs
+    """
+    stack = _spans.get()
+    index = _timed_index(stack, len(stack))
+    if index < 0 or stack[index].name not in (None, pipeline_name):
+        return None
+    span = stack[index]
+    _spans.set(stack[:index] + stack[index + 1:])
+    duration = time.perf_counter() - span.start
+    parent = _timed_index(stack, index)
+    if parent >= 0:
+        stack[parent].child_time += duration
+    if record:
+        series = get_pipeline_series(pipeline_name)
+        series.observe_duration(duration)
+        series.observe_self_duration(max(0.0, duration - span.child_time))
+    return duration
+
+def add_nested_time(duration: float) -> None:
+    """
+    Count a tracked call that was not timed as a span (e.g. unsampled)
+    as nested time of the running span, if any.
+    """
+    stack = _spans.get()
+    index = _timed_index(stack, len(stack))
+    if index >= 0:
+        stack[index].child_time += duration
+
+def current_trace() -> Any:
+    """Get the trace span of the innermost traced call or block, if any."""
+    for span in reversed(_spans.get()):
+        if span.trace is not None:
+            return span.trace
+    return None
+
+def attach_trace(trace: Any, pipeline_name: Optional[str] = None) -> _Span:
+    """
+    Put a trace span on the span stack, making it the current one.
+
+    Args:
+        trace: tracing.Span to attach
+        pipeline_name: Name of the tracked call the trace belongs to; it
+            is attached to the call's timed span, started just before.
+            Otherwise (blocks) a span that is traced only is pushed.
+
+    Returns:
+        The stack entry; pass it to ``detach_trace``
+    """
+    stack = _spans.get()
+    if pipeline_name is not None and stack:
+        span = stack[-1]
+        if span.timed and span.trace is None and span.name in (None, pipeline_name):
+            span.trace = trace
+            return span
+    span = _Span(None, timed=False)
+    span.trace = trace
+    _spans.set(stack + (span,))
+    return span
+
+def detach_trace(span: _Span) -> None:
+    """Remove a trace span attached with ``attach_trace``."""
+    span.trace = None
+    if span.timed:
+        return
+    stack = _spans.get()
+    if stack and stack[-1] is span:
+        _spans.set(stack[:-1])
+    elif any(entry is span for entry in stack):
+        _spans.set(tuple(entry for entry in stack if entry is not span))
+    # Otherwise it ended in another context than it started (e.g. a block
+    # entered and exited in different tasks)
+
+def record_pipeline_duration(pipeline_name: str, duration: float) -> None:
+    """Record a pipeline duration measured by the caller."""
+    get_pipeline_series(pipeline_name).observe_duration(duration)
 
 def record_pipeline_run(pipeline_name: str, success: bool) -> None:
     """Record a pipeline execution."""
-    PIPELINE_RUNS.labels(
-        pipeline_name=pipeline_name, 
-        status='success' if success else 'failure'
-    ).inc()
+    get_pipeline_series(pipeline_name).record_run(success)
 
 def update_memory_usage(pipeline_name: str, memory_bytes: float) -> None:
     """Update memory usage metrics."""
-    MEMORY_USAGE.labels(pipeline_name=pipeline_name).set(memory_bytes)
+    get_pipeline_series(pipeline_name).set_memory(memory_bytes)
 
     # Send SMS alert if memory usage exceeds threshold
-    from .alerts import sms_alert_handler
-    from .config import Configuration
-
-    config = Configuration.from_file("examples/config.json")
-    sms_cfg = config.get('alerts', {}).get('sms', {})
-    if sms_cfg:
-        handler = sms_alert_handler(
-            provider_url=sms_cfg['provider_url'],
-            api_key=sms_cfg['api_key'],
-            sender_number=sms_cfg['sender_number'],
-            recipient_numbers=sms_cfg['recipient_numbers']
-        )
+    alert_hook = get_alert_hook(DEFAULT_CONFIG_PATH, 'sms')
+    if alert_hook is not None:
         alert_msg = (
             f"Memory usage ({memory_bytes / 1024 / 1024:.2f}MB) "
             f"exceeded threshold"
         )
-        handler(alert_msg, {
+        alert_hook.alert(alert_msg, {
             'memory_usage_bytes': memory_bytes
         })
 
 def update_active_pipelines(count: int) -> None:
     """Update the number of active pipelines."""
     ACTIVE_PIPELINES.set(count)
+
+class _CachedMultiProcessCollector:
+    """
+    Merge per-PID metric files, reusing the result for ``ttl`` seconds.
+
+    Reading the files costs time proportional to the number of worker
+    files; caching bounds that cost when several scrapers poll at once.
+    """
+
+    def __init__(self, path: str, ttl: float = 1.0):
+        self.path = path
+        self.ttl = ttl
+        self._collector = multiprocess.MultiProcessCollector(None, path=path)
+        self._lock = threading.Lock()
+        self._families: List[Any] = []
+        self._collected_at = float('-inf')
+
+    def collect(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._collected_at >= self.ttl:
+                self._families = list(self._collector.collect())
+                self._collected_at = now
+            return list(self._families)
+
+class _ProcessCollector:
+    """Expose this process's custom collectors with a ``pid`` label."""
+
+    def collect(self):
+        pid = str(os.getpid())
+        for collector in list(_process_collectors):
+            # Custom collectors build new families on every collect
+            for family in collector.collect():
+                family.samples = [
+                    sample._replace(labels={**sample.labels, 'pid': pid})
+                    for sample in family.samples
+                ]
+                yield family
+
+_scrape_registry: Optional[CollectorRegistry] = None
+_scrape_registry_lock = threading.Lock()
+
+def get_scrape_registry(ttl: float = 1.0) -> CollectorRegistry:
+    """
+    Get the registry to expose on /metrics.
+
+    Args:
+        ttl: Seconds to reuse merged per-PID files in multi-process mode
+
+    Returns:
+        A registry merging all worker processes' metric files, plus this
+        process's custom collectors, in multi-process mode; otherwise
+        REGISTRY
+    """
+    global _scrape_registry
+    if not MULTIPROC_DIR:
+        return REGISTRY
+    if _scrape_registry is None:
+        with _scrape_registry_lock:
+            if _scrape_registry is None:
+                registry = CollectorRegistry()
+                registry.register(_CachedMultiProcessCollector(MULTIPROC_DIR, ttl))
+                registry.register(_ProcessCollector())
+                _scrape_registry = registry
+    return _scrape_registry
+
+def mark_worker_dead(pid: int) -> None:
+    """
+    Drop live gauges of an exited worker process.
+
+    Call from the parent when a pool worker exits (e.g. gunicorn's
+    ``child_exit`` hook). Counters and histograms of the worker are kept.
+
+    Args:
+        pid: Process ID of the exited worker
+    """
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid, MULTIPROC_DIR)
+
+def worker_memory_usage() -> List[Dict[str, Any]]:
+    """
+    Get the last reported RSS of every worker process per pipeline.
+
+    Returns:
+        List of dicts with ``pid``, ``pipeline_name`` and ``memory_bytes``
+    """
+    usage = []
+    for family in get_scrape_registry().collect():
+        if family.name != 'pipeline_memory_usage_bytes':
+            continue
+        for sample in family.samples:
+            usage.append({
+                'pid': int(sample.labels.get('pid', os.getpid())),
+                'pipeline_name': sample.labels.get('pipeline_name'),
+                'memory_bytes': sample.value
+            })
+    return usage
@@ -0,0 +1,402 @@
+"""
+Batch-job mode: push the Prometheus registry instead of waiting for scrapes.
+
+Batch pipelines often exit before Prometheus scrapes /metrics, so their
+runs and durations never leave the process. ``RegistryPusher`` sends the
+whole registry on an interval and once more at interpreter exit, either
+to a Pushgateway (text format, PUT to ``/metrics/job/<job>/...``) or to
+a Prometheus remote-write endpoint (snappy-compressed protobuf
+``WriteRequest``).
+
+Pushes run in a background thread over one persistent HTTP connection.
+A failed push is retried with exponential backoff in that thread, so the
+job never waits on the network; since every push carries the full
+registry, a newer push simply supersedes a failed one. The exit push
+retries until ``exit_timeout`` runs out. A forked child opens its own
+connection and starts its own push thread.
+
+Configured in ``prometheus.push``. Remote-write payloads are compressed
+with python-snappy or cramjam when installed; without them the payload
+is written as uncompressed snappy literals, which receivers decode the
+same way.
+"""
+
+import atexit
+import logging
+import os
+import random
+import socket
+import struct
+import threading
+import time
+from base64 import urlsafe_b64encode
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+from urllib.parse import quote, urlparse
+from .self_monitoring import overhead_meter
+
+if TYPE_CHECKING:
+    import http.client
+
+logger = logging.getLogger(__name__)
+
+class PushError(Exception):
+    """A push was rejected or could not be sent."""
+
+    def __init__(self, message: str, retry: bool = True):
+        super().__init__(message)
+        self.retry = retry
+
+# Protocol buffers encoding of prometheus.WriteRequest
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def _field(number: int, data: bytes) -> bytes:
+    """Length-delimited field (wire type 2)."""
+    return _varint(number << 3 | 2) + _varint(len(data)) + data
+
+def _label(name: str, value: str) -> bytes:
+    return _field(1, name.encode()) + _field(2, value.encode())
+
+def _sample(value: float, timestamp_ms: int) -> bytes:
+    # double value = 1 (fixed64), int64 timestamp = 2 (varint)
+    return b'\x09' + struct.pack('<d', value) + b'\x10' + _varint(timestamp_ms)
+
+def encode_write_request(registry: Any, extra_labels: Dict[str, str]) -> bytes:
+    """
+    Encode a registry as a remote-write ``WriteRequest``.
+
+    Args:
+        registry: Collector or registry to encode
+        extra_labels: Labels added to every series (e.g. job, instance)
+
+    Returns:
+        Uncompressed protobuf payload
+    """
+    now_ms = int(time.time() * 1000)
+    series = []
+    for family in registry.collect():
+        for sample in family.samples:
+            if sample.name.endswith('_created'):
+                continue  # creation timestamps are not series
+            labels = dict(extra_labels)
+            labels.update(sample.labels)
+            labels['__name__'] = sample.name
+            timestamp_ms = int(sample.timestamp * 1000) if sample.timestamp is not None else now_ms
+            series.append(_field(1,
+                b''.join(_field(1, _label(name, labels[name])) for name in sorted(labels))
+                + _field(2, _sample(float(sample.value), timestamp_ms))
+            ))
+    return b''.join(series)
+
+def _snappy_literals(data: bytes) -> bytes:
+    """Snappy block format made of literals only (valid, not compressed)."""
+    out = bytearray(_varint(len(data)))
+    for start in range(0, len(data), 65536):
+        chunk = data[start:start + 65536]
+        length = len(chunk) - 1
+        if length < 60:
+            out.append(length << 2)
+        elif length < 256:
+            out += bytes((60 << 2, length))
+        else:
+            out.append(61 << 2)
+            out += struct.pack('<H', length)
+        out += chunk
+    return bytes(out)
+
+def _load_snappy() -> Callable[[bytes], bytes]:
+    try:
+        import snappy  # python-snappy, optional
+        return snappy.compress
+    except ImportError:
+        pass
+    try:
+        import cramjam  # optional
+        return lambda data: bytes(cramjam.snappy.compress_raw(data))
+    except ImportError:
+        return _snappy_literals
+
+def _grouping_path(job: str, grouping_key: Dict[str, str]) -> str:
+    """Pushgateway URL path of a job and grouping key."""
+    parts = [('job', job)] + sorted(grouping_key.items())
+    path = ''
+    for name, value in parts:
+        if not value or '/' in value:
+            # base64 form for values the path cannot carry
+            path += f'/{name}@base64/{urlsafe_b64encode(value.encode()).decode() or "="}'
+        else:
+            path += f'/{name}/{quote(value, safe="")}'
+    return '/metrics' + path
+
+class RegistryPusher:
+    """
+    Push a registry to a Pushgateway or remote-write endpoint.
+
+    Args:
+        url: Pushgateway base URL, or the remote-write URL
+        mode: 'pushgateway' or 'remote_write'
+        job: Job label / Pushgateway job name
+        grouping_key: Extra grouping labels; 'instance' defaults to the
+            host name, so concurrent containers do not overwrite each other
+        interval: Seconds between pushes; 0 pushes only at exit
+        timeout: Seconds per HTTP request
+        backoff: First retry delay in seconds, doubled per attempt
+        max_backoff: Longest retry delay in seconds
+        max_retries: Retries per push before giving up until the next one
+        exit_timeout: Seconds the exit push may take, retries included
+        headers: Extra HTTP headers, e.g. Authorization
+        registry: Registry to push (default: the registry /metrics serves)
+    """
+
+    def __init__(
+        self,
+        url: str = 'http://127.0.0.1:9091',
+        mode: str = 'pushgateway',
+        job: str = 'pipeline_monitor',
+        grouping_key: Optional[Dict[str, str]] = None,
+        interval: float = 15.0,
+        timeout: float = 5.0,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        max_retries: int = 5,
+        exit_timeout: float = 5.0,
+        headers: Optional[Dict[str, str]] = None,
+        registry: Any = None
+    ):
+        if mode not in ('pushgateway', 'remote_write'):
+            raise ValueError(f"Unknown push mode: {mode} (expected 'pushgateway' or 'remote_write')")
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https'):
+            raise ValueError(f"Push URL must be http(s): {url}")
+        if registry is None:
+            from .prometheus_metrics import get_scrape_registry
+            registry = get_scrape_registry()
+        self.registry = registry
+        self.mode = mode
+        self.interval = interval
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retries = max_retries
+        self.exit_timeout = exit_timeout
+
+        self.grouping_key = {'instance': socket.gethostname()}
+        self.grouping_key.update(grouping_key or {})
+        self._scheme = parsed.scheme
+        self._netloc = parsed.netloc
+        self._headers = dict(headers or {})
+        if mode == 'pushgateway':
+            self._method = 'PUT'  # replace the whole group
+            self._path = parsed.path.rstrip('/') + _grouping_path(job, self.grouping_key)
+            self._headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            self._method = 'POST'
+            self._path = (parsed.path or '/') + (f'?{parsed.query}' if parsed.query else '')
+            self._labels = dict(self.grouping_key, job=job)
+            self._compress = _load_snappy()
+            self._headers.update({
+                'Content-Type': 'application/x-protobuf',
+                'Content-Encoding': 'snappy',
+                'X-Prometheus-Remote-Write-Version': '0.1.0'
+            })
+
+        self.pushes = 0
+        self.failures = 0  # pushes given up after retries
+        self.retries = 0
+        self.connections = 0
+        self.last_success: Optional[float] = None
+        self._conn: Optional['http.client.HTTPConnection'] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._push_once = overhead_meter.timed('push')(self._send)
+
+    def _payload(self) -> bytes:
+        if self.mode == 'pushgateway':
+            from prometheus_client.exposition import generate_latest
+            return generate_latest(self.registry)
+        return self._compress(encode_write_request(self.registry, self._labels))
+
+    def _connection(self) -> 'http.client.HTTPConnection':
+        if self._conn is None:
+            import http.client
+            conn_type = http.client.HTTPSConnection if self._scheme == 'https' else http.client.HTTPConnection
+            self._conn = conn_type(self._netloc, timeout=self.timeout)
+            self.connections += 1
+        return self._conn
+
+    def _send(self) -> None:
+        """One push attempt over the kept-alive connection."""
+        import http.client  # loads the email package; only when pushing
+        body = self._payload()
+        conn = self._connection()
+        try:
+            conn.request(self._method, self._path, body=body, headers=self._headers)
+            response = conn.getresponse()
+            response.read()  # drain, so the connection can be reused
+        except (OSError, http.client.HTTPException) as e:
+            self._close_connection()
+            raise PushError(f"{type(e).__name__}: {e}")
+        if response.will_close:
+            self._close_connection()
+        if response.status >= 400:
+            # Client errors other than rate limiting will fail again
+            retry = response.status >= 500 or response.status == 429
+            raise PushError(f"HTTP {response.status} {response.reason}", retry=retry)
+
+    def _close_connection(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _delay(self, attempt: int) -> float:
+        """Backoff before retry ``attempt`` (1-based), with jitter."""
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def push(self, deadline: Optional[float] = None) -> bool:
+        """
+        Push the registry, retrying with backoff on failure.
+
+        Args:
+            deadline: ``time.monotonic()`` value after which no retry is
+                started; retries are otherwise bounded by ``max_retries``
+                and stop early when the pusher is stopped
+
+        Returns:
+            Whether the push succeeded
+        """
+        with self._lock:
+            attempt = 0
+            while True:
+                try:
+                    self._push_once()
+                except PushError as e:
+                    attempt += 1
+                    delay = self._delay(attempt)
+                    give_up = (
+                        not e.retry
+                        or (deadline is None and (attempt > self.max_retries or self._stop.is_set()))
+                        or (deadline is not None and time.monotonic() + delay > deadline)
+                    )
+                    if give_up:
+                        self.failures += 1
+                        logger.error(f"Failed to push metrics to {self._netloc}: {str(e)}")
+                        return False
+                    self.retries += 1
+                    if deadline is None:
+                        if self._stop.wait(delay):
+                            self.failures += 1
+                            return False
+                    else:
+                        time.sleep(delay)
+                    continue
+                except Exception as e:
+                    self.failures += 1
+                    logger.error(f"Failed to push metrics to {self._netloc}: {str(e)}")
+                    return False
+                self.pushes += 1
+                self.last_success = time.time()
+                return True
+
+    def start(self) -> None:
+        """Start pushing every ``interval`` seconds."""
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='pipeline-monitor-push', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> bool:
+        """
+        Stop the push thread and push a last time.
+
+        Returns:
+            Whether the last push succeeded
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            return self.push(deadline=time.monotonic() + self.exit_timeout)
+        finally:
+            self._close_connection()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.push()
+
+    def _after_fork(self) -> None:
+        """Drop the parent's connection and restart pushing in a forked child."""
+        self._conn = None  # the parent keeps using it
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        if self._thread is not None:
+            self._thread = None
+            self.start()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pushes, failures, retries and connections opened so far."""
+        return {
+            'pushes': self.pushes,
+            'failures': self.failures,
+            'retries': self.retries,
+            'connections': self.connections,
+            'last_success': self.last_success
+        }
+
+_pusher: Optional[RegistryPusher] = None
+_pusher_created = False
+_pusher_lock = threading.Lock()
+
+def get_registry_pusher(push_config: Optional[Dict[str, Any]]) -> Optional[RegistryPusher]:
+    """
+    Get the process-wide registry pusher.
+
+    Args:
+        push_config: ``prometheus.push`` config section, used only on
+            creation
+
+    Returns:
+        Started RegistryPusher, or None if pushing is not enabled
+    """
+    global _pusher, _pusher_created
+    if not _pusher_created:
+        with _pusher_lock:
+            if not _pusher_created:
+                if push_config and push_config.get('enabled'):
+                    kwargs = {key: value for key, value in push_config.items() if key != 'enabled'}
+                    try:
+                        _pusher = RegistryPusher(**kwargs)
+                        _pusher.start()
+                    except Exception as e:
+                        logger.error(f"Failed to create registry pusher: {str(e)}")
+                _pusher_created = True
+    return _pusher
+
+def active_pusher() -> Optional[RegistryPusher]:
+    """Get the shared pusher if it has been created."""
+    return _pusher
+
+def _close_pusher() -> None:
+    """Exit push, after the metrics still in flight are recorded."""
+    if _pusher is None:
+        return
+    from .sinks import flush_pending
+    flush_pending()
+    _pusher.stop()
+
+def _after_fork_in_child() -> None:
+    global _pusher_lock
+    _pusher_lock = threading.Lock()
+    if _pusher is not None:
+        _pusher._after_fork()
+
+atexit.register(_close_pusher)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
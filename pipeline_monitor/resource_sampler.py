@@ -0,0 +1,194 @@
+"""Background sampling of process resources during a monitored block."""
+
+import logging
+import threading
+import time
+from array import array
+from typing import Callable, Dict, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# Sampled fields, stored as one array per field
+FIELDS = ('timestamp', 'rss_mb', 'cpu_percent', 'read_bytes', 'write_bytes', 'num_threads')
+
+class RingBuffer:
+    """
+    Fixed-capacity buffer of samples stored column-wise in ``array('d')``.
+
+    Once full, new samples overwrite the oldest ones.
+    """
+
+    def __init__(self, capacity: int, fields=FIELDS):
+        """
+        Args:
+            capacity: Maximum number of samples kept
+            fields: Names of the sampled fields
+        """
+        if capacity < 1:
+            raise ValueError(f"Ring buffer capacity must be at least 1: {capacity}")
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self._columns = {field: array('d', [0.0]) * capacity for field in self.fields}
+        self._next = 0
+        self.count = 0
+
+    def append(self, *values: float) -> None:
+        """Append one sample with a value per field, in field order."""
+        i = self._next
+        for field, value in zip(self.fields, values):
+            self._columns[field][i] = value
+        self._next = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def values(self, field: str) -> array:
+        """Return the stored values of one field, oldest first."""
+        column = self._columns[field]
+        if self.count < self.capacity:
+            return column[:self.count]
+        return column[self._next:] + column[:self._next]
+
+    def stats(self, field: str) -> Dict[str, float]:
+        """
+        Summarize one field.
+
+        Returns:
+            Dict with ``peak``, ``mean`` and ``p95`` (empty if no samples)
+        """
+        values = self.values(field)
+        if not values:
+            return {}
+        ordered = sorted(values)
+        return {
+            'peak': ordered[-1],
+            'mean': sum(ordered) / len(ordered),
+            'p95': ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+        }
+
+class ResourceSampler:
+    """
+    Thread that samples RSS, CPU, IO counters and thread count at an interval.
+
+    Optionally calls ``on_threshold`` once, from the sampler thread, as
+    soon as RSS grows more than ``threshold_mb`` above the first sample.
+    """
+
+    def __init__(
+        self,
+        process: psutil.Process,
+        interval: float = 0.1,
+        capacity: int = 1024,
+        threshold_mb: Optional[float] = None,
+        on_threshold: Optional[Callable[[float, float], None]] = None
+    ):
+        """
+        Args:
+            process: Process to sample
+            interval: Seconds between samples
+            capacity: Number of samples kept in the ring buffer
+            threshold_mb: RSS growth in MB that triggers ``on_threshold``
+            on_threshold: Callable receiving (memory_used_mb, rss_mb)
+        """
+        self.process = process
+        self.interval = interval
+        self.buffer = RingBuffer(capacity)
+        self.threshold_mb = threshold_mb
+        self.on_threshold = on_threshold
+        self.threshold_crossed = False
+        self.start_rss_mb = 0.0
+        self.peak_rss_mb = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._has_io = hasattr(process, 'io_counters')
+        self._io_start = (0.0, 0.0)
+        self._io_last = (0.0, 0.0)
+
+    def start(self) -> None:
+        """Take the first sample and start the sampler thread."""
+        self.process.cpu_percent(None)  # Prime CPU accounting
+        self.start_rss_mb = self.process.memory_info().rss / 1024 / 1024
+        self.peak_rss_mb = self.start_rss_mb
+        self.sample()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="pipeline-monitor-sampler",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the sampler thread after a final sample."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.sample()
+
+    def sample(self) -> None:
+        """Record one sample and check the memory threshold."""
+        with self.process.oneshot():
+            rss_mb = self.process.memory_info().rss / 1024 / 1024
+            cpu = self.process.cpu_percent(None)
+            threads = self.process.num_threads()
+            read_bytes = write_bytes = 0
+            if self._has_io:
+                try:
+                    io = self.process.io_counters()
+                    read_bytes, write_bytes = io.read_bytes, io.write_bytes
+                except (psutil.Error, OSError):
+                    self._has_io = False
+
+        if not len(self.buffer):
+            self._io_start = (read_bytes, write_bytes)
+        self._io_last = (read_bytes, write_bytes)
+        self.buffer.append(time.time(), rss_mb, cpu, read_bytes, write_bytes, threads)
+        if rss_mb > self.peak_rss_mb:
+            self.peak_rss_mb = rss_mb
+
+        used_mb = rss_mb - self.start_rss_mb
+        if (self.threshold_mb and not self.threshold_crossed
+                and used_mb > self.threshold_mb and self.on_threshold is not None):
+            self.threshold_crossed = True
+            try:
+                self.on_threshold(used_mb, rss_mb)
+            except Exception as e:
+                logger.error(f"Error in threshold callback: {str(e)}")
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize the samples of the block.
+
+        Returns:
+            Peak/mean/p95 of RSS, CPU percent and thread count (over the
+            samples kept in the buffer), and the IO bytes read and written
+            between the first and last sample
+        """
+        rss = self.buffer.stats('rss_mb')
+        if rss:
+            rss['peak'] = self.peak_rss_mb
+        summary = {
+            'samples': {'count': float(len(self.buffer))},
+            'rss_mb': rss,
+            'cpu_percent': self.buffer.stats('cpu_percent'),
+            'num_threads': self.buffer.stats('num_threads')
+        }
+        if self._has_io:
+            summary['io_bytes'] = {
+                'read': self._io_last[0] - self._io_start[0],
+                'write': self._io_last[1] - self._io_start[1]
+            }
+        return summary
+
+    def _run(self) -> None:
+        """Sampler loop."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except psutil.Error as e:
+                logger.error(f"Failed to sample resources: {str(e)}")
+                return
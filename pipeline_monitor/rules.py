@@ -0,0 +1,538 @@
+"""
+Alert rules evaluated over streaming windows per pipeline.
+
+Every tracked call is an observation of its pipeline's rules: duration,
+success and, for sampled calls, memory used. A rule compares a statistic
+with a threshold:
+
+- ``value``: each call on its own (the ``time_threshold`` and
+  ``memory_threshold`` settings are rules of this kind)
+- ``mean``: mean over the window
+- ``pNN`` (e.g. ``p95``, ``p99.9``): percentile over the window
+- ``error_rate``: failed calls over calls in the window
+- ``rate_of_change``: relative change of the mean between the window
+  and the window before it, e.g. 0.5 for 50% slower
+
+Windows are rings of ``slots`` time slices holding counts and sums, and
+keep running totals, so an observation costs O(1) whatever the call
+rate. Percentiles are compared without storing durations: the pNN
+exceeds a threshold exactly when more than (100 - NN)% of the calls in
+the window exceed it, so a window only counts calls beyond the firing
+and clearing thresholds.
+
+A rule fires after ``for`` consecutive breaching observations, and only
+once the window holds ``min_count`` calls. It resolves only when the
+statistic is back past ``clear`` (hysteresis; defaults to the
+threshold). While firing nothing more is sent. A rule that fires again
+within ``cooldown`` seconds of its last notification is held back, and
+notified (with the number of firings held back) once the cooldown has
+passed if it is still firing by then.
+
+Rules are listed in ``alerts.rules``::
+
+    {"name": "slow_p95", "stat": "p95", "metric": "duration",
+     "threshold": 2.0, "clear": 1.5, "window": 300, "pipelines": ["load_*"]}
+"""
+
+import fnmatch
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Running totals: calls, beyond the threshold, beyond the clear level,
+# failures, sum of values
+_COUNT, _FIRE, _CLEAR, _ERRORS, _SUM = range(5)
+
+STATS = ('value', 'mean', 'error_rate', 'rate_of_change')  # and 'pNN'
+METRICS = ('duration', 'memory')
+UNITS = {'duration': 's', 'memory': 'MB', 'errors': ''}
+
+class RuleAlert(NamedTuple):
+    """A rule that started firing ('firing') or stopped ('resolved')."""
+    message: str
+    context: Dict[str, Any]
+
+class Rule:
+    """
+    One alert rule, validated from its configuration.
+
+    Args:
+        name: Rule name, used in alerts
+        threshold: Level of the statistic that fires the rule
+        stat: 'value', 'mean', 'pNN', 'error_rate' or 'rate_of_change'
+        metric: 'duration' (seconds) or 'memory' (MB); ignored by
+            'error_rate'
+        op: '>' fires above the threshold, '<' below it
+        clear: Level the statistic must get back past to resolve
+            (default: the threshold)
+        window: Window length in seconds
+        slots: Time slices per window; the window advances one slice
+            at a time
+        min_count: Calls the window must hold before the rule is
+            evaluated (not used by 'value')
+        consecutive: Breaching observations needed to fire ('for' in
+            the configuration)
+        cooldown: Minimum seconds between two notifications of the rule
+            for one pipeline
+        notify_resolved: Whether to notify when the rule resolves
+        pipelines: fnmatch patterns of the pipelines the rule applies to
+        severity: Passed on in the alert context
+    """
+
+    def __init__(
+        self,
+        name: str,
+        threshold: float,
+        stat: str = 'value',
+        metric: str = 'duration',
+        op: str = '>',
+        clear: Optional[float] = None,
+        window: float = 300.0,
+        slots: int = 10,
+        min_count: int = 20,
+        consecutive: int = 1,
+        cooldown: float = 300.0,
+        notify_resolved: bool = True,
+        pipelines: Optional[List[str]] = None,
+        severity: str = 'warning'
+    ):
+        quantile = None
+        if stat.startswith('p') and stat not in STATS:
+            try:
+                quantile = float(stat[1:]) / 100
+            except ValueError:
+                quantile = None
+            if quantile is None or not 0 < quantile < 1:
+                raise ValueError(f"Rule {name}: invalid percentile {stat!r} (e.g. 'p95', 'p99.9')")
+        elif stat not in STATS:
+            raise ValueError(f"Rule {name}: unknown stat {stat!r}")
+        if metric not in METRICS:
+            raise ValueError(f"Rule {name}: unknown metric {metric!r} (expected 'duration' or 'memory')")
+        if op not in ('>', '<'):
+            raise ValueError(f"Rule {name}: op must be '>' or '<'")
+        clear = threshold if clear is None else clear
+        if (op == '>' and clear > threshold) or (op == '<' and clear < threshold):
+            raise ValueError(f"Rule {name}: clear level {clear} is past the threshold {threshold}")
+        if window <= 0 or slots < 1:
+            raise ValueError(f"Rule {name}: window and slots must be positive")
+
+        self.name = name
+        self.threshold = threshold
+        self.stat = stat
+        self.metric = 'errors' if stat == 'error_rate' else metric
+        self.op = op
+        self.clear = clear
+        self.window = window
+        self.slots = slots
+        self.min_count = max(1, min_count) if stat != 'value' else 1
+        self.consecutive = max(1, consecutive)
+        self.cooldown = cooldown
+        self.notify_resolved = notify_resolved
+        self.pipelines = list(pipelines or ['*'])
+        self.severity = severity
+        self.quantile = quantile
+        # Share of the window that must be beyond a level for the
+        # percentile to be beyond it
+        if quantile is not None:
+            self.tail = 1 - quantile if op == '>' else quantile
+
+    @classmethod
+    def from_config(cls, options: Dict[str, Any]) -> 'Rule':
+        """Build a rule from one entry of ``alerts.rules``."""
+        options = dict(options)
+        if 'for' in options:
+            options['consecutive'] = options.pop('for')
+        options.setdefault('name', f"{options.get('stat', 'value')}_{options.get('metric', 'duration')}")
+        return cls(**options)
+
+    def applies_to(self, pipeline: str) -> bool:
+        return any(fnmatch.fnmatchcase(pipeline, pattern) for pattern in self.pipelines)
+
+    def beyond(self, value: float, level: float) -> bool:
+        return value > level if self.op == '>' else value < level
+
+    def describe(self) -> str:
+        """Short description of the condition, e.g. 'p95 duration over 300s > 2s'."""
+        level = self.level(self.threshold)
+        if self.stat == 'value':
+            return f"{self.metric} {self.op} {level}"
+        what = 'error rate' if self.stat == 'error_rate' else f"{self.stat.replace('_', ' ')} {self.metric}"
+        return f"{what} over {self.window:g}s {self.op} {level}"
+
+    def level(self, value: float) -> str:
+        """Format a threshold, or a statistic compared with one."""
+        if self.stat in ('error_rate', 'rate_of_change'):
+            return f"{value:.1%}"
+        return f"{value:.4g}{UNITS[self.metric]}"
+
+class _Window:
+    """
+    Ring of time slices with running totals of the last two windows.
+
+    The previous window is only used by 'rate_of_change' but costs the
+    same to keep.
+    """
+
+    __slots__ = ('slot_seconds', 'slots', 'ring', 'epochs', 'epoch', 'recent', 'previous')
+
+    def __init__(self, window: float, slots: int, now: float):
+        self.slot_seconds = window / slots
+        self.slots = slots
+        self.ring = [[0.0] * 5 for _ in range(2 * slots)]
+        self.epochs = [-1] * (2 * slots)
+        self.epoch = int(now // self.slot_seconds)
+        self.recent = [0.0] * 5
+        self.previous = [0.0] * 5
+
+    def advance(self, epoch: int) -> None:
+        """Move to slice ``epoch``, expiring slices that left the windows."""
+        if epoch <= self.epoch:
+            return
+        if epoch - self.epoch >= 2 * self.slots:
+            # Idle for two windows: everything expired
+            for i in range(2 * self.slots):
+                self.epochs[i] = -1
+            self.recent = [0.0] * 5
+            self.previous = [0.0] * 5
+            self.epoch = epoch
+            return
+        ring, epochs, slots = self.ring, self.epochs, self.slots
+        recent, previous = self.recent, self.previous
+        while self.epoch < epoch:
+            self.epoch += 1
+            leaving = (self.epoch - slots) % (2 * slots)
+            if epochs[leaving] == self.epoch - slots:
+                totals = ring[leaving]
+                for i in range(5):
+                    recent[i] -= totals[i]
+                    previous[i] += totals[i]
+            expired = self.epoch % (2 * slots)
+            if epochs[expired] == self.epoch - 2 * slots:
+                totals = ring[expired]
+                for i in range(5):
+                    previous[i] -= totals[i]
+            epochs[expired] = -1
+
+    def add(self, value: float, fire: bool, clear: bool, error: bool) -> None:
+        index = self.epoch % (2 * self.slots)
+        totals = self.ring[index]
+        if self.epochs[index] != self.epoch:
+            self.epochs[index] = self.epoch
+            totals[:] = (0.0, 0.0, 0.0, 0.0, 0.0)
+        recent = self.recent
+        totals[_COUNT] += 1
+        recent[_COUNT] += 1
+        totals[_SUM] += value
+        recent[_SUM] += value
+        if fire:
+            totals[_FIRE] += 1
+            recent[_FIRE] += 1
+        if clear:
+            totals[_CLEAR] += 1
+            recent[_CLEAR] += 1
+        if error:
+            totals[_ERRORS] += 1
+            recent[_ERRORS] += 1
+
+class _RuleState:
+    """Window, firing state and notification times of a rule for one pipeline."""
+
+    __slots__ = (
+        'rule', 'pipeline', 'window', 'above', 'threshold', 'clear',
+        'firing', 'breaches', 'notified', 'last_notified', 'suppressed'
+    )
+
+    def __init__(self, rule: Rule, pipeline: str):
+        self.rule = rule
+        self.pipeline = pipeline
+        self.window = _Window(rule.window, rule.slots, time.monotonic()) if rule.stat != 'value' else None
+        # Copied from the rule for the per-observation comparisons
+        self.above = rule.op == '>'
+        self.threshold = rule.threshold
+        self.clear = rule.clear
+        self.firing = False
+        self.breaches = 0
+        self.notified = False  # whether the current firing was notified
+        self.last_notified: Optional[float] = None
+        self.suppressed = 0
+
+    def evaluate(self) -> tuple:
+        """
+        Current statistic of the window.
+
+        Returns:
+            Tuple of (statistic for display, breaching, cleared), or None
+            if the window holds fewer than ``min_count`` calls
+        """
+        rule = self.rule
+        recent = self.window.recent
+        count = recent[_COUNT]
+        if count < rule.min_count:
+            return None
+        if rule.quantile is not None:
+            share = recent[_FIRE] / count
+            return share, share > rule.tail, recent[_CLEAR] / count <= rule.tail
+        if rule.stat == 'mean':
+            stat = recent[_SUM] / count
+        elif rule.stat == 'error_rate':
+            stat = recent[_ERRORS] / count
+        else:  # rate_of_change
+            previous = self.window.previous
+            if previous[_COUNT] < rule.min_count or not previous[_SUM]:
+                return None
+            before = previous[_SUM] / previous[_COUNT]
+            stat = (recent[_SUM] / count - before) / abs(before)
+        return stat, rule.beyond(stat, rule.threshold), not rule.beyond(stat, rule.clear)
+
+    def observe(self, value: float, error: bool, now: Optional[float], details: Any = None) -> Optional[RuleAlert]:
+        """
+        Add one observation; return an alert if the rule fired or resolved.
+
+        ``now`` is ``time.monotonic()``, or None for 'value' rules, which
+        only need the time when they fire.
+        """
+        rule = self.rule
+        if self.above:
+            fire, clear = value > self.threshold, value > self.clear
+        else:
+            fire, clear = value < self.threshold, value < self.clear
+        window = self.window
+        if window is None:
+            stat, breaching, cleared = value, fire, not clear
+        else:
+            epoch = int(now // window.slot_seconds)
+            if epoch != window.epoch:
+                window.advance(epoch)
+            window.add(value, fire, clear, error)
+            result = self.evaluate()
+            if result is None:
+                # Too few calls to judge; neither fire nor resolve
+                self.breaches = 0
+                return None
+            stat, breaching, cleared = result
+
+        if not self.firing:
+            if not breaching:
+                self.breaches = 0
+                return None
+            self.breaches += 1
+            if self.breaches < rule.consecutive:
+                return None
+            self.firing = True
+            if now is None:
+                now = time.monotonic()
+            if self.last_notified is not None and now - self.last_notified < rule.cooldown:
+                self.notified = False
+                self.suppressed += 1
+                return None
+            self.notified = True
+            self.last_notified = now
+            return self._alert('firing', stat, details)
+
+        if not cleared:
+            if self.notified:
+                return None
+            # Fired within the cooldown: notify once it has passed
+            if now is None:
+                now = time.monotonic()
+            if now - self.last_notified < rule.cooldown:
+                return None
+            self.notified = True
+            self.last_notified = now
+            return self._alert('firing', stat, details)
+        self.firing = False
+        self.breaches = 0
+        if self.notified and rule.notify_resolved:
+            return self._alert('resolved', stat, details)
+        return None
+
+    def _alert(self, state: str, stat: float, details: Any) -> RuleAlert:
+        rule = self.rule
+        if rule.quantile is not None:
+            level = rule.threshold if state == 'firing' else rule.clear
+            shown = f"{stat:.1%} of calls beyond {rule.level(level)}"
+        else:
+            shown = rule.level(stat)
+        if state == 'firing':
+            message = f"Rule {rule.name} firing for {self.pipeline}: {rule.describe()} ({shown})"
+        else:
+            message = f"Rule {rule.name} resolved for {self.pipeline}: back past {rule.level(rule.clear)} ({shown})"
+        context = {
+            'function_name': self.pipeline,
+            'rule': rule.name,
+            'state': state,
+            'stat': rule.stat,
+            'metric': rule.metric,
+            'value': stat,
+            'threshold': rule.threshold,
+            'clear': rule.clear,
+            'severity': rule.severity,
+            'suppressed': self.suppressed
+        }
+        if rule.stat != 'value':
+            context['window'] = rule.window
+            context['count'] = int(self.window.recent[_COUNT])
+        if details is not None:
+            context['metrics'] = details
+        self.suppressed = 0
+        return RuleAlert(message, context)
+
+class PipelineRules:
+    """
+    The rules of one pipeline.
+
+    Args:
+        pipeline: Pipeline name
+        rules: Rules that apply to the pipeline
+        notify: Called with each RuleAlert, outside the lock
+    """
+
+    def __init__(self, pipeline: str, rules: List[Rule], notify: Callable[[RuleAlert], None]):
+        self.pipeline = pipeline
+        self.notify = notify
+        self.states = [_RuleState(rule, pipeline) for rule in rules]
+        # 'value' rules are checked without the lock while they neither
+        # breach nor fire, which is the common case
+        self._value_duration = self._select('duration', windowed=False)
+        self._value_memory = self._select('memory', windowed=False)
+        self._duration = self._select('duration', windowed=True)
+        self._memory = self._select('memory', windowed=True)
+        self._errors = self._select('errors', windowed=True)
+        self._windowed = bool(self._duration or self._memory or self._errors)
+        self._lock = threading.Lock()
+
+    def _select(self, metric: str, windowed: bool) -> List[_RuleState]:
+        return [
+            state for state in self.states
+            if state.rule.metric == metric and (state.window is not None) == windowed
+        ]
+
+    def observe(
+        self,
+        duration: float,
+        success: bool = True,
+        memory_mb: Optional[float] = None,
+        details: Any = None
+    ) -> None:
+        """
+        Evaluate the rules on one finished call.
+
+        Args:
+            duration: Call duration in seconds
+            success: Whether the call succeeded
+            memory_mb: Memory used by the call, if measured
+            details: Record of the call, passed on as 'metrics' in the
+                context of alerts it triggers
+        """
+        error = not success
+        pending = None
+        for state in self._value_duration:
+            if state.firing or (duration > state.threshold if state.above else duration < state.threshold):
+                pending = (pending or []) + [(state, duration)]
+            elif state.breaches:
+                state.breaches = 0
+        if memory_mb is not None:
+            for state in self._value_memory:
+                if state.firing or (memory_mb > state.threshold if state.above else memory_mb < state.threshold):
+                    pending = (pending or []) + [(state, memory_mb)]
+                elif state.breaches:
+                    state.breaches = 0
+        if not self._windowed and pending is None:
+            return
+
+        alerts = None
+        with self._lock:
+            now = time.monotonic() if self._windowed else None
+            for state, value in pending or ():
+                alert = state.observe(value, error, now, details)
+                if alert is not None:
+                    alerts = (alerts or []) + [alert]
+            for state in self._duration:
+                alert = state.observe(duration, error, now, details)
+                if alert is not None:
+                    alerts = (alerts or []) + [alert]
+            for state in self._errors:
+                alert = state.observe(0.0, error, now, details)
+                if alert is not None:
+                    alerts = (alerts or []) + [alert]
+            if memory_mb is not None:
+                for state in self._memory:
+                    alert = state.observe(memory_mb, error, now, details)
+                    if alert is not None:
+                        alerts = (alerts or []) + [alert]
+        if alerts:
+            for alert in alerts:
+                try:
+                    self.notify(alert)
+                except Exception as e:
+                    logger.error(f"Failed to send alert for rule {alert.context['rule']}: {str(e)}")
+
+    def firing(self) -> List[str]:
+        """Names of the rules currently firing."""
+        return [state.rule.name for state in self.states if state.firing]
+
+class RuleEngine:
+    """
+    Alert rules of a configuration, bound to pipelines on demand.
+
+    Args:
+        rules: Rules to evaluate
+    """
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = rules
+
+    @classmethod
+    def from_config(
+        cls,
+        alert_config: Optional[Dict[str, Any]],
+        time_threshold: Optional[float] = None,
+        memory_threshold: Optional[float] = None
+    ) -> 'RuleEngine':
+        """
+        Build the rules of an ``alerts`` config section.
+
+        The time and memory thresholds become per-call 'value' rules
+        without resolve notifications; invalid rules are logged and
+        skipped.
+
+        Args:
+            alert_config: ``alerts`` config section
+            time_threshold: Per-call duration threshold in seconds
+            memory_threshold: Per-call memory threshold in MB
+
+        Returns:
+            RuleEngine instance
+        """
+        alert_config = alert_config or {}
+        cooldown = alert_config.get('cooldown', 300.0)
+        rules = []
+        if time_threshold:
+            rules.append(Rule('time_threshold', time_threshold, metric='duration',
+                              cooldown=cooldown, notify_resolved=False))
+        if memory_threshold:
+            rules.append(Rule('memory_threshold', memory_threshold, metric='memory',
+                              cooldown=cooldown, notify_resolved=False))
+        for options in alert_config.get('rules') or []:
+            try:
+                rules.append(Rule.from_config(dict({'cooldown': cooldown}, **options)))
+            except (TypeError, ValueError) as e:
+                logger.error(f"Ignoring invalid alert rule {options!r}: {str(e)}")
+        return cls(rules)
+
+    def bind(self, pipeline: str, notify: Callable[[RuleAlert], None]) -> Optional[PipelineRules]:
+        """
+        Get the rules of a pipeline.
+
+        Args:
+            pipeline: Pipeline name
+            notify: Called with each RuleAlert
+
+        Returns:
+            PipelineRules, or None if no rule applies to the pipeline
+        """
+        rules = [rule for rule in self.rules if rule.applies_to(pipeline)]
+        return PipelineRules(pipeline, rules, notify) if rules else None
@@ -0,0 +1,149 @@
+"""Sampling policies for the track_performance decorator."""
+
+import itertools
+import random
+from typing import Any, Dict, Optional, Union
+
+class SamplingPolicy:
+    """
+    Decides which calls of a decorated function take the full monitoring path.
+
+    Unsampled calls only update cheap counters; sampled calls also collect
+    memory, logging, Prometheus and dashboard metrics.
+    """
+
+    def should_sample(self) -> bool:
+        """Return True if the next call should be fully monitored."""
+        return True
+
+    def observe(self, duration_ns: int, overhead_ns: Optional[int] = None) -> None:
+        """
+        Feed back the cost of a finished call.
+
+        Args:
+            duration_ns: Execution time of the wrapped function
+            overhead_ns: Monitoring overhead of the call if it was sampled
+        """
+
+class AlwaysSample(SamplingPolicy):
+    """Monitor every call (the default)."""
+
+class ProbabilisticSampler(SamplingPolicy):
+    """Monitor each call with a fixed probability."""
+
+    def __init__(self, rate: float):
+        """
+        Args:
+            rate: Probability in [0, 1] that a call is sampled
+        """
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"Sampling rate must be between 0 and 1: {rate}")
+        self.rate = rate
+
+    def should_sample(self) -> bool:
+        return random.random() < self.rate
+
+class CountSampler(SamplingPolicy):
+    """Monitor one call in every N."""
+
+    def __init__(self, every: int):
+        """
+        Args:
+            every: Sample one call out of this many
+        """
+        if every < 1:
+            raise ValueError(f"Sampling interval must be at least 1: {every}")
+        self.every = every
+        self._counter = itertools.count()
+
+    def should_sample(self) -> bool:
+        return next(self._counter) % self.every == 0
+
+class AdaptiveSampler(SamplingPolicy):
+    """
+    Adjust the sampling rate to keep monitoring overhead within a budget.
+
+    Keeps exponentially weighted averages of the function duration (from
+    every call) and of the full-path monitoring overhead (from sampled
+    calls), and samples with the rate that keeps
+    ``rate * overhead / duration`` at ``target_overhead``.
+    """
+
+    def __init__(
+        self,
+        target_overhead: float = 0.01,
+        min_rate: float = 0.001,
+        smoothing: float = 0.05
+    ):
+        """
+        Args:
+            target_overhead: Target monitoring cost as a fraction of call time
+            min_rate: Lower bound on the sampling rate
+            smoothing: Weight of the newest value in the moving averages
+        """
+        self.target_overhead = target_overhead
+        self.min_rate = min_rate
+        self.smoothing = smoothing
+        self.rate = 1.0
+        self._avg_duration_ns = 0.0
+        self._avg_overhead_ns = 0.0
+
+    def should_sample(self) -> bool:
+        return self.rate >= 1.0 or random.random() < self.rate
+
+    def observe(self, duration_ns: int, overhead_ns: Optional[int] = None) -> None:
+        alpha = self.smoothing
+        if self._avg_duration_ns:
+            self._avg_duration_ns += alpha * (duration_ns - self._avg_duration_ns)
+        else:
+            self._avg_duration_ns = float(duration_ns)
+
+        if overhead_ns is not None:
+            if self._avg_overhead_ns:
+                self._avg_overhead_ns += alpha * (overhead_ns - self._avg_overhead_ns)
+            else:
+                self._avg_overhead_ns = float(overhead_ns)
+
+        if self._avg_overhead_ns > 0:
+            rate = self.target_overhead * self._avg_duration_ns / self._avg_overhead_ns
+            self.rate = min(1.0, max(self.min_rate, rate))
+
+SamplingSpec = Union[None, SamplingPolicy, float, int, Dict[str, Any]]
+
+def get_sampling_policy(spec: SamplingSpec) -> SamplingPolicy:
+    """
+    Build a sampling policy from a decorator argument or config section.
+
+    Args:
+        spec: None (sample every call), a SamplingPolicy, a float rate for
+            probabilistic sampling, an int N for 1-in-N sampling, or a dict
+            with ``mode`` set to 'always', 'probabilistic' (``rate``),
+            'count' (``every``) or 'adaptive' (``target_overhead``,
+            ``min_rate``)
+
+    Returns:
+        SamplingPolicy instance
+    """
+    if spec is None:
+        return AlwaysSample()
+    if isinstance(spec, SamplingPolicy):
+        return spec
+    if isinstance(spec, bool):
+        raise ValueError(f"Invalid sampling specification: {spec!r}")
+    if isinstance(spec, int):
+        return CountSampler(spec)
+    if isinstance(spec, float):
+        return ProbabilisticSampler(spec)
+    if isinstance(spec, dict):
+        options = dict(spec)
+        mode = options.pop('mode', 'always')
+        if mode == 'always':
+            return AlwaysSample()
+        if mode == 'probabilistic':
+            return ProbabilisticSampler(**options)
+        if mode == 'count':
+            return CountSampler(**options)
+        if mode == 'adaptive':
+            return AdaptiveSampler(**options)
+        raise ValueError(f"Unknown sampling mode: {mode}")
+    raise ValueError(f"Invalid sampling specification: {spec!r}")
@@ -0,0 +1,258 @@
+"""
+Self-monitoring: time spent in Pipeline Monitor's own code.
+
+Monitoring entry points (``update_monitoring_systems``,
+``send_rule_alert``, ``emit_metric``, ``AlertHook.alert``, JSON log
+formatting) are wrapped with ``timed``. The ``track_performance``
+component is the whole overhead of tracked-call wrappers: from entering
+the wrapper to calling the function, and from its return to the
+wrapper's (memory readings, span and allocation bookkeeping, metric
+records, rule evaluation, sampling and everything those call). Each
+thread accumulates call counts and seconds per component into its own
+buffers, so the measurement takes no lock. Components nest
+(``track_performance`` calls ``update_monitoring_systems``, which calls
+``emit_metric``), so per-component time is inclusive, and only the
+outermost timed call adds to the overall total.
+
+``overhead_meter`` is registered on REGISTRY and exposes:
+
+- ``pipeline_monitor_overhead_seconds_total{component}`` and
+  ``pipeline_monitor_overhead_calls_total{component}``
+- ``pipeline_monitor_overhead_total_seconds_total``, time in monitoring
+  code without double counting nested components
+- ``pipeline_monitor_process_cpu_seconds_total``; the overhead share of
+  pipeline CPU is ``rate(overhead_total) / rate(process_cpu)``
+- ``pipeline_monitor_dropped_events_total{source}`` for dashboard
+  frames and events, trace spans, async log records and sink events
+  that were dropped, and exporter and registry pushes that failed
+
+This module imports nothing from the package, nor the Prometheus client,
+at import time, so any module can use ``timed`` cheaply.
+"""
+
+import functools
+import sys
+import threading
+import time
+import weakref
+from array import array
+from typing import Any, Callable, Dict, List, Tuple
+
+# Buffer layout per component
+CALLS, SECONDS = 0, 1
+
+# Pseudo-component accumulating only outermost timed calls
+TOTAL = '_total'
+
+class OverheadMeter:
+    """Lock-free per-thread accounting of monitoring time per component."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._threads: List[Tuple["weakref.ref[threading.Thread]", Dict[str, array]]] = []
+        self._threads_lock = threading.Lock()
+        self._retired: Dict[str, array] = {}
+
+    def _thread_buffers(self) -> Dict[str, array]:
+        """Register the current thread and return its buffers."""
+        buffers: Dict[str, array] = {}
+        self._local.buffers = buffers
+        with self._threads_lock:
+            self._threads.append((weakref.ref(threading.current_thread()), buffers))
+        return buffers
+
+    def add(self, component: str, seconds: float, outermost: bool = True) -> None:
+        """
+        Record one timed call in the current thread's buffers.
+
+        Args:
+            component: Monitoring component name
+            seconds: Time spent in the call
+            outermost: Whether the call was not nested in another timed
+                call, in which case it also adds to the total
+        """
+        try:
+            buffers = self._local.buffers
+        except AttributeError:
+            buffers = self._thread_buffers()
+
+        buffer = buffers.get(component)
+        if buffer is None:
+            buffer = buffers[component] = array('d', [0.0, 0.0])
+        buffer[CALLS] += 1
+        buffer[SECONDS] += seconds
+
+        if outermost:
+            total = buffers.get(TOTAL)
+            if total is None:
+                total = buffers[TOTAL] = array('d', [0.0, 0.0])
+            total[CALLS] += 1
+            total[SECONDS] += seconds
+
+    def enter(self) -> int:
+        """
+        Mark the current thread as running monitoring code.
+
+        Timed calls made until ``leave`` count as nested, so they do not
+        add to the total a second time.
+
+        Returns:
+            The previous depth, to pass to ``leave``; the caller's own
+            time is outermost if it is 0
+        """
+        local = self._local
+        depth = getattr(local, 'depth', 0)
+        local.depth = depth + 1
+        return depth
+
+    def leave(self, depth: int) -> None:
+        """Restore the depth returned by ``enter``."""
+        self._local.depth = depth
+
+    def timed(self, component: str) -> Callable:
+        """Decorator recording the time spent in a function as ``component``."""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                local = self._local
+                depth = getattr(local, 'depth', 0)
+                local.depth = depth + 1
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    local.depth = depth
+                    self.add(component, elapsed, depth == 0)
+            return wrapper
+        return decorator
+
+    def totals(self) -> Dict[str, Tuple[float, float]]:
+        """
+        Sum all threads' buffers.
+
+        Buffers of finished threads are folded into a retired total.
+
+        Returns:
+            Dict of component to (calls, seconds); the overall total is
+            under ``TOTAL``
+        """
+        with self._threads_lock:
+            totals: Dict[str, List[float]] = {
+                component: list(buffer) for component, buffer in self._retired.items()
+            }
+            live = []
+            for ref, buffers in self._threads:
+                retired = ref() is None
+                for component, buffer in list(buffers.items()):
+                    if retired:
+                        target = self._retired.setdefault(component, array('d', [0.0, 0.0]))
+                        target[CALLS] += buffer[CALLS]
+                        target[SECONDS] += buffer[SECONDS]
+                    total = totals.setdefault(component, [0.0, 0.0])
+                    total[CALLS] += buffer[CALLS]
+                    total[SECONDS] += buffer[SECONDS]
+                if not retired:
+                    live.append((ref, buffers))
+            self._threads = live
+        return {component: (calls, seconds) for component, (calls, seconds) in totals.items()}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Summarize monitoring overhead since process start.
+
+        Returns:
+            Dict with per-component ``components`` (calls, seconds),
+            ``total_seconds``, ``process_cpu_seconds`` and ``ratio``
+        """
+        totals = self.totals()
+        total_seconds = totals.pop(TOTAL, (0.0, 0.0))[SECONDS]
+        cpu = time.process_time()
+        return {
+            'components': {
+                component: {'calls': int(calls), 'seconds': seconds}
+                for component, (calls, seconds) in totals.items()
+            },
+            'total_seconds': total_seconds,
+            'process_cpu_seconds': cpu,
+            'ratio': total_seconds / cpu if cpu else 0.0
+        }
+
+    def collect(self):
+        """Expose overhead, process CPU and dropped events on REGISTRY."""
+        from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+        totals = self.totals()
+        total = totals.pop(TOTAL, (0.0, 0.0))
+
+        seconds = CounterMetricFamily(
+            'pipeline_monitor_overhead_seconds',
+            'Time spent in Pipeline Monitor components, inclusive of nested ones',
+            labels=['component']
+        )
+        calls = CounterMetricFamily(
+            'pipeline_monitor_overhead_calls',
+            'Calls of Pipeline Monitor components',
+            labels=['component']
+        )
+        for component, (count, elapsed) in sorted(totals.items()):
+            seconds.add_metric([component], elapsed)
+            calls.add_metric([component], count)
+        yield seconds
+        yield calls
+
+        yield CounterMetricFamily(
+            'pipeline_monitor_overhead_total_seconds',
+            'Time spent in Pipeline Monitor code, nested components counted once',
+            value=total[SECONDS]
+        )
+        cpu = time.process_time()
+        yield CounterMetricFamily(
+            'pipeline_monitor_process_cpu_seconds',
+            'CPU time of the monitored process',
+            value=cpu
+        )
+        yield GaugeMetricFamily(
+            'pipeline_monitor_overhead_ratio',
+            'Monitoring time since start relative to process CPU time',
+            value=total[SECONDS] / cpu if cpu else 0.0
+        )
+
+        dropped = CounterMetricFamily(
+            'pipeline_monitor_dropped_events',
+            'Monitoring events dropped to bound memory or client backlog',
+            labels=['source']
+        )
+        # Only report components that are in use; don't import them here
+        dashboard = sys.modules.get('pipeline_monitor.dashboard.app')
+        if dashboard is not None:
+            dropped.add_metric(['dashboard_frames'], dashboard.emitter.frames_skipped)
+            dropped.add_metric(['dashboard_events'], dashboard.emitter.events_dropped)
+        tracing = sys.modules.get('pipeline_monitor.tracing')
+        tracer = tracing.active_tracer() if tracing is not None else None
+        if tracer is not None:
+            dropped.add_metric(['trace_spans'], tracer.dropped_spans)
+        sinks = sys.modules.get('pipeline_monitor.sinks')
+        bus = sinks.active_bus() if sinks is not None else None
+        if bus is not None:
+            for name, stats in bus.sinks().items():
+                dropped.add_metric([f'sink_{name}'], stats['dropped'])
+        exporters = sys.modules.get('pipeline_monitor.exporters')
+        for exporter in (exporters.active_exporters() if exporters is not None else ()):
+            dropped.add_metric([f'exporter_{exporter.name}'], exporter.transport.errors)
+        push = sys.modules.get('pipeline_monitor.push')
+        pusher = push.active_pusher() if push is not None else None
+        if pusher is not None:
+            dropped.add_metric(['registry_push'], pusher.failures)
+        logging_utils = sys.modules.get('pipeline_monitor.logging_utils')
+        sink = logging_utils.get_log_sink() if logging_utils is not None else None
+        if sink is not None:
+            dropped.add_metric(['log_records'], sink.dropped)
+        yield dropped
+
+# Process-wide meter, registered on REGISTRY by prometheus_metrics
+overhead_meter = OverheadMeter()
+
+def timed(component: str) -> Callable:
+    """Decorator recording time spent in a function on ``overhead_meter``."""
+    return overhead_meter.timed(component)
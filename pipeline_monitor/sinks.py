@@ -0,0 +1,507 @@
+"""
+In-process event bus delivering finished calls and blocks to sinks.
+
+``track_performance`` and ``ResourceMonitor`` publish one ``MetricEvent``
+per finished call or block to the process-wide ``MetricBus``. Every
+registered sink (log, Prometheus, dashboard, file, and exporters added
+later) has its own bounded queue and worker thread, which delivers
+events in batches after a short batching window. The producer only
+appends to the queues: a slow or failing sink fills or fails its own
+queue, drops and counts its own events, and never adds latency to the
+monitored pipeline or to other sinks. Sinks that are not enabled are
+not registered, so they cost nothing.
+
+Sinks are configured in the ``sinks`` config section, one sub-section
+per sink with ``enabled`` and optional ``queue_size``, ``batch_size``
+and ``flush_interval`` overrides; other keys are passed to the sink.
+Sinks can also be added at runtime with ``PipelineMonitor.add_sink``.
+
+Worker threads do not survive ``fork``: in a forked child (e.g. a
+pre-fork server in multi-process mode) the bus restarts them with empty
+queues, so the child delivers its own events.
+"""
+
+import atexit
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Type
+from .logging_utils import StructuredMessage, dumps
+from .self_monitoring import overhead_meter
+
+logger = logging.getLogger(__name__)
+
+class MetricEvent(NamedTuple):
+    """A finished tracked call ('call') or monitored block ('block')."""
+    kind: str
+    name: str
+    data: Dict[str, Any]
+    rss_bytes: Optional[float] = None
+    aggregated: bool = False
+
+class Sink:
+    """
+    Base class of event sinks.
+
+    Subclasses set ``name`` and implement ``handle``, which receives
+    batches of events in the sink's worker thread.
+    """
+
+    name = 'sink'
+
+    def handle(self, events: List[MetricEvent]) -> None:
+        """Deliver a batch of events."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release resources after the last batch."""
+
+class LogSink(Sink):
+    """Log finished calls and blocks as structured JSON records."""
+
+    name = 'log'
+
+    # Logger and message per event kind, as logged before the bus existed
+    LOGGERS = {
+        'call': ('pipeline_monitor.decorators', 'Pipeline call finished'),
+        'block': ('pipeline_monitor.context', 'Monitoring block finished'),
+    }
+
+    def __init__(self, level: Any = logging.INFO):
+        if isinstance(level, str):
+            level = logging.getLevelName(level.upper())
+        self.level = level
+        self._loggers = {
+            kind: (logging.getLogger(logger_name), message)
+            for kind, (logger_name, message) in self.LOGGERS.items()
+        }
+
+    def handle(self, events: List[MetricEvent]) -> None:
+        for event in events:
+            event_logger, message = self._loggers.get(event.kind, (logger, event.kind))
+            if event_logger.isEnabledFor(self.level):
+                event_logger.log(self.level, StructuredMessage(message, event.data))
+
+class PrometheusSink(Sink):
+    """
+    Update memory gauges and the active pipeline gauge.
+
+    Run counts and durations are recorded by the producer, so they are
+    never dropped or delayed with the sink's queue.
+    """
+
+    name = 'prometheus'
+
+    def __init__(self):
+        from .prometheus_metrics import update_memory_usage, update_active_pipelines
+        self._update_memory = update_memory_usage
+        self._update_active = update_active_pipelines
+
+    def handle(self, events: List[MetricEvent]) -> None:
+        memory: Dict[str, float] = {}
+        active = False
+        for event in events:
+            if event.kind != 'call':
+                continue
+            if not event.aggregated:
+                active = True
+            if event.rss_bytes is not None:
+                memory[event.name] = event.rss_bytes
+
+        # Only the latest memory reading per pipeline matters for the gauge
+        for name, rss_bytes in memory.items():
+            self._update_memory(name, rss_bytes)
+        if active:
+            self._update_active(1)
+
+class DashboardSink(Sink):
+    """Forward performance, memory and allocation updates to the dashboard."""
+
+    name = 'dashboard'
+
+    def __init__(self):
+        from .emission import emit_metric, dashboard_loaded
+        self._emit = emit_metric
+        self._dashboard_loaded = dashboard_loaded
+
+    def handle(self, events: List[MetricEvent]) -> None:
+        if not self._dashboard_loaded():
+            return
+        emit = self._emit
+        for event in events:
+            data = event.data
+            allocations = data.get('allocations')
+            if allocations is not None:
+                label = 'function_name' if event.kind == 'call' else 'block_name'
+                emit('allocations', dict(allocations, **{label: event.name}))
+            if event.aggregated:
+                # The aggregator pushes per-interval performance frames
+                continue
+            emit('performance', {
+                'active_pipelines': 1,
+                'execution_time': data['execution_time']
+            })
+            emit('memory', {
+                'rss_mb': (event.rss_bytes or 0) / 1024 / 1024,
+                'memory_used_mb': data.get('memory_used', data.get('memory_usage_mb'))
+            })
+
+class FileSink(Sink):
+    """
+    Append events as JSON lines to a file.
+
+    Args:
+        path: Output file path
+    """
+
+    name = 'file'
+
+    def __init__(self, path: str = 'pipeline_metrics.jsonl'):
+        self.path = path
+        self._file = open(path, 'a')
+
+    def handle(self, events: List[MetricEvent]) -> None:
+        lines = [
+            dumps(dict(event.data, event=event.kind, name=event.name)) + '\n'
+            for event in events
+        ]
+        self._file.writelines(lines)
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+# Sink classes by config section name; exporters register themselves here
+SINK_TYPES: Dict[str, Type[Sink]] = {
+    'log': LogSink,
+    'prometheus': PrometheusSink,
+    'dashboard': DashboardSink,
+    'file': FileSink,
+}
+
+class _SinkWorker:
+    """Queue and delivery thread of one sink."""
+
+    def __init__(self, sink: Sink, queue_size: int, batch_size: int, flush_interval: float):
+        self.sink = sink
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: Deque[MetricEvent] = collections.deque()
+        self.delivered = 0
+        self.dropped = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._last_logged = float('-inf')
+        self._busy = False
+        self._closing = False
+        # Set when the queue becomes non-empty / a batch is full
+        self._handle = overhead_meter.timed(f'sink_{sink.name}')(sink.handle)
+        self._start()
+
+    def _start(self) -> None:
+        self._wake = threading.Event()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f'pipeline-monitor-sink-{self.sink.name}', daemon=True
+        )
+        self._thread.start()
+
+    def _after_fork(self) -> None:
+        """Restart delivery in a forked child; the parent delivers its queued events."""
+        self.queue = collections.deque()
+        self._busy = False
+        self._start()
+
+    def put(self, event: MetricEvent) -> None:
+        """Queue an event without blocking; drop it if the queue is full."""
+        queue = self.queue
+        if len(queue) >= self.queue_size:
+            self.dropped += 1
+            return
+        queue.append(event)
+        size = len(queue)
+        if size == 1:
+            self._wake.set()
+        elif size >= self.batch_size:
+            self._ready.set()
+
+    def _run(self) -> None:
+        while True:
+            # Bounded wait in case a wake-up raced with the last drain
+            self._wake.wait(max(1.0, self.flush_interval))
+            self._wake.clear()
+            if not self.queue:
+                if self._closing:
+                    return
+                continue
+            # Batching window, cut short by a full batch or close()
+            if not self._closing:
+                self._ready.wait(self.flush_interval)
+            self._ready.clear()
+            self._drain()
+            # close() may have set _wake before this pass cleared it
+            if self._closing and not self.queue:
+                return
+
+    def _drain(self) -> None:
+        queue = self.queue
+        self._busy = True
+        try:
+            while queue:
+                batch = []
+                while queue and len(batch) < self.batch_size:
+                    batch.append(queue.popleft())
+                self._deliver(batch)
+        finally:
+            self._busy = False
+
+    def _deliver(self, batch: List[MetricEvent]) -> None:
+        try:
+            self._handle(batch)
+            self.delivered += len(batch)
+        except Exception as e:
+            self.failures += 1
+            self.dropped += len(batch)
+            self.last_error = f"{type(e).__name__}: {e}"
+            now = time.monotonic()
+            if now - self._last_logged >= 60:
+                self._last_logged = now
+                logger.error(f"Sink {self.sink.name} failed to deliver {len(batch)} events: {self.last_error}")
+
+    def flush(self, timeout: float) -> bool:
+        """Deliver queued events now; return whether the queue drained in time."""
+        deadline = time.monotonic() + timeout
+        self._wake.set()
+        self._ready.set()
+        while self.queue or self._busy:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def close(self, timeout: float) -> None:
+        """Deliver queued events, stop the thread and close the sink."""
+        self._closing = True
+        self._wake.set()
+        self._ready.set()
+        self._thread.join(timeout)
+        try:
+            self.sink.close()
+        except Exception as e:
+            logger.error(f"Failed to close sink {self.sink.name}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queued': len(self.queue),
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'failures': self.failures,
+            'last_error': self.last_error
+        }
+
+class MetricBus:
+    """
+    Fan events out to registered sinks through per-sink queues.
+
+    Args:
+        queue_size: Default events queued per sink before new ones are dropped
+        batch_size: Default maximum events per delivered batch
+        flush_interval: Default batching window in seconds
+    """
+
+    def __init__(self, queue_size: int = 10000, batch_size: int = 256, flush_interval: float = 0.1):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._workers: Dict[str, _SinkWorker] = {}
+        # Immutable snapshot read by publish without locking
+        self._targets: tuple = ()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        """Whether any sink is registered."""
+        return bool(self._targets)
+
+    def add_sink(
+        self,
+        sink: Sink,
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None
+    ) -> None:
+        """
+        Register a sink, replacing any sink of the same name.
+
+        Args:
+            sink: Sink to deliver events to
+            queue_size: Events queued before new ones are dropped
+            batch_size: Maximum events per batch
+            flush_interval: Batching window in seconds
+        """
+        worker = _SinkWorker(
+            sink,
+            queue_size or self.queue_size,
+            batch_size or self.batch_size,
+            flush_interval if flush_interval is not None else self.flush_interval
+        )
+        with self._lock:
+            previous = self._workers.get(sink.name)
+            self._workers[sink.name] = worker
+            self._targets = tuple(self._workers.values())
+        if previous is not None:
+            previous.close(timeout=5.0)
+
+    def remove_sink(self, name: str, timeout: float = 5.0) -> Optional[Sink]:
+        """
+        Unregister a sink after delivering its queued events.
+
+        Returns:
+            The removed sink, or None if no sink has that name
+        """
+        with self._lock:
+            worker = self._workers.pop(name, None)
+            self._targets = tuple(self._workers.values())
+        if worker is None:
+            return None
+        worker.close(timeout)
+        return worker.sink
+
+    def publish(self, event: MetricEvent) -> None:
+        """Queue an event for every registered sink."""
+        for worker in self._targets:
+            worker.put(event)
+
+    def sinks(self) -> Dict[str, Dict[str, Any]]:
+        """Delivery statistics per sink: queued, delivered, dropped, failures, last_error."""
+        return {name: worker.stats() for name, worker in list(self._workers.items())}
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Deliver all queued events now.
+
+        Returns:
+            Whether every sink drained within ``timeout`` seconds
+        """
+        deadline = time.monotonic() + timeout
+        drained = True
+        for worker in self._targets:
+            drained = worker.flush(max(deadline - time.monotonic(), 0.0)) and drained
+        return drained
+
+    def _after_fork(self) -> None:
+        """Give a forked child its own queues and delivery threads."""
+        self._lock = threading.Lock()
+        for worker in self._targets:
+            worker._after_fork()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Deliver queued events and remove all sinks."""
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+            self._targets = ()
+        for worker in workers:
+            worker.close(timeout)
+
+def build_sinks(sinks_config: Dict[str, Any]) -> List[tuple]:
+    """
+    Create the enabled sinks of a ``sinks`` config section.
+
+    A sub-section's ``type`` selects the sink class (default: its name),
+    so several sinks of one type can be configured.
+
+    Returns:
+        List of (sink, queue options) pairs
+    """
+    queue_keys = ('queue_size', 'batch_size', 'flush_interval')
+    built = []
+    for section, options in sinks_config.items():
+        if not isinstance(options, dict) or not options.get('enabled'):
+            continue
+        sink_type = SINK_TYPES.get(options.get('type', section))
+        if sink_type is None:
+            logger.error(f"Unknown sink type for sinks.{section}: {options.get('type', section)}")
+            continue
+        kwargs = {
+            key: value for key, value in options.items()
+            if key not in queue_keys and key not in ('enabled', 'type')
+        }
+        try:
+            sink = sink_type(**kwargs)
+        except Exception as e:
+            logger.error(f"Failed to create sink {section}: {str(e)}")
+            continue
+        sink.name = section
+        built.append((sink, {key: options[key] for key in queue_keys if key in options}))
+    return built
+
+_bus: Optional[MetricBus] = None
+_bus_lock = threading.Lock()
+
+def get_metric_bus(sinks_config: Optional[Dict[str, Any]] = None) -> MetricBus:
+    """
+    Get the process-wide metric bus.
+
+    Args:
+        sinks_config: ``sinks`` config section, used only on creation;
+            defaults to the default configuration's section
+
+    Returns:
+        Shared MetricBus instance with the enabled sinks registered
+    """
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                if sinks_config is None:
+                    from .config import Configuration
+                    sinks_config = Configuration().get('sinks') or {}
+                bus = MetricBus(
+                    queue_size=sinks_config.get('queue_size', 10000),
+                    batch_size=sinks_config.get('batch_size', 256),
+                    flush_interval=sinks_config.get('flush_interval', 0.1)
+                )
+                for sink, options in build_sinks(sinks_config):
+                    bus.add_sink(sink, **options)
+                _bus = bus
+    return _bus
+
+def active_bus() -> Optional[MetricBus]:
+    """Get the shared bus if it has been created."""
+    return _bus
+
+def flush_pending(timeout: float = 2.0) -> None:
+    """
+    Record metrics still in flight, before a final push at exit.
+
+    Delivers the events queued on the bus and flushes the call
+    aggregator, if they have been created.
+
+    Args:
+        timeout: Seconds to wait for the bus to drain
+    """
+    if _bus is not None:
+        _bus.flush(timeout=timeout)
+    aggregation = sys.modules.get('pipeline_monitor.aggregation')
+    aggregator = aggregation.active_aggregator() if aggregation is not None else None
+    if aggregator is not None:
+        aggregator.flush()
+
+def _close_bus() -> None:
+    if _bus is not None:
+        _bus.close()
+
+def _after_fork_in_child() -> None:
+    global _bus_lock
+    _bus_lock = threading.Lock()
+    if _bus is not None:
+        _bus._after_fork()
+
+atexit.register(_close_bus)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,414 @@
+"""
+Persistent time-series store for pipeline runs.
+
+Runs are appended to an in-memory queue and written by a background
+thread in batches to an SQLite database in WAL mode. Each batch also
+updates per-minute and per-hour rollups, so aggregate queries over long
+time ranges read rollup rows instead of raw runs. Old raw runs and
+rollups are deleted according to the retention policy.
+
+SQLite connections must not be used across ``fork``: a forked child
+opens its own and starts its own writer thread.
+"""
+
+import atexit
+import collections
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MINUTE = 60
+HOUR = 3600
+ROLLUP_RESOLUTIONS = (MINUTE, HOUR)
+
+DEFAULT_RETENTION = {
+    'raw_days': 7,
+    'minute_days': 30,
+    'hour_days': 365
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pipelines (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS runs (
+    ts REAL NOT NULL,
+    pipeline_id INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    memory_mb REAL,
+    success INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_pipeline_ts ON runs (pipeline_id, ts);
+CREATE INDEX IF NOT EXISTS runs_ts ON runs (ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    resolution INTEGER NOT NULL,
+    pipeline_id INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    duration_sum REAL NOT NULL,
+    duration_min REAL NOT NULL,
+    duration_max REAL NOT NULL,
+    memory_max REAL,
+    PRIMARY KEY (resolution, pipeline_id, bucket)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_ROLLUP = """
+INSERT INTO rollups
+    (resolution, pipeline_id, bucket, count, failures,
+     duration_sum, duration_min, duration_max, memory_max)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (resolution, pipeline_id, bucket) DO UPDATE SET
+    count = count + excluded.count,
+    failures = failures + excluded.failures,
+    duration_sum = duration_sum + excluded.duration_sum,
+    duration_min = MIN(duration_min, excluded.duration_min),
+    duration_max = MAX(duration_max, excluded.duration_max),
+    memory_max = MAX(COALESCE(memory_max, excluded.memory_max),
+                     COALESCE(excluded.memory_max, memory_max))
+"""
+
+Run = Tuple[float, str, float, Optional[float], bool]
+
+class RunStore:
+    """
+    Embedded SQLite store of pipeline runs with rollups and retention.
+
+    ``record`` only appends to a queue and is safe to call from any
+    thread; writes happen on the store's writer thread.
+    """
+
+    def __init__(
+        self,
+        path: str = 'pipeline_runs.db',
+        batch_size: int = 1000,
+        flush_interval: float = 1.0,
+        max_pending: int = 100000,
+        retention: Optional[Dict[str, float]] = None
+    ):
+        """
+        Initialize the store and start its writer thread.
+
+        Args:
+            path: SQLite database file
+            batch_size: Maximum runs written per transaction
+            flush_interval: Seconds between writes of pending runs
+            max_pending: Maximum runs queued; the oldest are dropped beyond it
+            retention: Days to keep raw runs (``raw_days``), minute
+                rollups (``minute_days``) and hour rollups (``hour_days``)
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+        self._pending: Deque[Run] = collections.deque(maxlen=max_pending)
+        self._pipeline_ids: Dict[str, int] = {}
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._last_retention = 0.0
+
+        self._writer_conn = self._connect()
+        self._writer_conn.executescript(_SCHEMA)
+        self._writer_conn.commit()
+        self._start()
+
+    def _start(self) -> None:
+        self._writer = threading.Thread(
+            target=self._run,
+            name="pipeline-monitor-store",
+            daemon=True
+        )
+        self._writer.start()
+
+    def _after_fork(self) -> None:
+        """
+        Reopen connections and restart the writer in a forked child.
+
+        The parent's connections are abandoned, not closed, so the parent
+        keeps using them; its pending runs are written by the parent.
+        """
+        self._pending = collections.deque(maxlen=self._pending.maxlen)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._writer_conn = self._connect()
+        self._start()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in WAL mode."""
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """Return this thread's read connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def record(
+        self,
+        function_name: str,
+        duration: float,
+        memory_mb: Optional[float] = None,
+        success: bool = True,
+        timestamp: Optional[float] = None
+    ) -> None:
+        """
+        Queue one run for writing.
+
+        Args:
+            function_name: Pipeline (function or block) name
+            duration: Execution time in seconds
+            memory_mb: Memory used in MB, if measured
+            success: Whether the run succeeded
+            timestamp: Unix time of the run; defaults to now
+        """
+        self._pending.append((
+            timestamp if timestamp is not None else time.time(),
+            function_name, duration, memory_mb, success
+        ))
+
+    def _pipeline_id(self, name: str) -> int:
+        """Resolve a pipeline name to its id (writer thread only)."""
+        pipeline_id = self._pipeline_ids.get(name)
+        if pipeline_id is None:
+            conn = self._writer_conn
+            conn.execute('INSERT OR IGNORE INTO pipelines (name) VALUES (?)', (name,))
+            pipeline_id = conn.execute(
+                'SELECT id FROM pipelines WHERE name = ?', (name,)
+            ).fetchone()[0]
+            self._pipeline_ids[name] = pipeline_id
+        return pipeline_id
+
+    def flush(self) -> int:
+        """
+        Write all pending runs.
+
+        Returns:
+            Number of runs written
+        """
+        written = 0
+        with self._write_lock:
+            while self._pending:
+                batch = []
+                while self._pending and len(batch) < self.batch_size:
+                    batch.append(self._pending.popleft())
+                self._write_batch(batch)
+                written += len(batch)
+        return written
+
+    def _write_batch(self, batch: List[Run]) -> None:
+        """Insert a batch of runs and fold it into the rollups."""
+        rows = []
+        rollups: Dict[Tuple[int, int, int], List[Any]] = {}
+        for ts, name, duration, memory_mb, success in batch:
+            pipeline_id = self._pipeline_id(name)
+            rows.append((ts, pipeline_id, duration, memory_mb, 1 if success else 0))
+            for resolution in ROLLUP_RESOLUTIONS:
+                key = (resolution, pipeline_id, int(ts // resolution) * resolution)
+                agg = rollups.get(key)
+                if agg is None:
+                    rollups[key] = [1, 0 if success else 1, duration, duration, duration, memory_mb]
+                else:
+                    agg[0] += 1
+                    agg[1] += 0 if success else 1
+                    agg[2] += duration
+                    agg[3] = min(agg[3], duration)
+                    agg[4] = max(agg[4], duration)
+                    if memory_mb is not None:
+                        agg[5] = memory_mb if agg[5] is None else max(agg[5], memory_mb)
+
+        conn = self._writer_conn
+        with conn:
+            conn.executemany(
+                'INSERT INTO runs (ts, pipeline_id, duration, memory_mb, success) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            conn.executemany(
+                _UPSERT_ROLLUP,
+                [key + tuple(agg) for key, agg in rollups.items()]
+            )
+
+    def apply_retention(self, now: Optional[float] = None) -> None:
+        """
+        Delete raw runs and rollups older than the retention policy.
+
+        Args:
+            now: Reference Unix time; defaults to now
+        """
+        now = now if now is not None else time.time()
+        day = 86400
+        with self._write_lock, self._writer_conn as conn:
+            conn.execute('DELETE FROM runs WHERE ts < ?', (now - self.retention['raw_days'] * day,))
+            conn.execute(
+                'DELETE FROM rollups WHERE resolution = ? AND bucket < ?',
+                (MINUTE, now - self.retention['minute_days'] * day)
+            )
+            conn.execute(
+                'DELETE FROM rollups WHERE resolution = ? AND bucket < ?',
+                (HOUR, now - self.retention['hour_days'] * day)
+            )
+
+    def query(
+        self,
+        pipeline: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        step: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Aggregate runs per pipeline over a time range.
+
+        Reads hour rollups when ``step`` is a multiple of an hour, minute
+        rollups when it is a multiple of a minute, and raw runs otherwise;
+        without ``step``, rollups are used for ranges of an hour or more.
+        Rollups are aligned to their resolution, so range boundaries are
+        rounded down to it.
+
+        Args:
+            pipeline: Restrict to one pipeline name
+            start: Range start as Unix time (default: 24 hours ago)
+            end: Range end as Unix time (default: now)
+            step: Bucket width in seconds; None for one bucket per pipeline
+
+        Returns:
+            List of dicts with ``pipeline_name``, ``bucket`` (start time,
+            omitted without ``step``), ``count``, ``failures``,
+            ``error_rate``, ``duration_avg``, ``duration_min``,
+            ``duration_max`` and ``memory_max``
+        """
+        end = end if end is not None else time.time()
+        start = start if start is not None else end - 86400
+
+        resolution = None
+        if step is None:
+            # Keep boundary rounding small relative to the range
+            if end - start >= 7 * 86400:
+                resolution = HOUR
+            elif end - start >= HOUR:
+                resolution = MINUTE
+        else:
+            for candidate in sorted(ROLLUP_RESOLUTIONS, reverse=True):
+                if step % candidate == 0:
+                    resolution = candidate
+                    break
+
+        bucket_expr = '0' if step is None else f'CAST(({{ts}} - :start) / :step AS INTEGER)'
+        params: Dict[str, Any] = {'start': start, 'end': end, 'step': step}
+        where = ''
+        if pipeline is not None:
+            where = ' AND p.name = :pipeline'
+            params['pipeline'] = pipeline
+
+        if resolution is not None:
+            params['resolution'] = resolution
+            params['aligned_start'] = int(start // resolution) * resolution
+            sql = f"""
+                SELECT p.name, {bucket_expr.format(ts='r.bucket')} AS b,
+                       SUM(r.count), SUM(r.failures), SUM(r.duration_sum),
+                       MIN(r.duration_min), MAX(r.duration_max), MAX(r.memory_max)
+                FROM rollups r JOIN pipelines p ON p.id = r.pipeline_id
+                WHERE r.resolution = :resolution
+                  AND r.bucket >= :aligned_start AND r.bucket < :end{where}
+                GROUP BY p.name, b ORDER BY p.name, b
+            """
+        else:
+            sql = f"""
+                SELECT p.name, {bucket_expr.format(ts='r.ts')} AS b,
+                       COUNT(*), SUM(1 - r.success), SUM(r.duration),
+                       MIN(r.duration), MAX(r.duration), MAX(r.memory_mb)
+                FROM runs r JOIN pipelines p ON p.id = r.pipeline_id
+                WHERE r.ts >= :start AND r.ts < :end{where}
+                GROUP BY p.name, b ORDER BY p.name, b
+            """
+
+        results = []
+        for name, bucket, count, failures, duration_sum, dmin, dmax, memory_max in \
+                self._reader().execute(sql, params):
+            row = {
+                'pipeline_name': name,
+                'count': count,
+                'failures': failures,
+                'error_rate': failures / count if count else 0.0,
+                'duration_avg': duration_sum / count if count else 0.0,
+                'duration_min': dmin,
+                'duration_max': dmax,
+                'memory_max': memory_max
+            }
+            if step is not None:
+                row['bucket'] = start + max(bucket, 0) * step
+            results.append(row)
+        return results
+
+    def close(self) -> None:
+        """Write pending runs and stop the writer thread."""
+        self._stop.set()
+        self._writer.join()
+        self.flush()
+        self._writer_conn.close()
+
+    def _run(self) -> None:
+        """Writer loop: flush pending runs and apply retention hourly."""
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                if time.time() - self._last_retention >= HOUR:
+                    self.apply_retention()
+                    self._last_retention = time.time()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write pipeline runs: {str(e)}")
+
+_stores: Dict[str, RunStore] = {}
+_stores_lock = threading.Lock()
+
+def get_run_store(storage_config: Optional[Dict[str, Any]]) -> Optional[RunStore]:
+    """
+    Get the shared store for a ``storage`` config section.
+
+    Args:
+        storage_config: Dict with ``enabled``, ``path``, ``batch_size``,
+            ``flush_interval`` and ``retention``
+
+    Returns:
+        RunStore shared by all users of the same path, or None if disabled
+    """
+    if not storage_config or not storage_config.get('enabled'):
+        return None
+
+    options = dict(storage_config)
+    options.pop('enabled', None)
+    path = options.setdefault('path', 'pipeline_runs.db')
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = RunStore(**options)
+        return store
+
+def _after_fork_in_child() -> None:
+    global _stores_lock
+    _stores_lock = threading.Lock()
+    for store in _stores.values():
+        store._after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+@atexit.register
+def _close_stores() -> None:
+    """Write pending runs before the interpreter exits."""
+    for store in list(_stores.values()):
+        try:
+            store.close()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to close pipeline run store: {str(e)}")
@@ -0,0 +1,311 @@
+"""
+Hierarchical span tracing of tracked calls and monitored blocks.
+
+Every traced ``track_performance`` call and ``ResourceMonitor`` block
+opens a span whose parent is the span running in the current context.
+Spans are kept on the timing span stack of ``prometheus_metrics`` (a
+``contextvars`` variable, so threads and asyncio tasks each see their
+own): a traced call's span is attached to its timed span, a block's is
+pushed on its own. Finished spans are buffered in memory per trace, keeping the most
+recent ``max_traces`` traces, and can be exported to a file in Chrome
+trace format (chrome://tracing, Perfetto, speedscope) or OTLP/JSON.
+"""
+
+import collections
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .prometheus_metrics import attach_trace, current_trace, detach_trace
+
+logger = logging.getLogger(__name__)
+
+class Span:
+    """One traced call or block."""
+
+    __slots__ = (
+        'trace_id', 'span_id', 'parent_id', 'name', 'kind', 'start_ns',
+        'end_ns', 'thread_id', 'error', 'attributes', '_start_perf', '_entry'
+    )
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        parent: Optional['Span'],
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.trace_id = parent.trace_id if parent else '%032x' % random.getrandbits(128)
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self._start_perf = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.thread_id = threading.get_ident()
+        self.error: Optional[str] = None
+        self.attributes = attributes or {}
+        self._entry = None
+
+    @property
+    def duration_ns(self) -> int:
+        """Span duration in nanoseconds (0 while running)."""
+        return self.end_ns - self.start_ns if self.end_ns is not None else 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the span to a JSON-serializable dictionary."""
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_ns': self.start_ns,
+            'duration_ns': self.duration_ns,
+            'thread_id': self.thread_id,
+            'error': self.error,
+            'attributes': self.attributes
+        }
+
+def current_span() -> Optional[Span]:
+    """Get the span running in the current context, if any."""
+    return current_trace()
+
+class Tracer:
+    """
+    Create spans and buffer finished ones per trace.
+
+    Args:
+        max_traces: Number of most recent traces kept
+        max_spans: Spans kept per trace; later ones are counted as dropped
+    """
+
+    def __init__(self, max_traces: int = 100, max_spans: int = 10000):
+        self.max_traces = max_traces
+        self.max_spans = max_spans
+        self.dropped_spans = 0
+        self._traces: 'collections.OrderedDict[str, List[Span]]' = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def start_span(
+        self,
+        name: str,
+        kind: str = 'function',
+        attributes: Optional[Dict[str, Any]] = None
+    ) -> Span:
+        """
+        Open a span as a child of the current one and make it current.
+
+        Args:
+            name: Function or block name
+            kind: 'function' for tracked calls, 'block' for monitor blocks
+            attributes: Extra key/value pairs stored with the span
+
+        Returns:
+            The running span; pass it to ``end_span``
+        """
+        span = Span(name, kind, current_trace(), attributes)
+        span._entry = attach_trace(span, name if kind == 'function' else None)
+        return span
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None) -> None:
+        """
+        Close a span, restore its parent as current and buffer it.
+
+        Args:
+            span: Span returned by ``start_span``
+            error: Exception that ended the call, if any
+        """
+        span.end_ns = span.start_ns + (time.perf_counter_ns() - span._start_perf)
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        if span._entry is not None:
+            detach_trace(span._entry)
+            span._entry = None
+
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            if len(spans) < self.max_spans:
+                spans.append(span)
+            else:
+                self.dropped_spans += 1
+
+    def traces(self) -> List[Dict[str, Any]]:
+        """
+        Summarize buffered traces, most recent first.
+
+        Returns:
+            List of dicts with ``trace_id``, the root's ``name``,
+            ``start_ns`` and ``duration_ns``, ``spans`` and ``complete``
+        """
+        with self._lock:
+            traces = [(trace_id, list(spans)) for trace_id, spans in self._traces.items()]
+
+        summaries = []
+        for trace_id, spans in reversed(traces):
+            root = next((span for span in spans if span.parent_id is None), None)
+            first = root or min(spans, key=lambda span: span.start_ns)
+            summaries.append({
+                'trace_id': trace_id,
+                'name': first.name,
+                'start_ns': first.start_ns,
+                'duration_ns': first.duration_ns,
+                'spans': len(spans),
+                'complete': root is not None
+            })
+        return summaries
+
+    def trace(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Get the finished spans of one trace ordered by start time."""
+        with self._lock:
+            spans = list(self._traces.get(trace_id, ()))
+        return [span.to_dict() for span in sorted(spans, key=lambda span: span.start_ns)]
+
+    def _spans(self, trace_id: Optional[str]) -> List[Span]:
+        with self._lock:
+            if trace_id is not None:
+                return list(self._traces.get(trace_id, ()))
+            return [span for spans in self._traces.values() for span in spans]
+
+    def to_chrome_trace(self, trace_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build a Chrome trace document of one or all buffered traces.
+
+        Args:
+            trace_id: Trace to export (default: all buffered traces)
+
+        Returns:
+            Dict with ``traceEvents`` of complete ('X') events
+        """
+        pid = os.getpid()
+        events = []
+        for span in self._spans(trace_id):
+            args = dict(span.attributes, trace_id=span.trace_id, span_id=span.span_id)
+            if span.parent_id:
+                args['parent_id'] = span.parent_id
+            if span.error:
+                args['error'] = span.error
+            events.append({
+                'name': span.name,
+                'cat': span.kind,
+                'ph': 'X',
+                'ts': span.start_ns / 1000,
+                'dur': span.duration_ns / 1000,
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': args
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def to_otlp(self, trace_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build an OTLP/JSON ``ExportTraceServiceRequest`` document.
+
+        Args:
+            trace_id: Trace to export (default: all buffered traces)
+
+        Returns:
+            Dict with ``resourceSpans``
+        """
+        spans = []
+        for span in self._spans(trace_id):
+            attributes = [
+                {'key': key, 'value': _otlp_value(value)}
+                for key, value in dict(span.attributes, **{'pipeline.kind': span.kind}).items()
+            ]
+            otlp_span = {
+                'traceId': span.trace_id,
+                'spanId': span.span_id,
+                'name': span.name,
+                'kind': 1,  # SPAN_KIND_INTERNAL
+                'startTimeUnixNano': str(span.start_ns),
+                'endTimeUnixNano': str(span.end_ns),
+                'attributes': attributes,
+                'status': {'code': 2, 'message': span.error} if span.error else {'code': 1}
+            }
+            if span.parent_id:
+                otlp_span['parentSpanId'] = span.parent_id
+            spans.append(otlp_span)
+
+        return {'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': {'stringValue': 'pipeline-monitor'}},
+                {'key': 'process.pid', 'value': {'intValue': str(os.getpid())}}
+            ]},
+            'scopeSpans': [{'scope': {'name': 'pipeline_monitor'}, 'spans': spans}]
+        }]}
+
+    def export(self, path: str, trace_id: Optional[str] = None, format: str = 'chrome') -> int:
+        """
+        Write buffered spans to a JSON file.
+
+        Args:
+            path: Output file path
+            trace_id: Trace to export (default: all buffered traces)
+            format: 'chrome' (Chrome trace event format) or 'otlp' (OTLP/JSON)
+
+        Returns:
+            Number of spans written
+        """
+        if format == 'chrome':
+            document = self.to_chrome_trace(trace_id)
+            count = len(document['traceEvents'])
+        elif format == 'otlp':
+            document = self.to_otlp(trace_id)
+            count = len(document['resourceSpans'][0]['scopeSpans'][0]['spans'])
+        else:
+            raise ValueError(f"Unknown trace format: {format} (expected 'chrome' or 'otlp')")
+
+        with open(path, 'w') as f:
+            json.dump(document, f)
+        logger.info(f"Exported {count} spans to {path}")
+        return count
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """Convert an attribute value to an OTLP AnyValue."""
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+def get_tracer(tracing_config: Optional[Dict[str, Any]] = None) -> Optional[Tracer]:
+    """
+    Get the process-wide tracer for a ``tracing`` config section.
+
+    Args:
+        tracing_config: Dict with ``enabled``, ``max_traces`` and
+            ``max_spans``; the limits are used only on creation
+
+    Returns:
+        Shared Tracer instance, or None if tracing is disabled
+    """
+    global _tracer
+    if not tracing_config or not tracing_config.get('enabled'):
+        return None
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(
+                    max_traces=tracing_config.get('max_traces', 100),
+                    max_spans=tracing_config.get('max_spans', 10000)
+                )
+    return _tracer
+
+def active_tracer() -> Optional[Tracer]:
+    """Get the shared tracer if any traced call has created it."""
+    return _tracer
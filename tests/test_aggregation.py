@@ -0,0 +1,31 @@
+"""Tests for per-thread metric aggregation."""
+
+from pipeline_monitor import emission
+from pipeline_monitor.aggregation import MetricAggregator
+from pipeline_monitor.prometheus_metrics import REGISTRY
+
+def test_frames_report_the_extremes_of_their_interval(monkeypatch):
+    frames = []
+    monkeypatch.setattr(emission, 'emit_metric', lambda kind, data: frames.append(data))
+    aggregator = MetricAggregator()
+
+    for seconds in (0.1, 5.0):
+        aggregator.record('interval_job', seconds)
+    aggregator.flush()
+    for seconds in (1.0, 2.0):
+        aggregator.record('interval_job', seconds)
+    aggregator.flush()
+    aggregator.flush()  # no calls: no frame
+
+    assert [frame['aggregated']['interval_job'] for frame in frames] == [
+        {'count': 2, 'mean': 2.55, 'min': 0.1, 'max': 5.0},
+        {'count': 2, 'mean': 1.5, 'min': 1.0, 'max': 2.0}
+    ]
+    # The exposed gauges stay cumulative
+    REGISTRY.register(aggregator)
+    try:
+        labels = {'pipeline_name': 'interval_job'}
+        assert REGISTRY.get_sample_value('pipeline_aggregated_duration_min_seconds', labels) == 0.1
+        assert REGISTRY.get_sample_value('pipeline_aggregated_duration_max_seconds', labels) == 5.0
+    finally:
+        REGISTRY.unregister(aggregator)
@@ -0,0 +1,145 @@
+"""Tests for background alert dispatch."""
+
+import threading
+
+import pytest
+
+from pipeline_monitor import alerts
+from pipeline_monitor.config import registry
+from pipeline_monitor.decorators import track_performance
+from pipeline_monitor.alerts import AlertDispatcher, build_channel_handler, log_alert_handler
+
+class Recorder:
+    def __init__(self, block=False):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self, message, context):
+        self.started.set()
+        self.release.wait(5)
+        self.calls.append((message, context))
+
+def test_burst_is_coalesced_into_one_delivery():
+    deliver = Recorder()
+    dispatcher = AlertDispatcher(deliver, flush_interval=0.2)
+    for i in range(5):
+        assert dispatcher.submit(f'slow {i}', {'i': i})
+    dispatcher.close()
+
+    assert len(deliver.calls) == 1
+    message, context = deliver.calls[0]
+    assert message.splitlines() == ['5 alerts:'] + [f'- slow {i}' for i in range(5)]
+    assert context['count'] == 5
+    assert [alert['context'] for alert in context['alerts']] == [{'i': i} for i in range(5)]
+
+def test_batches_are_capped_at_max_batch():
+    deliver = Recorder()
+    dispatcher = AlertDispatcher(deliver, flush_interval=0.2, max_batch=3)
+    for i in range(7):
+        dispatcher.submit(f'slow {i}', {})
+    dispatcher.close()
+    assert [context.get('count', 1) for _, context in deliver.calls] == [3, 3, 1]
+
+def test_single_alert_is_delivered_as_is():
+    deliver = Recorder()
+    dispatcher = AlertDispatcher(deliver, flush_interval=0.01)
+    dispatcher.submit('only one', {'value': 1})
+    dispatcher.close()
+    assert deliver.calls == [('only one', {'value': 1})]
+
+def test_full_queue_drops_alerts():
+    deliver = Recorder(block=True)
+    dispatcher = AlertDispatcher(deliver, queue_size=2, flush_interval=0, max_batch=1)
+    dispatcher.submit('in flight', {})
+    assert deliver.started.wait(5)  # the worker holds the first alert
+
+    assert dispatcher.submit('queued 1', {})
+    assert dispatcher.submit('queued 2', {})
+    assert not dispatcher.submit('dropped', {})
+    assert dispatcher.dropped == 1
+    assert dispatcher.qsize() == 2
+
+    deliver.release.set()
+    dispatcher.close()
+    assert [message for message, _ in deliver.calls] == ['in flight', 'queued 1', 'queued 2']
+    assert not dispatcher.submit('after close', {})
+
+def test_block_overflow_times_out():
+    deliver = Recorder(block=True)
+    dispatcher = AlertDispatcher(
+        deliver, queue_size=1, flush_interval=0, max_batch=1, overflow='block', block_timeout=0.05
+    )
+    dispatcher.submit('in flight', {})
+    assert deliver.started.wait(5)
+    assert dispatcher.submit('queued', {})
+    assert not dispatcher.submit('timed out', {})
+    assert dispatcher.dropped == 1
+    deliver.release.set()
+    dispatcher.close()
+
+def test_failing_handler_does_not_stop_the_worker():
+    calls = []
+    failed = threading.Event()
+
+    def deliver(message, context):
+        calls.append(message)
+        if message == 'first':
+            failed.set()
+            raise RuntimeError('webhook down')
+
+    dispatcher = AlertDispatcher(deliver, flush_interval=0)
+    dispatcher.submit('first', {})
+    assert failed.wait(5)
+    dispatcher.submit('second', {})
+    dispatcher.close()
+    assert calls == ['first', 'second']
+
+def test_invalid_overflow_policy():
+    with pytest.raises(ValueError):
+        AlertDispatcher(print, overflow='spill')
+
+def test_default_channel_falls_back_to_logging():
+    assert build_channel_handler({}, 'default') is log_alert_handler
+    assert build_channel_handler({'email': {'to': ['ops@example.com']}}, 'email') is None
+
+def test_close_does_not_block_on_a_full_queue():
+    deliver = Recorder(block=True)
+    dispatcher = AlertDispatcher(deliver, queue_size=1, flush_interval=0, max_batch=1)
+    dispatcher.submit('in flight', {})
+    assert deliver.started.wait(5)
+    assert dispatcher.submit('queued', {})
+
+    dispatcher.close(timeout=0)  # no room for the stop marker
+    deliver.release.set()
+    (worker,) = dispatcher._workers
+    worker.join(5)
+    assert not worker.is_alive()
+    assert [message for message, _ in deliver.calls] == ['in flight', 'queued']
+
+def test_decorated_functions_share_one_alert_hook(monkeypatch):
+    created = []
+
+    class CountingHook(alerts.AlertHook):
+        def __init__(self, *args):
+            super().__init__(*args)
+            created.append(self)
+
+    monkeypatch.setattr(alerts, 'AlertHook', CountingHook)
+    registry.clear()
+
+    @track_performance
+    def shared_hook_a():
+        raise ValueError('bad row')
+
+    @track_performance
+    def shared_hook_b():
+        raise ValueError('bad row')
+
+    for job in (shared_hook_a, shared_hook_b, shared_hook_a):
+        with pytest.raises(ValueError):
+            job()
+    assert len(created) == 1
+    registry.clear()
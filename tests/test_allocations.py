@@ -0,0 +1,25 @@
+"""Tests for allocation profiling sessions."""
+
+import threading
+import tracemalloc
+
+from pipeline_monitor.allocations import AllocationProfiler
+
+def test_nested_calls_are_not_profiled():
+    profiler = AllocationProfiler()
+    assert profiler.should_profile()
+    outer = profiler.start()
+    inner_data = [bytearray(1024) for _ in range(100)]
+    assert not profiler.should_profile()  # nested in this context
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(profiler.should_profile()))
+    thread.start()
+    thread.join()
+    assert other == [True]  # another thread has its own context
+
+    result = profiler.stop(outer)
+    assert result['net_kb'] >= 100
+    assert not tracemalloc.is_tracing()
+    assert profiler.should_profile()
+    del inner_data
@@ -0,0 +1,62 @@
+"""Tests for the tracked-call wrappers."""
+
+import asyncio
+
+import pytest
+
+from pipeline_monitor.decorators import track_performance
+from pipeline_monitor.prometheus_metrics import REGISTRY
+
+def sample(metric, name, **labels):
+    return REGISTRY.get_sample_value(metric, {'pipeline_name': name, **labels}) or 0.0
+
+def test_unsampled_errors_are_recorded_alike_sync_and_async():
+    @track_performance(sampling=0.0)
+    def unsampled_sync_job():
+        raise ValueError('bad row')
+
+    @track_performance(sampling=0.0)
+    async def unsampled_async_job():
+        raise ValueError('bad row')
+
+    with pytest.raises(ValueError):
+        unsampled_sync_job()
+    with pytest.raises(ValueError):
+        asyncio.run(unsampled_async_job())
+
+    for name in ('unsampled_sync_job', 'unsampled_async_job'):
+        assert sample('pipeline_runs_total', name, status='failure') == 1
+        assert sample('pipeline_call_duration_seconds_count', name) == 1
+        # Like unsampled successes, kept out of the sampled durations
+        assert sample('pipeline_duration_seconds_count', name) == 0
+
+def test_sampling_preserves_the_error_ratio():
+    @track_performance(sampling=10)
+    def sampled_flaky_job(i):
+        if i % 10 == 3:
+            raise ValueError('bad row')
+
+    @track_performance(sampling=10)
+    async def sampled_flaky_async_job(i):
+        if i % 10 == 3:
+            raise ValueError('bad row')
+
+    async def run_async():
+        for i in range(100):
+            try:
+                await sampled_flaky_async_job(i)
+            except ValueError:
+                pass
+        await asyncio.sleep(0.1)  # failures are recorded in the background
+
+    for i in range(100):
+        try:
+            sampled_flaky_job(i)
+        except ValueError:
+            pass
+    asyncio.run(run_async())
+
+    for name in ('sampled_flaky_job', 'sampled_flaky_async_job'):
+        assert sample('pipeline_runs_total', name, status='success') == 90
+        assert sample('pipeline_runs_total', name, status='failure') == 10
+        assert sample('pipeline_duration_seconds_count', name) == 10  # sampled calls only
@@ -0,0 +1,66 @@
+"""Tests for throttled dashboard frame emission."""
+
+import pytest
+
+from pipeline_monitor.dashboard import emitter as emitter_module
+from pipeline_monitor.dashboard.emitter import MetricEmitter
+
+class FakeSocketIO:
+    def __init__(self):
+        self.sent = []
+
+    def emit(self, event, data, to=None, callback=None):
+        self.sent.append((to, callback))
+
+    def start_background_task(self, target):
+        return object()  # frames are flushed by the test
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(emitter_module, 'time', clock)
+    return clock
+
+def send_frame(emitter):
+    emitter.submit('performance', {'execution_time': 1.0})
+    emitter.flush()
+
+def test_unacknowledged_client_skips_frames_until_the_deadline(clock):
+    socketio = FakeSocketIO()
+    emitter = MetricEmitter(socketio, ack_timeout=5.0)
+    emitter.add_client('slow')
+    emitter.add_client('fast')
+
+    send_frame(emitter)
+    assert sorted(sid for sid, _ in socketio.sent) == ['fast', 'slow']
+    ack_fast = next(callback for sid, callback in socketio.sent if sid == 'fast')
+    ack_fast()
+    socketio.sent.clear()
+
+    clock.now += 1
+    send_frame(emitter)
+    assert [sid for sid, _ in socketio.sent] == ['fast']
+    assert emitter.frames_skipped == 1
+    socketio.sent[0][1]()
+
+    # The slow client's ack was lost: it gets frames again after the deadline
+    socketio.sent.clear()
+    clock.now += 5
+    send_frame(emitter)
+    assert sorted(sid for sid, _ in socketio.sent) == ['fast', 'slow']
+    assert emitter.acks_expired == 1
+
+def test_disconnected_client_is_forgotten(clock):
+    socketio = FakeSocketIO()
+    emitter = MetricEmitter(socketio)
+    emitter.add_client('gone')
+    send_frame(emitter)
+    emitter.remove_client('gone')
+    assert emitter._inflight == {}
@@ -0,0 +1,110 @@
+"""Tests for the StatsD and line-protocol push exporters."""
+
+import socket
+
+import pytest
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+from pipeline_monitor.exporters import LineProtocolExporter, StatsDExporter
+
+@pytest.fixture
+def listener():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.settimeout(5)
+    yield sock
+    sock.close()
+
+@pytest.fixture
+def metrics():
+    registry = CollectorRegistry()
+    runs = Counter('pipeline_runs', 'Runs', ['pipeline_name', 'status'], registry=registry)
+    duration = Histogram(
+        'pipeline_duration_seconds', 'Duration', ['pipeline_name'], buckets=(1, 10), registry=registry
+    )
+    memory = Gauge('pipeline_memory_usage_bytes', 'Memory', ['pipeline_name'], registry=registry)
+    Counter('unrelated_events', 'Not exported', registry=registry).inc()
+    return registry, runs, duration, memory
+
+def url_of(sock):
+    host, port = sock.getsockname()
+    return f'udp://{host}:{port}'
+
+def receive(sock, packets=1):
+    lines = []
+    for _ in range(packets):
+        lines.extend(sock.recv(65535).decode().split('\n'))
+    return sorted(lines)
+
+def test_dogstatsd_sends_counter_deltas_and_changed_gauges(listener, metrics):
+    registry, runs, duration, memory = metrics
+    exporter = StatsDExporter(url_of(listener), prefix='etl.', registry=registry)
+    runs.labels('load', 'success').inc(3)
+    duration.labels('load').observe(0.5)
+    memory.labels('load').set(2048)
+
+    assert exporter.flush() == 4
+    assert receive(listener) == [
+        'etl.pipeline_duration_seconds.count:1|c|#pipeline_name:load',
+        'etl.pipeline_duration_seconds.sum:0.5|c|#pipeline_name:load',
+        'etl.pipeline_memory_usage_bytes:2048|g|#pipeline_name:load',
+        'etl.pipeline_runs:3|c|#pipeline_name:load,status:success',
+    ]
+
+    runs.labels('load', 'success').inc(2)
+    assert exporter.flush() == 1  # unchanged values are not sent again
+    assert receive(listener) == ['etl.pipeline_runs:2|c|#pipeline_name:load,status:success']
+
+    assert exporter.flush() == 0
+    exporter.flush(force=True)  # the final push repeats the gauges
+    assert receive(listener) == ['etl.pipeline_memory_usage_bytes:2048|g|#pipeline_name:load']
+    exporter.transport.close()
+
+def test_plain_statsd_puts_label_values_in_the_name(listener, metrics):
+    registry, runs, _, _ = metrics
+    exporter = StatsDExporter(url_of(listener), flavor='statsd', registry=registry)
+    runs.labels('daily.load', 'failure').inc()
+    exporter.flush()
+    assert receive(listener) == ['pipeline_runs.daily_load.failure:1|c']
+    exporter.transport.close()
+
+def test_invalid_statsd_flavor():
+    with pytest.raises(ValueError):
+        StatsDExporter(flavor='graphite')
+
+def test_line_protocol_groups_fields_per_series(listener, metrics):
+    registry, runs, duration, _ = metrics
+    exporter = LineProtocolExporter(url_of(listener), registry=registry)
+    runs.labels('load job', 'success').inc(3)
+    duration.labels('load job').observe(0.25)
+    duration.labels('load job').observe(0.5)
+    exporter.flush()
+
+    lines = receive(listener)
+    fields = [line.rsplit(' ', 1) for line in lines]
+    assert [line for line, _ in fields] == [
+        r'pipeline_duration_seconds,pipeline_name=load\ job count=2.0,sum=0.75',
+        r'pipeline_runs,pipeline_name=load\ job,status=success value=3.0',
+    ]
+    assert all(timestamp.isdigit() for _, timestamp in fields)
+
+    runs.labels('load job', 'success').inc()
+    exporter.flush()
+    (line,) = receive(listener)
+    assert line.startswith(r'pipeline_runs,pipeline_name=load\ job,status=success value=1.0 ')
+    exporter.transport.close()
+
+def test_lines_are_packed_into_bounded_datagrams(listener, metrics):
+    registry, runs, _, _ = metrics
+    exporter = StatsDExporter(url_of(listener), registry=registry, max_packet_size=200)
+    for i in range(20):
+        runs.labels(f'job_{i}', 'success').inc()
+    exporter.flush()
+
+    stats = exporter.stats()
+    assert stats['packets'] > 1
+    assert stats['errors'] == 0
+    payloads = [listener.recv(65535) for _ in range(stats['packets'])]
+    assert all(len(payload) <= 200 for payload in payloads)
+    assert sum(payload.count(b'\n') + 1 for payload in payloads) == 20
+    exporter.transport.close()
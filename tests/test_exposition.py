@@ -0,0 +1,36 @@
+"""Tests for the cached /metrics exposition."""
+
+import gzip
+
+from prometheus_client.parser import text_string_to_metric_families
+
+from pipeline_monitor.exposition import ExpositionCache
+from pipeline_monitor.prometheus_metrics import REGISTRY
+
+def families(body):
+    return {family.name: family for family in text_string_to_metric_families(body.decode())}
+
+def test_unchanged_scrape_reuses_the_cached_body():
+    cache = ExpositionCache(REGISTRY)
+    cache.render(accept_encoding='gzip')
+    (formatted,) = cache._formats.values()
+    gzipped = formatted.gzipped
+
+    body, headers = cache.render(accept_encoding='gzip')
+    assert headers['Content-Encoding'] == 'gzip'
+    # The scrape metrics and process CPU changed, yet the body was kept
+    assert formatted.gzipped is gzipped
+    exposed = families(gzip.decompress(body))
+    assert exposed['pipeline_monitor_scrape_duration_seconds'].samples
+    assert 'pipeline_runs' in exposed
+
+    plain, headers = cache.render()
+    assert 'Content-Encoding' not in headers
+    assert families(plain).keys() == exposed.keys()
+
+def test_openmetrics_body_ends_with_a_single_eof():
+    cache = ExpositionCache(REGISTRY)
+    for _ in range(2):
+        body, _ = cache.render(accept='application/openmetrics-text; version=1.0.0')
+        assert body.endswith(b'# EOF\n')
+        assert body.count(b'# EOF') == 1
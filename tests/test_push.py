@@ -0,0 +1,200 @@
+"""Tests for pushing the registry to a Pushgateway or remote-write endpoint."""
+
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from prometheus_client import CollectorRegistry, Counter
+
+from pipeline_monitor import push
+from pipeline_monitor.push import RegistryPusher, _grouping_path
+
+class Receiver(ThreadingHTTPServer):
+    """HTTP stub that records requests and answers with queued statuses."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.requests = []
+        self.statuses = []
+        self.peers = set()
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def _record(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append((self.command, self.path, dict(self.headers), body))
+        self.server.peers.add(self.client_address)
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_PUT = do_POST = _record
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def receiver():
+    server = Receiver()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def registry():
+    registry = CollectorRegistry()
+    runs = Counter('pipeline_runs', 'Runs', ['pipeline_name'], registry=registry)
+    runs.labels('load').inc(3)
+    return registry
+
+def pusher_for(receiver, registry, **kwargs):
+    host, port = receiver.server_address
+    kwargs.setdefault('url', f'http://{host}:{port}')
+    return RegistryPusher(
+        registry=registry, interval=0, backoff=0.01, max_backoff=0.02, **kwargs
+    )
+
+def test_pushgateway_puts_the_registry_to_the_grouping_path(receiver, registry):
+    pusher = pusher_for(receiver, registry, job='nightly', grouping_key={'instance': 'host-1', 'dc': 'eu/west'})
+    assert pusher.push()
+    ((method, path, headers, body),) = receiver.requests
+    assert method == 'PUT'
+    # Values with a slash use the base64 form
+    assert path == '/metrics/job/nightly/dc@base64/ZXUvd2VzdA==/instance/host-1'
+    assert headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert b'pipeline_runs_total{pipeline_name="load"} 3.0' in body
+    pusher.stop()
+
+def test_grouping_path_of_empty_values():
+    assert _grouping_path('job', {'instance': ''}) == '/metrics/job/job/instance@base64/='
+
+# Minimal decoders for the remote-write body
+
+def unsnappy_literals(data):
+    length, pos = varint(data, 0)
+    out = bytearray()
+    while pos < len(data):
+        tag = data[pos]
+        assert tag & 3 == 0, 'only literals are expected'
+        size = tag >> 2
+        pos += 1
+        if size == 60:
+            size = data[pos]
+            pos += 1
+        elif size == 61:
+            (size,) = struct.unpack_from('<H', data, pos)
+            pos += 2
+        out += data[pos:pos + size + 1]
+        pos += size + 1
+    assert len(out) == length
+    return bytes(out)
+
+def varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+def fields(data):
+    pos = 0
+    while pos < len(data):
+        key, pos = varint(data, pos)
+        if key & 7 == 2:
+            size, pos = varint(data, pos)
+            yield key >> 3, data[pos:pos + size]
+            pos += size
+        elif key & 7 == 1:
+            yield key >> 3, data[pos:pos + 8]
+            pos += 8
+        else:
+            value, pos = varint(data, pos)
+            yield key >> 3, value
+
+def decode_write_request(data):
+    series = {}
+    for _, timeseries in fields(data):
+        labels, value = {}, None
+        for number, field in fields(timeseries):
+            if number == 1:
+                label = dict(fields(field))
+                labels[label[1].decode()] = label[2].decode()
+            else:
+                value = struct.unpack('<d', dict(fields(field))[1])[0]
+        series[labels.pop('__name__')] = (labels, value)
+    return series
+
+def test_remote_write_posts_a_snappy_protobuf_write_request(receiver, registry, monkeypatch):
+    monkeypatch.setattr(push, '_load_snappy', lambda: push._snappy_literals)
+    pusher = pusher_for(
+        receiver, registry, mode='remote_write', job='nightly', grouping_key={'instance': 'host-1'},
+        url='http://{}:{}/api/v1/write'.format(*receiver.server_address)
+    )
+    assert pusher.push()
+    ((method, path, headers, body),) = receiver.requests
+    assert (method, path) == ('POST', '/api/v1/write')
+    assert headers['Content-Type'] == 'application/x-protobuf'
+    assert headers['Content-Encoding'] == 'snappy'
+    assert headers['X-Prometheus-Remote-Write-Version'] == '0.1.0'
+
+    series = decode_write_request(unsnappy_literals(body))
+    assert series['pipeline_runs_total'] == (
+        {'instance': 'host-1', 'job': 'nightly', 'pipeline_name': 'load'}, 3.0
+    )
+    assert 'pipeline_runs_created' not in series
+    pusher.stop()
+
+def test_large_payloads_use_long_snappy_literals():
+    data = bytes(range(256)) * 600  # more than one 64 KiB literal
+    assert unsnappy_literals(push._snappy_literals(data)) == data
+
+@pytest.mark.parametrize('status', [500, 503, 429])
+def test_server_errors_and_rate_limits_are_retried(receiver, registry, status):
+    receiver.statuses = [status, status]
+    pusher = pusher_for(receiver, registry)
+    assert pusher.push()
+    assert len(receiver.requests) == 3
+    assert pusher.stats()['retries'] == 2
+    assert pusher.stats()['failures'] == 0
+    pusher.stop()
+
+def test_retries_are_bounded(receiver, registry):
+    receiver.statuses = [500] * 10
+    pusher = pusher_for(receiver, registry, max_retries=2)
+    assert not pusher.push()
+    assert len(receiver.requests) == 3
+    assert pusher.stats()['failures'] == 1
+    pusher._close_connection()
+
+@pytest.mark.parametrize('status', [400, 401, 404])
+def test_other_client_errors_are_not_retried(receiver, registry, status):
+    receiver.statuses = [status]
+    pusher = pusher_for(receiver, registry)
+    assert not pusher.push()
+    assert len(receiver.requests) == 1
+    assert pusher.stats()['retries'] == 0
+    pusher._close_connection()
+
+def test_backoff_doubles_up_to_the_maximum(registry):
+    pusher = RegistryPusher(registry=registry, interval=0, backoff=1.0, max_backoff=4.0)
+    for attempt, ceiling in ((1, 1.0), (2, 2.0), (3, 4.0), (6, 4.0)):
+        assert ceiling / 2 <= pusher._delay(attempt) <= ceiling
+
+def test_pushes_reuse_one_connection(receiver, registry):
+    pusher = pusher_for(receiver, registry)
+    for _ in range(3):
+        assert pusher.push()
+    assert len(receiver.requests) == 3
+    assert pusher.stats()['connections'] == 1
+    assert len(receiver.peers) == 1
+    pusher.stop()
@@ -0,0 +1,168 @@
+"""Tests for the alert rule state machine."""
+
+import pytest
+
+from pipeline_monitor import rules
+from pipeline_monitor.rules import PipelineRules, Rule, RuleEngine
+
+class FakeClock:
+    """Stands in for the ``time`` module inside ``rules``."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rules, 'time', clock)
+    return clock
+
+def bind(*rule_list):
+    alerts = []
+    return PipelineRules('job', list(rule_list), alerts.append), alerts
+
+def states(alerts):
+    return [alert.context['state'] for alert in alerts]
+
+def test_value_rule_fires_once_and_resolves(clock):
+    pipeline, alerts = bind(Rule('slow', 1.0, cooldown=60))
+    pipeline.observe(2.0)
+    pipeline.observe(3.0)
+    assert states(alerts) == ['firing']
+    assert pipeline.firing() == ['slow']
+    pipeline.observe(0.5)
+    assert states(alerts) == ['firing', 'resolved']
+    assert pipeline.firing() == []
+
+def test_refire_within_cooldown_is_notified_after_it(clock):
+    pipeline, alerts = bind(Rule('slow', 1.0, cooldown=60))
+    pipeline.observe(2.0)
+    clock.now += 1
+    pipeline.observe(0.5)
+    assert states(alerts) == ['firing', 'resolved']
+
+    # Fires again inside the cooldown: held back
+    clock.now += 9
+    pipeline.observe(2.0)
+    clock.now += 20
+    pipeline.observe(2.0)
+    assert states(alerts) == ['firing', 'resolved']
+    assert pipeline.firing() == ['slow']
+
+    # Still breaching once the cooldown has passed: notified once
+    clock.now += 31
+    pipeline.observe(2.0)
+    pipeline.observe(2.0)
+    assert states(alerts) == ['firing', 'resolved', 'firing']
+    assert alerts[-1].context['suppressed'] == 1
+
+    pipeline.observe(0.5)
+    assert states(alerts) == ['firing', 'resolved', 'firing', 'resolved']
+
+def test_refire_cleared_within_cooldown_stays_silent(clock):
+    pipeline, alerts = bind(Rule('slow', 1.0, cooldown=60))
+    pipeline.observe(2.0)
+    pipeline.observe(0.5)
+    clock.now += 10
+    pipeline.observe(2.0)
+    pipeline.observe(0.5)
+    clock.now += 100
+    pipeline.observe(0.5)
+    assert states(alerts) == ['firing', 'resolved']
+    assert pipeline.firing() == []
+
+def test_consecutive_breaches_needed_to_fire(clock):
+    pipeline, alerts = bind(Rule('slow', 1.0, consecutive=3))
+    pipeline.observe(2.0)
+    pipeline.observe(2.0)
+    pipeline.observe(0.5)  # resets the count
+    pipeline.observe(2.0)
+    pipeline.observe(2.0)
+    assert alerts == []
+    pipeline.observe(2.0)
+    assert states(alerts) == ['firing']
+
+def test_mean_rule_hysteresis_and_min_count(clock):
+    pipeline, alerts = bind(Rule('slow_mean', 1.0, stat='mean', clear=0.5, window=60, min_count=5))
+    for _ in range(4):
+        pipeline.observe(2.0)
+    assert alerts == []  # fewer than min_count calls
+    pipeline.observe(2.0)
+    assert states(alerts) == ['firing']
+
+    # The window moves past the slow calls; a mean between the clear
+    # level and the threshold keeps the rule firing
+    clock.now += 61
+    for _ in range(5):
+        pipeline.observe(0.8)
+    assert pipeline.firing() == ['slow_mean']
+    clock.now += 61
+    for _ in range(5):
+        pipeline.observe(0.2)
+    assert states(alerts) == ['firing', 'resolved']
+
+def test_percentile_rule(clock):
+    pipeline, alerts = bind(Rule('slow_p90', 1.0, stat='p90', window=60, min_count=10))
+    for _ in range(19):
+        pipeline.observe(0.1)
+    pipeline.observe(5.0)  # 1 of 20 calls beyond: p90 below the threshold
+    assert alerts == []
+    for _ in range(3):
+        pipeline.observe(5.0)  # p90 above once 3 of 22 are beyond
+    assert states(alerts) == ['firing']
+    assert alerts[0].context['count'] == 22
+
+def test_error_rate_rule(clock):
+    pipeline, alerts = bind(Rule('errors', 0.2, stat='error_rate', window=60, min_count=10))
+    for i in range(10):
+        pipeline.observe(0.1, success=i % 10 != 0)
+    assert alerts == []
+    for _ in range(3):
+        pipeline.observe(0.1, success=False)
+    assert states(alerts) == ['firing']
+    assert alerts[0].context['value'] == pytest.approx(3 / 12)
+
+def test_rate_of_change_rule(clock):
+    pipeline, alerts = bind(Rule('slowing', 0.5, stat='rate_of_change', window=60, min_count=5))
+    for _ in range(5):
+        pipeline.observe(1.0)
+    clock.now += 60
+    for _ in range(5):
+        pipeline.observe(2.0)
+    assert states(alerts) == ['firing']
+    assert alerts[0].context['value'] == pytest.approx(1.0)
+
+def test_memory_rule_ignores_calls_without_memory(clock):
+    pipeline, alerts = bind(Rule('big', 100.0, metric='memory'))
+    pipeline.observe(10.0)
+    assert alerts == []
+    pipeline.observe(0.1, memory_mb=200.0)
+    assert states(alerts) == ['firing']
+
+def test_engine_from_config():
+    engine = RuleEngine.from_config({
+        'cooldown': 30,
+        'rules': [
+            {'name': 'slow_p95', 'stat': 'p95', 'threshold': 2.0, 'for': 3, 'pipelines': ['load_*']},
+            {'name': 'bad', 'stat': 'p150', 'threshold': 1.0},
+        ]
+    }, time_threshold=5.0)
+    assert [rule.name for rule in engine.rules] == ['time_threshold', 'slow_p95']
+    assert engine.rules[0].notify_resolved is False
+    assert engine.rules[1].consecutive == 3
+    assert engine.rules[1].cooldown == 30
+
+    assert [state.rule.name for state in engine.bind('load_orders', print).states] == ['time_threshold', 'slow_p95']
+    assert [state.rule.name for state in engine.bind('report', print).states] == ['time_threshold']
+    assert RuleEngine.from_config({}).bind('report', print) is None
+
+def test_invalid_rules_raise():
+    with pytest.raises(ValueError):
+        Rule('x', 1.0, stat='median')
+    with pytest.raises(ValueError):
+        Rule('x', 1.0, clear=2.0)
+    with pytest.raises(ValueError):
+        Rule('x', 1.0, metric='cpu')
@@ -0,0 +1,87 @@
+"""Tests for pipeline label cardinality limits."""
+
+import pytest
+
+from pipeline_monitor import prometheus_metrics
+from pipeline_monitor.prometheus_metrics import REGISTRY, SeriesCache
+
+class FakeClock:
+    """Stands in for the ``time`` module inside ``prometheus_metrics``."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(prometheus_metrics, 'time', clock)
+    return clock
+
+def runs(label):
+    return REGISTRY.get_sample_value(
+        'pipeline_runs_total', {'pipeline_name': label, 'status': 'success'}
+    )
+
+def counter(name):
+    return REGISTRY.get_sample_value(name) or 0.0
+
+def test_names_over_the_limit_share_the_overflow_label(clock):
+    cache = SeriesCache(max_pipelines=2, stale_after=60, overflow_label='cache_overflow')
+    overflows = counter('pipeline_monitor_series_overflows_total')
+    cache.series('cache_a').record_run(True)
+    cache.series('cache_b').record_run(True)
+
+    for _ in range(50):
+        extra = cache.series('cache_c')
+        assert extra.label == 'cache_overflow'
+        extra.record_run(True)
+        cache.series('cache_d').record_run(True)
+
+    assert len(cache) == 2
+    assert runs('cache_overflow') == 100
+    assert runs('cache_c') is None
+    # Each distinct name is counted once
+    assert counter('pipeline_monitor_series_overflows_total') == overflows + 2
+
+def test_least_recently_used_stale_name_is_evicted(clock):
+    cache = SeriesCache(max_pipelines=2, stale_after=60, overflow_label='lru_overflow')
+    evictions = counter('pipeline_monitor_series_evictions_total')
+    first = cache.series('lru_a')
+    first.record_run(True)
+    stale = cache.series('lru_b')
+    stale.record_run(True)
+
+    clock.now += 30
+    first.record_run(True)  # lru_b is now the least recently used
+    clock.now += 31
+    assert cache.series('lru_c').label == 'lru_c'
+    assert stale.evicted
+    assert counter('pipeline_monitor_series_evictions_total') == evictions + 1
+    assert runs('lru_b') is None  # its series were removed
+    assert runs('lru_a') == 2
+
+    # Nothing is stale yet: the next new name overflows
+    assert cache.series('lru_d').label == 'lru_overflow'
+
+    # An evicted series still referenced (e.g. by a decorated function)
+    # is re-admitted on its next update, evicting the stale lru_a
+    clock.now += 61
+    stale.record_run(True)
+    assert not stale.evicted
+    assert first.evicted
+    assert cache.series('lru_b') is stale
+    assert runs('lru_b') == 1
+
+def test_evicted_name_drops_its_sketch(clock):
+    cache = SeriesCache(max_pipelines=1, stale_after=60)
+    cache.series('sketch_a').observe_duration(0.5)
+    clock.now += 61
+    cache.series('sketch_b').observe_duration(0.5)
+    (family,) = cache.collect()
+    assert {sample.labels['pipeline_name'] for sample in family.samples} == {'sketch_b'}
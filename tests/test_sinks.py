@@ -0,0 +1,161 @@
+"""Tests for the metric bus: delivery, drops and sink isolation."""
+
+import os
+import threading
+import time
+
+import pytest
+
+from pipeline_monitor import sinks, storage
+from pipeline_monitor.decorators import track_performance
+from pipeline_monitor.prometheus_metrics import PIPELINE_RUNS
+from pipeline_monitor.sinks import MetricBus, MetricEvent, Sink, build_sinks
+from pipeline_monitor.storage import RunStore
+
+class ListSink(Sink):
+    name = 'list'
+
+    def __init__(self):
+        self.events = []
+        self.batches = 0
+
+    def handle(self, events):
+        self.batches += 1
+        self.events.extend(events)
+
+class FailingSink(Sink):
+    name = 'failing'
+
+    def handle(self, events):
+        raise RuntimeError('sink down')
+
+class BlockedSink(Sink):
+    """Blocks in handle until released."""
+
+    name = 'blocked'
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.events = []
+
+    def handle(self, events):
+        self.release.wait(5)
+        self.events.extend(events)
+
+def event(i):
+    return MetricEvent('call', f'job_{i}', {'execution_time': 0.1})
+
+def test_events_reach_every_sink_in_order():
+    bus = MetricBus(batch_size=10, flush_interval=0.01)
+    first, second = ListSink(), ListSink()
+    second.name = 'second'
+    bus.add_sink(first)
+    bus.add_sink(second)
+    for i in range(100):
+        bus.publish(event(i))
+    assert bus.flush(timeout=5)
+    assert [e.name for e in first.events] == [f'job_{i}' for i in range(100)]
+    assert second.events == first.events
+    assert first.batches >= 10  # batches of at most batch_size
+    assert bus.sinks()['list']['delivered'] == 100
+    bus.close()
+
+def test_failing_sink_does_not_affect_others():
+    bus = MetricBus(flush_interval=0.01)
+    good = ListSink()
+    bus.add_sink(FailingSink())
+    bus.add_sink(good)
+    for i in range(50):
+        bus.publish(event(i))
+    assert bus.flush(timeout=5)
+    assert len(good.events) == 50
+    stats = bus.sinks()
+    assert stats['failing']['dropped'] == 50
+    assert stats['failing']['failures'] >= 1
+    assert stats['failing']['last_error'] == 'RuntimeError: sink down'
+    assert stats['list']['dropped'] == 0
+    bus.close()
+
+def test_slow_sink_drops_its_own_events_without_blocking():
+    bus = MetricBus(queue_size=10, flush_interval=0.01)
+    blocked, good = BlockedSink(), ListSink()
+    bus.add_sink(blocked)
+    bus.add_sink(good, queue_size=1000)
+
+    bus.publish(event(0))
+    deadline = time.monotonic() + 5
+    while bus.sinks()['blocked']['queued'] and time.monotonic() < deadline:
+        time.sleep(0.001)  # the worker took the first event and is stuck
+
+    start = time.perf_counter()
+    for i in range(1, 101):
+        bus.publish(event(i))
+    assert time.perf_counter() - start < 0.5  # never waits on the sink
+
+    assert bus.sinks()['blocked']['dropped'] == 90
+    blocked.release.set()
+    assert bus.flush(timeout=5)
+    assert len(blocked.events) == 11
+    assert len(good.events) == 101
+    assert bus.sinks()['list']['dropped'] == 0
+    bus.close()
+
+def test_remove_sink_delivers_queued_events():
+    bus = MetricBus(flush_interval=10)  # nothing delivered before removal
+    sink = ListSink()
+    bus.add_sink(sink)
+    for i in range(5):
+        bus.publish(event(i))
+    assert bus.remove_sink('list') is sink
+    assert len(sink.events) == 5
+    assert not bus.active
+    assert bus.remove_sink('list') is None
+
+def test_build_sinks_skips_disabled_and_unknown(tmp_path):
+    built = build_sinks({
+        'log': {'enabled': False},
+        'file': {'enabled': True, 'path': str(tmp_path / 'events.jsonl'), 'batch_size': 5},
+        'nightly': {'enabled': True, 'type': 'no_such_sink'},
+        'queue_size': 100,
+    })
+    assert [(sink.name, options) for sink, options in built] == [('file', {'batch_size': 5})]
+    built[0][0].close()
+
+def test_runs_are_counted_by_the_producer():
+    @track_performance
+    def bus_counted_job():
+        return 1
+
+    for _ in range(20):
+        bus_counted_job()
+    # Counted before any sink delivers
+    assert PIPELINE_RUNS.labels('bus_counted_job', 'success')._value.get() == 20
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_forked_child_delivers_its_own_events(monkeypatch, tmp_path):
+    bus = MetricBus(flush_interval=10)  # the parent's event stays queued
+    sink = ListSink()
+    bus.add_sink(sink)
+    monkeypatch.setattr(sinks, '_bus', bus)
+    store = RunStore(str(tmp_path / 'runs.db'), flush_interval=3600)
+    monkeypatch.setitem(storage._stores, store.path, store)
+    bus.publish(event(0))
+
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            bus.publish(event(1))
+            store.record('forked_job', 1.0)
+            if bus.flush(timeout=5) and [e.name for e in sink.events] == ['job_1'] and store.flush() == 1:
+                status = 0
+        finally:
+            os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+
+    assert bus.flush(timeout=5)
+    assert [e.name for e in sink.events] == ['job_0']
+    assert store.query('forked_job')[0]['count'] == 1
+    bus.close()
+    store.close()
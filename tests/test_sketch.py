@@ -0,0 +1,97 @@
+"""Tests for the duration sketch and the aggregator feeding it."""
+
+import random
+import threading
+
+import pytest
+
+from pipeline_monitor.aggregation import MetricAggregator
+from pipeline_monitor.prometheus_metrics import DURATION_BUCKETS
+from pipeline_monitor.sketch import DDSketch
+
+def exact(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+@pytest.mark.parametrize('distribution', ['uniform', 'lognormal', 'pareto'])
+def test_quantiles_within_relative_accuracy(distribution):
+    rng = random.Random(42)
+    draw = {
+        'uniform': lambda: rng.uniform(0.001, 100.0),
+        'lognormal': lambda: rng.lognormvariate(0.0, 2.0),
+        'pareto': lambda: rng.paretovariate(1.5),
+    }[distribution]
+    values = [draw() for _ in range(20000)]
+    sketch = DDSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    assert sketch.count == len(values)
+    assert sketch.sum == pytest.approx(sum(values))
+    for q in (0.5, 0.9, 0.99, 0.999):
+        assert sketch.quantile(q) == pytest.approx(exact(values, q), rel=0.01)
+
+def test_collapse_keeps_upper_quantiles():
+    values = [10 ** (i / 1000) for i in range(-6000, 6000)]  # 1 us to 1 Ms
+    sketch = DDSketch(relative_accuracy=0.01, max_bins=256)
+    for value in values:
+        sketch.add(value)
+    assert len(sketch) <= 256
+    for q in (0.99, 0.999):
+        assert sketch.quantile(q) == pytest.approx(exact(values, q), rel=0.01)
+
+def test_zero_values_and_empty_sketch():
+    sketch = DDSketch()
+    assert sketch.quantile(0.5) is None
+    for _ in range(10):
+        sketch.add(0.0)
+    sketch.add(1.0)
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == pytest.approx(1.0, rel=0.01)
+
+def test_add_bins_matches_add():
+    values = [random.Random(i).expovariate(2.0) for i in range(1000)] + [0.0]
+    one_by_one, binned = DDSketch(), DDSketch()
+    bins = {}
+    for value in values:
+        one_by_one.add(value)
+        key = binned.key(value)
+        bins[key] = bins.get(key, 0) + 1
+    binned.add_bins(bins, sum(values), min(values), max(values))
+    assert binned.count == one_by_one.count
+    assert binned.quantiles() == one_by_one.quantiles()
+
+def test_aggregator_feeds_sketch_on_flush():
+    sketches = {}
+    aggregator = MetricAggregator(
+        emit=False,
+        pipeline_buckets={'nightly': [60, 3600]},
+        sketch_for=lambda name: sketches.setdefault(name, DDSketch())
+    )
+    assert aggregator.buckets == DURATION_BUCKETS
+    assert aggregator.buckets_of('nightly') == (60.0, 3600.0, float('inf'))
+
+    values = [random.Random(i).lognormvariate(0.0, 1.0) for i in range(4000)]
+
+    def worker(chunk):
+        for value in chunk:
+            aggregator.record('job', value)
+
+    threads = [threading.Thread(target=worker, args=(values[i::4],)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    aggregator.record('nightly', 1800.0)
+    aggregator.flush()
+    aggregator.flush()  # nothing new: not added twice
+
+    sketch = sketches['job']
+    assert sketch.count == len(values)
+    assert sketch.sum == pytest.approx(sum(values))
+    assert sketch.quantile(0.99) == pytest.approx(exact(values, 0.99), rel=0.01)
+    assert sketches['nightly'].count == 1
+
+    aggregator.record('job', 1.0)
+    aggregator.flush()
+    assert sketch.count == len(values) + 1
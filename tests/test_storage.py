@@ -0,0 +1,97 @@
+"""Tests for the run store: rollups, queries and retention."""
+
+import pytest
+
+from pipeline_monitor.storage import HOUR, MINUTE, RunStore
+
+# Hour-aligned reference time
+T0 = 472222 * HOUR
+
+KEYS = ('count', 'failures', 'duration_min', 'duration_max', 'duration_avg', 'memory_max')
+
+@pytest.fixture
+def store(tmp_path):
+    store = RunStore(str(tmp_path / 'runs.db'), batch_size=7, flush_interval=3600)
+    yield store
+    store.close()
+
+def record_runs(store):
+    """Two pipelines over about two hours; every fifth etl run fails."""
+    runs = []
+    for i in range(120):
+        ts = T0 + i * 61  # crosses minute and hour boundaries
+        duration = 1.0 + (i % 10) / 10
+        success = i % 5 != 0
+        store.record('etl', duration, memory_mb=float(i), success=success, timestamp=ts)
+        runs.append((ts, duration, float(i), success))
+    store.record('report', 3.0, timestamp=T0 + 10)
+    store.flush()
+    return runs
+
+def expected(runs, start, end):
+    selected = [run for run in runs if start <= run[0] < end]
+    durations = [run[1] for run in selected]
+    return {
+        'count': len(selected),
+        'failures': sum(1 for run in selected if not run[3]),
+        'duration_min': min(durations),
+        'duration_max': max(durations),
+        'duration_avg': pytest.approx(sum(durations) / len(durations)),
+        'memory_max': max(run[2] for run in selected)
+    }
+
+def test_hour_rollups_match_raw_runs(store):
+    runs = record_runs(store)
+    rows = store.query('etl', start=T0, end=T0 + 3 * HOUR, step=HOUR)
+    assert [row['bucket'] for row in rows] == [T0, T0 + HOUR, T0 + 2 * HOUR]
+    for row in rows:
+        assert {key: row[key] for key in KEYS} == expected(
+            runs, row['bucket'], row['bucket'] + HOUR
+        )
+
+def test_minute_rollups_match_raw_runs(store):
+    runs = record_runs(store)
+    start, end = T0 + 30 * MINUTE, T0 + 40 * MINUTE
+    by_minute = store.query('etl', start=start, end=end, step=MINUTE)
+    # 30 s is no rollup resolution: raw runs, compared per minute
+    raw = store.query('etl', start=start, end=end, step=30)
+    assert len(by_minute) == 10
+    for row in by_minute:
+        assert {key: row[key] for key in KEYS} == expected(
+            runs, row['bucket'], row['bucket'] + MINUTE
+        )
+    assert sum(row['count'] for row in raw) == sum(row['count'] for row in by_minute)
+
+def test_single_bucket_per_pipeline(store):
+    runs = record_runs(store)
+    rows = store.query(start=T0, end=T0 + 3 * HOUR)
+    assert [row['pipeline_name'] for row in rows] == ['etl', 'report']
+    assert rows[0]['count'] == len(runs)
+    assert rows[0]['error_rate'] == pytest.approx(24 / 120)
+    assert rows[1]['memory_max'] is None
+
+def test_batches_accumulate_into_the_same_rollup(store):
+    for i in range(3):
+        store.record('etl', float(i + 1), timestamp=T0 + i)
+        store.flush()  # one batch per run, all in the same minute
+    (row,) = store.query('etl', start=T0, end=T0 + MINUTE, step=MINUTE)
+    assert row['count'] == 3
+    assert row['duration_min'] == 1.0
+    assert row['duration_max'] == 3.0
+    assert row['duration_avg'] == pytest.approx(2.0)
+
+def test_retention_deletes_old_runs_and_rollups(store):
+    record_runs(store)
+    day = 86400
+    store.retention = {'raw_days': 1, 'minute_days': 2, 'hour_days': 3}
+
+    store.apply_retention(now=T0 + HOUR + day)  # raw runs of the first hour expire
+    assert store.query('etl', start=T0, end=T0 + HOUR, step=30) == []
+    assert store.query('etl', start=T0, end=T0 + HOUR, step=MINUTE)
+
+    store.apply_retention(now=T0 + 3 * HOUR + 2 * day)
+    assert store.query('etl', start=T0, end=T0 + 3 * HOUR, step=MINUTE) == []
+    assert store.query('etl', start=T0, end=T0 + 3 * HOUR, step=HOUR)
+
+    store.apply_retention(now=T0 + 3 * HOUR + 3 * day)
+    assert store.query('etl', start=T0, end=T0 + 3 * HOUR, step=HOUR) == []
@@ -0,0 +1,56 @@
+"""Tests for tracing spans kept on the timing span stack."""
+
+import asyncio
+
+from pipeline_monitor import prometheus_metrics
+from pipeline_monitor.prometheus_metrics import start_pipeline_timing, stop_pipeline_timing
+from pipeline_monitor.tracing import Tracer, current_span
+
+def test_call_and_block_spans_nest_on_the_timing_stack():
+    tracer = Tracer()
+    start_pipeline_timing('outer')
+    outer = tracer.start_span('outer')
+    block = tracer.start_span('load', 'block')
+    start_pipeline_timing('inner')
+    inner = tracer.start_span('inner')
+
+    # The calls' trace spans share their timing entries; the block has its own
+    assert len(prometheus_metrics._spans.get()) == 3
+    assert current_span() is inner
+    assert inner.parent_id == block.span_id
+    assert block.parent_id == outer.span_id
+    assert inner.trace_id == outer.trace_id
+
+    tracer.end_span(inner)
+    inner_duration = stop_pipeline_timing('inner', record=False)
+    assert current_span() is block
+
+    # The nested call counts as child time of the call, not of the block
+    outer_entry = prometheus_metrics._spans.get()[0]
+    assert outer_entry.child_time == inner_duration
+
+    tracer.end_span(block)
+    assert current_span() is outer
+    tracer.end_span(outer)
+    assert current_span() is None
+    assert stop_pipeline_timing('outer', record=False) is not None
+    assert prometheus_metrics._spans.get() == ()
+    assert len(tracer.trace(outer.trace_id)) == 3
+
+def test_tasks_inherit_the_current_span():
+    tracer = Tracer()
+
+    async def child():
+        span = tracer.start_span('child')
+        tracer.end_span(span)
+        return span
+
+    async def main():
+        parent = tracer.start_span('parent', 'block')
+        spans = await asyncio.gather(child(), child())
+        tracer.end_span(parent)
+        return parent, spans
+
+    parent, spans = asyncio.run(main())
+    assert [span.parent_id for span in spans] == [parent.span_id] * 2
+    assert prometheus_metrics._spans.get() == ()